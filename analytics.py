@@ -0,0 +1,164 @@
+"""
+Analítica agregada de las partidas terminadas, en memoria constante.
+
+Cada partida que termina en el servidor se registra una vez en un
+GameAnalytics: contadores por resultado y tipo de derrota, la distribución
+exacta de grupos ordenados al final y bocetos de cuantiles para la
+cantidad de movimientos y el tiempo hasta terminar. Nada crece con la
+cantidad de partidas, así que el agregador puede correr indefinidamente.
+
+Los bocetos son del estilo DDSketch: buckets logarítmicos que garantizan un
+error relativo acotado (1 % por defecto) en cualquier cuantil y se pueden
+combinar entre procesos con merge().
+"""
+
+import math
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from game_logic import OracleGame, defeat_kind
+
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+MAX_DEFEAT_REASONS = 64    # Razones de derrota distintas que se cuentan por separado
+OTHER_REASONS = "(otras)"
+
+
+class QuantileSketch:
+    """
+    Boceto de cuantiles con error relativo acotado y memoria fija.
+    Los valores positivos caen en buckets de límites gamma^i; si hay más de
+    max_buckets se fusionan los más bajos (se pierde precisión solo en la cola
+    inferior). Los valores <= 0 se cuentan aparte.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, max_buckets: int = 512):
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._buckets: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float):
+        """Agrega una observación."""
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if value <= 0:
+            self.zero_count += 1
+            return
+        index = math.ceil(math.log(value) / self._log_gamma)
+        self._buckets[index] = self._buckets.get(index, 0) + 1
+        if len(self._buckets) > self.max_buckets:
+            self._collapse()
+
+    def _collapse(self):
+        """Fusiona los buckets más bajos hasta respetar max_buckets."""
+        indexes = sorted(self._buckets)
+        excess = len(indexes) - self.max_buckets
+        target = indexes[excess]
+        for index in indexes[:excess]:
+            self._buckets[target] += self._buckets.pop(index)
+
+    def merge(self, other: 'QuantileSketch'):
+        """Suma las observaciones de otro boceto con la misma precisión."""
+        if other._gamma != self._gamma:
+            raise ValueError("Solo se pueden combinar bocetos con la misma precisión")
+        for index, count in other._buckets.items():
+            self._buckets[index] = self._buckets.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        if len(self._buckets) > self.max_buckets:
+            self._collapse()
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Valor aproximado del cuantil q (0-1), o None si no hay datos."""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0 if self.min >= 0 else self.min
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if rank < seen:
+                value = 2 * self._gamma ** index / (self._gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def to_dict(self, quantiles: Iterable[float] = DEFAULT_QUANTILES) -> Dict:
+        """Resumen serializable: cantidad, media, extremos y cuantiles pedidos."""
+        return {
+            'count': self.count,
+            'mean': self.sum / self.count if self.count else None,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None,
+            'quantiles': {f"p{q * 100:g}": self.quantile(q) for q in quantiles}
+        }
+
+
+class GameAnalytics:
+    """Agregador de partidas terminadas (seguro entre hilos)."""
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self._lock = threading.Lock()
+        self.games = 0
+        self.victories = 0
+        self.defeats = 0
+        self.defeat_kinds: Dict[str, int] = {}
+        self.defeat_reasons: Dict[str, int] = {}
+        self.sorted_groups: Dict[int, int] = {}   # Partidas por grupos ordenados al final
+        self.moves = QuantileSketch(relative_accuracy)
+        self.victory_moves = QuantileSketch(relative_accuracy)
+        self.defeat_moves = QuantileSketch(relative_accuracy)
+        self.duration = QuantileSketch(relative_accuracy)
+
+    def record(self, game: OracleGame, now: float):
+        """Registra una partida terminada (victoria o derrota)."""
+        moves = game.moves_count
+        sorted_groups = game.sorted_groups
+        with self._lock:
+            self.games += 1
+            self.moves.add(moves)
+            self.sorted_groups[sorted_groups] = self.sorted_groups.get(sorted_groups, 0) + 1
+            if game.started_at:
+                self.duration.add(max(0.0, now - game.started_at))
+            if game.game_state == "victory":
+                self.victories += 1
+                self.victory_moves.add(moves)
+            else:
+                self.defeats += 1
+                self.defeat_moves.add(moves)
+                kind = defeat_kind(game.defeat_reason)
+                self.defeat_kinds[kind] = self.defeat_kinds.get(kind, 0) + 1
+                reason = game.defeat_reason
+                if reason not in self.defeat_reasons and len(self.defeat_reasons) >= MAX_DEFEAT_REASONS:
+                    reason = OTHER_REASONS
+                self.defeat_reasons[reason] = self.defeat_reasons.get(reason, 0) + 1
+
+    def snapshot(self, quantiles: Iterable[float] = DEFAULT_QUANTILES) -> Dict:
+        """Estado actual del agregado, listo para enviar como JSON."""
+        quantiles = tuple(quantiles)
+        with self._lock:
+            top_reasons: List = sorted(self.defeat_reasons.items(), key=lambda item: -item[1])
+            return {
+                'games': self.games,
+                'victories': self.victories,
+                'defeats': self.defeats,
+                'victory_rate': self.victories / self.games if self.games else None,
+                'defeat_kinds': dict(self.defeat_kinds),
+                'defeat_reasons': [{'reason': reason, 'count': count} for reason, count in top_reasons],
+                'sorted_groups_at_end': {str(groups): count for groups, count in sorted(self.sorted_groups.items())},
+                'moves': self.moves.to_dict(quantiles),
+                'victory_moves': self.victory_moves.to_dict(quantiles),
+                'defeat_moves': self.defeat_moves.to_dict(quantiles),
+                'duration_seconds': self.duration.to_dict(quantiles)
+            }
@@ -1,12 +1,629 @@
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, Response, abort, render_template, jsonify, request, g, send_file
+from werkzeug.security import safe_join
+import hmac
+import mimetypes
+import os
+import threading
 import time
+import uuid
+from functools import partial, wraps
+from analytics import DEFAULT_QUANTILES, GameAnalytics
+from assets import DIST_DIRNAME, IMMUTABLE_CACHE, compressed_variant, is_hashed_asset, load_manifest
+from fast_json import HAVE_FRAGMENTS, OracleJSONProvider, fragment
+from deck_pool import DEFAULT_HIGH_WATERMARK, DEFAULT_LOW_WATERMARK, DeckPool
+from game_log import GameLogWriter
 from game_logic import OracleGame
+from game_store import GameConflictError, GameStore, SQLiteGameStore
+from metrics import REGISTRY
+from outcomes import resolve_game
 
 # Crear instancia de la aplicación Flask
 app = Flask(__name__)
+app.json = OracleJSONProvider(app)
 
-# Instancia global del juego para mantener el estado entre requests
-game = OracleGame()
+# Assets versionados del build (python assets.py build): nombre original -> archivo en static/dist
+ASSET_URLS = load_manifest(app.static_folder)
+
+# Con orjson 3.9+ cada grupo del tablero se codifica una vez por versión y
+# las respuestas insertan ese JSON (ver OracleGame._group_payload)
+ENCODE_GROUP = fragment if HAVE_FRAGMENTS else None
+
+# Cookie que identifica la partida de cada jugador
+GAME_COOKIE = 'oracle_game_id'
+
+# Modo del servidor al ejecutar app.py: 'wsgi' (Flask) o 'asgi' (asyncio, ver asgi.py)
+SERVER_MODE = os.environ.get('ORACLE_SERVER_MODE', 'wsgi').lower()
+
+# Ritmo permitido para el modo automático por streaming (milisegundos por paso)
+STREAM_MIN_INTERVAL_MS = 50
+STREAM_MAX_INTERVAL_MS = 5000
+
+# Máximo de movimientos o pasos automáticos por request en los endpoints por lotes
+MAX_BATCH_MOVES = 256
+
+# Espera larga de /api/game_state y /api/next_move_info (?wait=segundos con If-None-Match)
+LONG_POLL_MAX_SECONDS = 30
+# Mientras se espera se vuelve a mirar la partida cada tanto: cubre los cambios
+# hechos por otros procesos (SQLiteGameStore), que store.changes no ve
+LONG_POLL_RECHECK_SECONDS = 1.0
+# Las respuestas con ETag dependen de la cookie de sesión y se revalidan siempre
+STATE_CACHE_CONTROL = 'private, no-cache'
+
+# Registro binario de todas las partidas (desactivado si no hay directorio)
+game_log = GameLogWriter(os.environ['ORACLE_LOG_DIR']) if os.environ.get('ORACLE_LOG_DIR') else None
+
+# Analítica agregada de las partidas terminadas en este proceso (ver /api/analytics)
+analytics = GameAnalytics()
+
+# Token de los clientes internos de analítica: solo ellos reciben el
+# resultado precalculado del reparto (a los jugadores no se les revela)
+INTERNAL_TOKEN = os.environ.get('ORACLE_INTERNAL_TOKEN')
+
+# Calcular la trayectoria completa al repartir: los pasos automáticos, las
+# pistas y el resultado interno solo avanzan un cursor (ORACLE_PRECOMPUTE=0 lo desactiva)
+PRECOMPUTE_TRAJECTORY = os.environ.get('ORACLE_PRECOMPUTE', '1') != '0'
+
+# Repartos (mazo y trayectoria) preparados en segundo plano para /api/new_game
+# y /api/reshuffle, entre dos marcas de agua (ORACLE_DECK_POOL_HIGH=0 lo desactiva)
+DECK_POOL_HIGH = int(os.environ.get('ORACLE_DECK_POOL_HIGH', DEFAULT_HIGH_WATERMARK))
+DECK_POOL_LOW = min(int(os.environ.get('ORACLE_DECK_POOL_LOW', DEFAULT_LOW_WATERMARK)), DECK_POOL_HIGH)
+deck_pool = DeckPool(DECK_POOL_LOW, DECK_POOL_HIGH, precompute=PRECOMPUTE_TRAJECTORY) if DECK_POOL_HIGH > 0 else None
+
+# Streams automáticos activos: id de partida -> evento de cancelación
+active_streams = {}
+active_streams_lock = threading.Lock()
+
+# Movimientos entre snapshots del tablero de las partidas nuevas, para
+# undo/rewind/seek (0 los desactiva; sin definir, el valor por defecto del
+# motor). Las partidas guardadas conservan el intervalo con que se crearon.
+if os.environ.get('ORACLE_SNAPSHOT_INTERVAL'):
+    game_factory = partial(OracleGame, snapshot_interval=int(os.environ['ORACLE_SNAPSHOT_INTERVAL']))
+else:
+    game_factory = OracleGame
+
+# Almacén de partidas por sesión (cada visitante tiene su propio OracleGame).
+# Con ORACLE_STORE_DB las partidas se comparten entre procesos en SQLite, para
+# correr con varios workers (gunicorn -w N); si no, viven en este proceso.
+if os.environ.get('ORACLE_STORE_DB'):
+    store = SQLiteGameStore(
+        os.environ['ORACLE_STORE_DB'],
+        ttl_seconds=float(os.environ.get('ORACLE_GAME_TTL', 1800)),
+        max_cached=int(os.environ.get('ORACLE_MAX_GAMES', 5000)),
+        factory=game_factory
+    )
+else:
+    store = GameStore(
+        max_games=int(os.environ.get('ORACLE_MAX_GAMES', 5000)),
+        max_memory_bytes=int(os.environ.get('ORACLE_MAX_MEMORY_MB', 64)) * 1024 * 1024,
+        ttl_seconds=float(os.environ.get('ORACLE_GAME_TTL', 1800)),
+        spill_dir=os.environ.get('ORACLE_SPILL_DIR') or None,
+        factory=game_factory
+    )
+
+# Métricas de la app (las del motor se registran en game_logic)
+REQUEST_LATENCY = REGISTRY.histogram('oracle_request_seconds', 'Latencia de las rutas de la API',
+                                     ('route', 'method', 'status'))
+REGISTRY.gauge('oracle_games_in_memory', 'Partidas cargadas en memoria', lambda: len(store))
+REGISTRY.gauge('oracle_games_memory_bytes', 'Memoria aproximada de las partidas cargadas',
+               lambda: store.memory_bytes)
+REGISTRY.gauge('oracle_auto_streams_active', 'Streams automáticos abiertos', lambda: len(active_streams))
+REGISTRY.gauge('oracle_deck_pool_size', 'Repartos listos en el pool', lambda: len(deck_pool) if deck_pool else 0)
+
+def current_game_id():
+    """
+    Obtiene el id de partida de la sesión actual.
+    Si el visitante no tiene uno válido se genera y se envía en la respuesta.
+    """
+    game_id = request.cookies.get(GAME_COOKIE)
+    if not GameStore.is_valid_id(game_id):
+        game_id = g.get('new_game_id')
+        if game_id is None:
+            game_id = g.new_game_id = uuid.uuid4().hex
+    return game_id
+
+def state_payload(game, data):
+    """
+    Estado a incluir en la respuesta de un movimiento.
+    Si el cliente envía since_version (y epoch) recibe solo los cambios en
+    'delta'; si no, recibe el estado completo en 'state' como siempre.
+    """
+    since_version = data.get('since_version')
+    if not isinstance(since_version, int):
+        return {'state': game.get_current_state(ENCODE_GROUP)}
+    return {'delta': game.get_state_delta(since_version, data.get('epoch'), ENCODE_GROUP)}
+
+def parse_moves(data):
+    """
+    Lista de movimientos de /api/moves: pares [origen, destino] u objetos
+    {from_group, to_group}. Lanza ValueError si el formato no es válido.
+    """
+    moves = data.get('moves')
+    if not isinstance(moves, list) or not moves:
+        raise ValueError('Falta la lista de movimientos (moves)')
+    if len(moves) > MAX_BATCH_MOVES:
+        raise ValueError(f'Máximo {MAX_BATCH_MOVES} movimientos por request')
+    parsed = []
+    for move in moves:
+        if isinstance(move, dict):
+            move = (move.get('from_group'), move.get('to_group'))
+        if not isinstance(move, (list, tuple)) or len(move) != 2 or \
+                not all(isinstance(group, int) and not isinstance(group, bool) for group in move):
+            raise ValueError(f'Movimiento inválido: {move!r}')
+        parsed.append((move[0], move[1]))
+    return parsed
+
+def parse_steps(data):
+    """Cantidad de pasos pedida a /api/auto_step (1 por defecto, hasta MAX_BATCH_MOVES)."""
+    steps = data.get('steps', 1)
+    if not isinstance(steps, int) or isinstance(steps, bool) or not 1 <= steps <= MAX_BATCH_MOVES:
+        raise ValueError(f'steps debe ser un entero entre 1 y {MAX_BATCH_MOVES}')
+    return steps
+
+def parse_move_number(data, key, default=None):
+    """Número de movimiento (entero >= 0) de /api/undo y /api/seek. Lanza ValueError si no es válido."""
+    value = data.get(key, default)
+    if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+        raise ValueError(f'{key} debe ser un entero mayor o igual a 0')
+    return value
+
+def parse_wait(value):
+    """Segundos de espera larga pedidos con ?wait= (0 si no se indican)."""
+    if not value:
+        return 0.0
+    try:
+        wait = float(value)
+    except ValueError:
+        raise ValueError('wait debe ser un número de segundos')
+    if not 0 <= wait <= LONG_POLL_MAX_SECONDS:
+        raise ValueError(f'wait debe estar entre 0 y {LONG_POLL_MAX_SECONDS} segundos')
+    return wait
+
+def parse_quantiles(value):
+    """Cuantiles pedidos a /api/analytics ('0.5,0.99'); los de siempre si no se indican."""
+    if not value:
+        return DEFAULT_QUANTILES
+    try:
+        quantiles = tuple(float(q) for q in value.split(','))
+    except ValueError:
+        raise ValueError('q debe ser una lista de cuantiles separados por coma')
+    if len(quantiles) > 20 or not all(0 <= q <= 1 for q in quantiles):
+        raise ValueError('Los cuantiles deben estar entre 0 y 1 (máximo 20)')
+    return quantiles
+
+def pooled_deal(game):
+    """Reparto listo del pool para la variante de game, o None si hay que repartir en el request."""
+    if deck_pool is None or game.config.key != deck_pool.config.key:
+        return None
+    return deck_pool.take()
+
+def start_new_game(game):
+    """Empieza una partida nueva con un reparto del pool (o uno nuevo si está vacío)."""
+    deal = pooled_deal(game)
+    if deal is None:
+        game.start_game(precompute=PRECOMPUTE_TRAJECTORY)
+    else:
+        game.start_game(deck=deal.deck, precompute=PRECOMPUTE_TRAJECTORY, trajectory=deal.trajectory)
+
+def reshuffle_game_deal(game):
+    """Rebarajea con un reparto del pool (o rebarajeando el mazo si está vacío)."""
+    # Con movimientos hechos el rebarajado falla: no se gasta un reparto del pool
+    deal = pooled_deal(game) if not game.moves_count else None
+    if deal is None:
+        return game.reshuffle(precompute=PRECOMPUTE_TRAJECTORY)
+    return game.reshuffle(precompute=PRECOMPUTE_TRAJECTORY, deck=deal.deck, trajectory=deal.trajectory)
+
+def log_game_start(game):
+    """Registra en el log binario un reparto nuevo."""
+    if game_log:
+        game_log.log_start(game)
+
+def record_moves(game, moves_before):
+    """
+    Registra en el log binario los movimientos hechos desde moves_before y,
+    si con ellos terminó la partida, su evento final y la suma a la analítica
+    agregada (una vez por reparto, aunque se deshaga y vuelva a terminar).
+    """
+    if game.moves_count <= moves_before:
+        return
+    first_end = game.game_state in ("victory", "defeat") and not game.outcome_recorded
+    if game_log:
+        game_log.log_moves(game, moves_before, end=first_end)
+    if first_end:
+        game.outcome_recorded = True
+        analytics.record(game, time.time())
+
+def record_seek(game, moves_before):
+    """
+    Registra en el log binario un salto de /api/undo, /api/rewind o /api/seek:
+    hacia atrás como evento de salto, hacia adelante como movimientos.
+    """
+    if game.moves_count < moves_before:
+        if game_log:
+            game_log.log_seek(game)
+    else:
+        record_moves(game, moves_before)
+
+def seek_payload(game, data, target):
+    """
+    Lleva la partida al movimiento target (undo, rewind, seek) y devuelve la
+    respuesta y su código HTTP.
+    """
+    moves_before = game.moves_count
+    success, message = game.seek(target)
+    record_seek(game, moves_before)
+    return {
+        'success': success,
+        'message': message,
+        'move_number': game.moves_count,
+        **state_payload(game, data),
+        'can_continue': game.game_state == "playing"
+    }, 200 if success else 400
+
+def state_etag(game):
+    """ETag del estado de una partida: su época y versión, que cambian con cada modificación."""
+    return f'"{game.epoch:x}-{game.version}"'
+
+def etag_matches(if_none_match, etag):
+    """Indica si la cabecera If-None-Match incluye etag (comparación débil)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    return any(tag.strip().removeprefix('W/') == etag for tag in if_none_match.split(','))
+
+def game_state_payload(game):
+    return {
+        'success': True,
+        'state': game.get_current_state(ENCODE_GROUP)
+    }
+
+def next_move_payload(game):
+    return {
+        'success': True,
+        'move_info': game.get_next_move_info()
+    }
+
+def check_state(game_id, if_none_match, build):
+    """
+    Mira la partida una vez y devuelve (etag, payload). Si el cliente ya
+    tiene ese estado, payload es None: build no se llama y no se serializa nada.
+    """
+    with store.checkout(game_id) as game:
+        etag = state_etag(game)
+        if etag_matches(if_none_match, etag):
+            return etag, None
+        return etag, build(game)
+
+def wait_for_state(game_id, if_none_match, wait, build):
+    """
+    check_state con espera larga: mientras el cliente ya tenga el estado,
+    espera hasta wait segundos a que la partida cambie.
+    """
+    changed = threading.Event()
+    if wait:
+        store.changes.subscribe(game_id, changed)
+    try:
+        deadline = time.monotonic() + wait
+        while True:
+            changed.clear()
+            etag, payload = check_state(game_id, if_none_match, build)
+            remaining = deadline - time.monotonic()
+            if payload is not None or remaining <= 0:
+                return etag, payload
+            changed.wait(min(remaining, LONG_POLL_RECHECK_SECONDS))
+    finally:
+        if wait:
+            store.changes.unsubscribe(game_id, changed)
+
+def conditional_state_response(build, wait):
+    """
+    Respuesta con ETag de un GET que depende solo del estado de la partida:
+    304 sin cuerpo si coincide con If-None-Match, tras esperar hasta wait
+    segundos a que la partida cambie. Cada espera ocupa un hilo del servidor
+    WSGI (en asgi.py no bloquea).
+    """
+    etag, payload = wait_for_state(current_game_id(), request.headers.get('If-None-Match'), wait, build)
+    response = jsonify(payload) if payload is not None else Response(status=304)
+    response.headers['ETag'] = etag
+    response.headers['Cache-Control'] = STATE_CACHE_CONTROL
+    return response
+
+def conflict_payload(error):
+    """Respuesta para una partida modificada por otro proceso (HTTP 409)."""
+    return {
+        'success': False,
+        'message': str(error),
+        'conflict': True
+    }
+
+def is_internal_token(token):
+    """Indica si token es el de los clientes internos de analítica."""
+    return bool(INTERNAL_TOKEN and token and hmac.compare_digest(token, INTERNAL_TOKEN))
+
+def internal_outcome(game, token):
+    """
+    Resultado precalculado del reparto actual para analítica interna.
+    Solo se incluye si la request trae el header X-Oracle-Internal-Token
+    correcto (token es su valor).
+    """
+    if not is_internal_token(token):
+        return {}
+    return {'outcome': resolve_game(game)._asdict()}
+
+def bad_request(message):
+    """Respuesta para parámetros inválidos (HTTP 400)."""
+    return {
+        'success': False,
+        'message': str(message)
+    }, 400
+
+# Acciones de la API compartidas por las rutas de este módulo y las de asgi.py:
+# reciben el id de partida y los datos ya leídos de la request, toman la
+# partida y devuelven (payload, código HTTP). Cada front end solo lee la
+# request y escribe la respuesta (asgi.py las corre en su pool de hilos).
+
+def api_action(error_message, body=False):
+    """
+    Decorador de una acción de la API: un conflicto con otro proceso responde
+    409 y cualquier otro error, 500 con el mensaje error_message.
+    Con body=True el último argumento es el cuerpo JSON ya parseado: sin
+    cuerpo la acción recibe {} y un cuerpo que no es un objeto responde 400.
+    """
+    def decorate(action):
+        @wraps(action)
+        def run(*args):
+            if body:
+                *args, data = args
+                if data is None:
+                    data = {}
+                elif not isinstance(data, dict):
+                    return bad_request('El cuerpo de la request debe ser un objeto JSON')
+                args.append(data)
+            try:
+                return action(*args)
+            except GameConflictError as e:
+                return conflict_payload(e), 409
+            except Exception as e:
+                return {
+                    'success': False,
+                    'message': f'{error_message}: {str(e)}'
+                }, 500
+        return run
+    return decorate
+
+@api_action('Error al iniciar el juego')
+def new_game_action(game_id, token):
+    """Reinicia la partida y devuelve el estado inicial."""
+    with store.checkout(game_id) as game:
+        start_new_game(game)
+        log_game_start(game)
+        return {
+            'success': True,
+            'message': 'Nuevo juego iniciado',
+            'state': game.get_current_state(ENCODE_GROUP),
+            **internal_outcome(game, token)
+        }, 200
+
+@api_action('Error al realizar el movimiento', body=True)
+def move_action(game_id, data):
+    """Valida y ejecuta un movimiento manual de from_group a to_group."""
+    from_group = data.get('from_group')
+    to_group = data.get('to_group')
+    if from_group is None or to_group is None:
+        return bad_request('Faltan parámetros from_group y to_group')
+
+    with store.checkout(game_id) as game:
+        moves_before = game.moves_count
+        success, message = game.make_move(from_group, to_group)
+        record_moves(game, moves_before)
+        return {
+            'success': success,
+            'message': message,
+            **state_payload(game, data)
+        }, 200
+
+@api_action('Error al realizar los movimientos', body=True)
+def moves_action(game_id, data):
+    """Aplica en orden la lista de movimientos de data hasta el primero inválido."""
+    try:
+        moves = parse_moves(data)
+    except ValueError as e:
+        return bad_request(e)
+
+    with store.checkout(game_id) as game:
+        moves_before = game.moves_count
+        applied, success, message = game.make_moves(moves)
+        record_moves(game, moves_before)
+        return {
+            'success': success,
+            'message': message,
+            'applied': applied,
+            'failed_index': None if success else applied,
+            **state_payload(game, data),
+            'can_continue': game.game_state == "playing"
+        }, 200
+
+@api_action('Error en el paso automático', body=True)
+def auto_step_action(game_id, data):
+    """Ejecuta los pasos automáticos pedidos en data ('steps', 1 por defecto)."""
+    try:
+        steps = parse_steps(data)
+    except ValueError as e:
+        return bad_request(e)
+
+    with store.checkout(game_id) as game:
+        moves_before = game.moves_count
+        applied, success, message = game.auto_play_steps(steps)
+        record_moves(game, moves_before)
+        return {
+            'success': success,
+            'message': message,
+            'applied': applied,
+            **state_payload(game, data),
+            'can_continue': game.game_state == "playing"
+        }, 200
+
+@api_action('Error al deshacer', body=True)
+def undo_action(game_id, data):
+    """Deshace los movimientos pedidos en data ('steps', 1 por defecto)."""
+    try:
+        steps = parse_move_number(data, 'steps', 1)
+    except ValueError as e:
+        return bad_request(e)
+
+    with store.checkout(game_id) as game:
+        if not game.moves_count:
+            return bad_request("No hay movimientos para deshacer")
+        return seek_payload(game, data, max(0, game.moves_count - steps))
+
+@api_action('Error al volver al inicio', body=True)
+def rewind_action(game_id, data):
+    """Vuelve al reparto inicial."""
+    with store.checkout(game_id) as game:
+        return seek_payload(game, data, 0)
+
+@api_action('Error al saltar al movimiento', body=True)
+def seek_action(game_id, data):
+    """Lleva la partida al movimiento pedido en data ('move')."""
+    try:
+        target = parse_move_number(data, 'move')
+    except ValueError as e:
+        return bad_request(e)
+
+    with store.checkout(game_id) as game:
+        return seek_payload(game, data, target)
+
+@api_action('Error al obtener el historial')
+def history_action(game_id, offset, limit):
+    """Página del historial de movimientos (offset desde 0, limit hasta 500)."""
+    offset = max(0, offset)
+    limit = min(max(1, limit), 500)
+    with store.checkout(game_id) as game:
+        moves = game.get_history(offset, limit)
+        total = game.moves_count
+    return {
+        'success': True,
+        'moves': moves,
+        'offset': offset,
+        'limit': limit,
+        'total': total
+    }, 200
+
+@api_action('Error al rebarajear')
+def reshuffle_action(game_id, token):
+    """Rebarajea el reparto si todavía no hay movimientos."""
+    with store.checkout(game_id) as game:
+        success, message = reshuffle_game_deal(game)
+        if not success:
+            return bad_request(message)
+        log_game_start(game)
+        return {
+            'success': True,
+            'message': message,
+            'state': game.get_current_state(ENCODE_GROUP),
+            **internal_outcome(game, token)
+        }, 200
+
+def analytics_action(q):
+    """Analítica agregada con los cuantiles pedidos en q ('0.5,0.99')."""
+    try:
+        quantiles = parse_quantiles(q)
+    except ValueError as e:
+        return bad_request(e)
+    return {
+        'success': True,
+        'analytics': analytics.snapshot(quantiles)
+    }, 200
+
+def stream_step(game_id, since_version, epoch):
+    """
+    Un paso de /api/auto_stream. Devuelve el payload del evento, la versión
+    y época desde las que pedir el próximo delta y si el stream sigue.
+    """
+    try:
+        with store.checkout(game_id) as game:
+            moves_before = game.moves_count
+            success, message = game.auto_play_step()
+            record_moves(game, moves_before)
+            can_continue = game.game_state == "playing"
+            return {
+                'success': success,
+                'message': message,
+                'delta': game.get_state_delta(since_version, epoch, ENCODE_GROUP),
+                'can_continue': can_continue
+            }, game.version, game.epoch, success and can_continue
+    except GameConflictError as e:
+        return conflict_payload(e), since_version, epoch, False
+
+def step_event(payload):
+    """Evento SSE 'step' de /api/auto_stream."""
+    return f"event: step\ndata: {app.json.dumps(payload)}\n\n"
+
+def request_data():
+    """Cuerpo JSON de la request, o None si falta o no es JSON válido."""
+    return request.get_json(silent=True)
+
+def action_response(action, *args):
+    """Respuesta de Flask para una acción de la API."""
+    payload, status = action(*args)
+    return jsonify(payload), status
+
+@app.before_request
+def start_request_timer():
+    """Marca el inicio de la request para medir su latencia."""
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def observe_request_latency(response):
+    """
+    Registra la latencia de las rutas de la API, agrupada por la regla de la
+    ruta (no por la URL) para que la cantidad de series quede acotada.
+    En los streams SSE mide solo hasta enviar los encabezados.
+    """
+    started = g.get('request_started')
+    if started is not None and request.url_rule is not None and request.path.startswith('/api/'):
+        REQUEST_LATENCY.observe(time.perf_counter() - started, request.url_rule.rule,
+                                request.method, str(response.status_code))
+    return response
+
+@app.after_request
+def set_game_cookie(response):
+    """Envía la cookie de sesión a los visitantes nuevos."""
+    new_game_id = g.get('new_game_id')
+    if new_game_id:
+        response.set_cookie(GAME_COOKIE, new_game_id, max_age=30 * 24 * 3600,
+                            httponly=True, samesite='Lax')
+    return response
+
+@app.url_defaults
+def versioned_static_urls(endpoint, values):
+    """Reescribe url_for('static', ...) hacia el asset versionado si hay build."""
+    if endpoint == 'static' and values.get('filename') in ASSET_URLS:
+        values['filename'] = ASSET_URLS[values['filename']]
+
+def versioned_asset_response(filename, accept_encoding):
+    """
+    Respuesta de un asset versionado (static/dist): en la variante
+    precomprimida que acepte el cliente y con caché inmutable.
+    """
+    path = safe_join(app.static_folder, filename)
+    if path is None or not is_hashed_asset(filename) or not os.path.isfile(path):
+        abort(404)
+    served, encoding = compressed_variant(path, accept_encoding)
+    response = send_file(served, mimetype=mimetypes.guess_type(filename)[0], conditional=True)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE
+    return response
+
+@app.route(f'/static/{DIST_DIRNAME}/<path:filename>')
+def versioned_asset(filename):
+    """
+    Assets generados por el build. Su nombre cambia con su contenido, así que
+    el navegador los puede guardar sin volver a validarlos.
+    """
+    return versioned_asset_response(f"{DIST_DIRNAME}/{filename}", request.headers.get('Accept-Encoding', ''))
 
 @app.route('/')
 def index():
@@ -22,30 +639,22 @@ def new_game():
     API para iniciar una nueva partida.
     Reinicia el juego y devuelve el estado inicial.
     """
-    try:
-        game.start_game()
-        return jsonify({
-            'success': True,
-            'message': 'Nuevo juego iniciado',
-            'state': game.get_current_state()
-        })
-    except Exception as e:
-        return jsonify({
-            'success': False,
-            'message': f'Error al iniciar el juego: {str(e)}'
-        }), 500
+    return action_response(new_game_action, current_game_id(), request.headers.get('X-Oracle-Internal-Token'))
 
 @app.route('/api/game_state', methods=['GET'])
 def get_game_state():
     """
     API para obtener el estado actual del juego.
     Devuelve toda la información necesaria para actualizar la interfaz.
+    Con If-None-Match responde 304 si el estado no cambió; con ?wait=segundos
+    espera a que cambie antes de responder 304.
     """
     try:
-        return jsonify({
-            'success': True,
-            'state': game.get_current_state()
-        })
+        try:
+            wait = parse_wait(request.args.get('wait'))
+        except ValueError as e:
+            return action_response(bad_request, e)
+        return conditional_state_response(game_state_payload, wait)
     except Exception as e:
         return jsonify({
             'success': False,
@@ -58,112 +667,181 @@ def make_move():
     API para realizar un movimiento manual.
     Recibe el grupo origen y destino, valida y ejecuta el movimiento.
     """
-    try:
-        data = request.json
-        from_group = data.get('from_group')
-        to_group = data.get('to_group')
-        
-        if from_group is None or to_group is None:
-            return jsonify({
-                'success': False,
-                'message': 'Faltan parámetros from_group y to_group'
-            }), 400
-        
-        success, message = game.make_move(from_group, to_group)
-        
-        return jsonify({
-            'success': success,
-            'message': message,
-            'state': game.get_current_state()
-        })
-    
-    except Exception as e:
-        return jsonify({
-            'success': False,
-            'message': f'Error al realizar el movimiento: {str(e)}'
-        }), 500
+    return action_response(move_action, current_game_id(), request_data())
+
+@app.route('/api/moves', methods=['POST'])
+def make_moves():
+    """
+    API para realizar varios movimientos manuales en una sola request.
+    Recibe la lista ordenada de movimientos, los aplica uno a uno y se
+    detiene en el primero inválido o al terminar la partida. Devuelve un
+    único resultado con el estado final.
+    """
+    return action_response(moves_action, current_game_id(), request_data())
 
 @app.route('/api/auto_step', methods=['POST'])
 def auto_step():
     """
     API para ejecutar un paso en modo automático.
     Permite que el juego se mueva solo siguiendo las reglas del oráculo.
+    Con 'steps' ejecuta varios pasos seguidos y devuelve el estado final.
     """
-    try:
-        success, message = game.auto_play_step()
-        
-        return jsonify({
-            'success': success,
-            'message': message,
-            'state': game.get_current_state(),
-            'can_continue': game.game_state == "playing"
-        })
-    
-    except Exception as e:
-        return jsonify({
-            'success': False,
-            'message': f'Error en el paso automático: {str(e)}'
-        }), 500
+    return action_response(auto_step_action, current_game_id(), request_data())
+
+@app.route('/api/undo', methods=['POST'])
+def undo_move():
+    """
+    API para deshacer movimientos ('steps', 1 por defecto).
+    También sirve para volver a jugar desde una partida terminada.
+    """
+    return action_response(undo_action, current_game_id(), request_data())
+
+@app.route('/api/rewind', methods=['POST'])
+def rewind_game():
+    """API para volver al reparto inicial, antes del primer movimiento."""
+    return action_response(rewind_action, current_game_id(), request_data())
+
+@app.route('/api/seek', methods=['POST'])
+def seek_move():
+    """
+    API para llevar la partida a un movimiento cualquiera ('move').
+    Hacia atrás restaura el tablero; hacia adelante juega en modo automático.
+    """
+    return action_response(seek_action, current_game_id(), request_data())
 
 @app.route('/api/next_move_info', methods=['GET'])
 def get_next_move_info():
     """
     API para obtener información sobre el próximo movimiento.
     Útil para mostrar indicaciones al jugador sobre qué carta mover.
+    Admite If-None-Match y ?wait= igual que /api/game_state.
     """
     try:
-        move_info = game.get_next_move_info()
-        return jsonify({
-            'success': True,
-            'move_info': move_info
-        })
+        try:
+            wait = parse_wait(request.args.get('wait'))
+        except ValueError as e:
+            return action_response(bad_request, e)
+        return conditional_state_response(next_move_payload, wait)
     except Exception as e:
         return jsonify({
             'success': False,
             'message': f'Error al obtener información del movimiento: {str(e)}'
         }), 500
 
+@app.route('/api/history', methods=['GET'])
+def get_history():
+    """
+    API para consultar el historial de movimientos por páginas.
+    Parámetros: offset (desde qué movimiento, base 0) y limit (máximo 500).
+    """
+    return action_response(history_action, current_game_id(),
+                           request.args.get('offset', 0, type=int), request.args.get('limit', 50, type=int))
+
 @app.route('/api/reshuffle', methods=['POST'])
 def reshuffle_game():
     """
     API para rebarajear las cartas antes del primer movimiento.
     Solo disponible si no se han realizado movimientos aún.
     """
+    return action_response(reshuffle_action, current_game_id(), request.headers.get('X-Oracle-Internal-Token'))
+
+@app.route('/api/auto_stream', methods=['GET'])
+def auto_stream():
+    """
+    API de modo automático por streaming (Server-Sent Events).
+    Ejecuta auto_play_step en el servidor y envía cada paso como evento 'step'
+    al ritmo pedido (interval_ms), con el mismo formato que /api/auto_step.
+    Se cancela al cerrar la conexión, al abrir otro stream para la misma
+    partida o con /api/auto_stream/stop.
+    """
     try:
-        if len(game.moves_history) > 0:
-            return jsonify({
-                'success': False,
-                'message': 'No se puede rebarajear después de realizar movimientos'
-            }), 400
-        
-        # Rebarajear y repartir nuevamente
-        game.shuffle_deck()
-        game.deal_cards()
-        
-        # Reinicializar estado del juego manteniendo el mismo estado "playing"
-        game.current_group = 13
-        game.moves_history = []
-        
-        # Configurar carta inicial
-        if game.groups[13]:
-            game.current_card = game.groups[13][0]
-            game.target_group = game.current_card.value
-        
-        return jsonify({
-            'success': True,
-            'message': 'Cartas rebarajeadas exitosamente',
-            'state': game.get_current_state()
-        })
-    except Exception as e:
+        interval_ms = int(request.args.get('interval_ms', 1500))
+        since_version = request.args.get('since_version', type=int)
+        epoch = request.args.get('epoch', type=int)
+    except ValueError:
         return jsonify({
             'success': False,
-            'message': f'Error al rebarajear: {str(e)}'
-        }), 500
+            'message': 'Parámetros de streaming inválidos'
+        }), 400
+    
+    interval = min(max(interval_ms, STREAM_MIN_INTERVAL_MS), STREAM_MAX_INTERVAL_MS) / 1000
+    game_id = current_game_id()
+    cancelled = threading.Event()
+    with active_streams_lock:
+        previous = active_streams.get(game_id)
+        if previous:
+            previous.set()
+        active_streams[game_id] = cancelled
+    
+    def events():
+        version, current_epoch = since_version, epoch
+        try:
+            # El generador solo avanza cuando el servidor terminó de escribir el
+            # evento anterior, así un cliente lento no acumula pasos pendientes.
+            while not cancelled.wait(interval):
+                payload, version, current_epoch, more = stream_step(game_id, version, current_epoch)
+                yield step_event(payload)
+                if not more:
+                    break
+            yield "event: end\ndata: {}\n\n"
+        finally:
+            with active_streams_lock:
+                if active_streams.get(game_id) is cancelled:
+                    del active_streams[game_id]
+    
+    return Response(events(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@app.route('/api/auto_stream/stop', methods=['POST'])
+def stop_auto_stream():
+    """
+    API para detener el stream automático de la partida actual.
+    """
+    with active_streams_lock:
+        cancelled = active_streams.pop(current_game_id(), None)
+    if cancelled:
+        cancelled.set()
+    return jsonify({
+        'success': True,
+        'stopped': cancelled is not None
+    })
+
+@app.route('/api/analytics', methods=['GET'])
+def get_analytics():
+    """
+    API con la analítica agregada de las partidas terminadas en este proceso.
+    Parámetro opcional q: cuantiles separados por coma (por defecto 0.5,0.9,0.99).
+    """
+    return action_response(analytics_action, request.args.get('q'))
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    Métricas del servidor en formato de texto de Prometheus.
+    """
+    return Response(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
 
 if __name__ == '__main__':
     # Mensajes informativos para el usuario
     print("🃏 Iniciando Oráculo de la Suerte...")
     print("🌐 Accede al juego en: http://localhost:5000")
     print("🎮 Presiona Ctrl+C para detener el servidor")
-    # Iniciar el servidor Flask en modo debug
-    app.run(debug=True, host='localhost', port=5000)
\ No newline at end of file
+    if SERVER_MODE == 'asgi':
+        # Modo asyncio: las mismas rutas servidas por asgi.py
+        try:
+            import uvicorn
+        except ImportError:
+            raise SystemExit("❌ El modo ASGI necesita un servidor ASGI: pip install uvicorn")
+        print("⚡ Modo ASGI (asyncio)")
+        uvicorn.run('asgi:app', host='localhost', port=5000)
+    else:
+        # El pool arranca solo en el proceso que atiende los requests: en modo
+        # ASGI lo hace el lifespan de asgi.py (que importa su propia instancia
+        # de este módulo) y con el reloader de debug el proceso padre solo
+        # vigila los archivos (si no, el primer take() lo arranca igual)
+        if deck_pool and os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+            deck_pool.start()
+        # Iniciar el servidor Flask en modo debug
+        app.run(debug=True, host='localhost', port=5000)
\ No newline at end of file
@@ -0,0 +1,646 @@
+"""
+Modo de servidor ASGI (asyncio) del Oráculo de la Suerte.
+
+Sirve las mismas rutas que app.py sobre un event loop, sin depender de un
+framework extra: cualquier servidor ASGI lo puede ejecutar, por ejemplo
+    uvicorn asgi:app
+o, desde app.py, con ORACLE_SERVER_MODE=asgi.
+
+Comparte con app.py el almacén de partidas, el log binario, las métricas y
+las acciones de la API (app.new_game_action, app.move_action, ...), así
+ambos modos se comportan igual: aquí solo se lee la request y se escribe la
+respuesta. Los streams del modo automático y las esperas largas de
+/api/game_state esperan con asyncio (no ocupan un hilo por cliente), de modo
+que miles de conexiones inactivas solo cuestan memoria. Todo lo que toma una
+partida (esperar su lock, leerla o guardarla en SQLite, jugar) y el trabajo
+de CPU más pesado (repartir, leer archivos) se delega a un pool de hilos
+para no bloquear el loop.
+"""
+
+import asyncio
+import mimetypes
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from http.cookies import SimpleCookie
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from flask import render_template
+from werkzeug.security import safe_join
+
+import app as wsgi_app
+from assets import IMMUTABLE_CACHE, compressed_variant, is_hashed_asset
+from fast_json import dumps_bytes, loads
+from game_store import GameStore
+from metrics import REGISTRY
+
+store = wsgi_app.store
+check_state = wsgi_app.check_state
+
+# Pool para el trabajo que no debe correr en el event loop: tomar partidas
+# (lock y E/S de SQLite) y el CPU pesado. Sin ORACLE_ASGI_WORKERS, el tamaño
+# por defecto de ThreadPoolExecutor (núcleos + 4, hasta 32)
+executor = ThreadPoolExecutor(max_workers=int(os.environ.get('ORACLE_ASGI_WORKERS', 0)) or None,
+                              thread_name_prefix='oracle-asgi')
+
+# Streams automáticos activos: id de partida -> evento de cancelación
+active_streams: Dict[str, asyncio.Event] = {}
+
+REGISTRY.gauge('oracle_asgi_streams_active', 'Streams automáticos abiertos en modo ASGI',
+               lambda: len(active_streams))
+
+
+async def offload(fn: Callable, *args):
+    """Ejecuta fn(*args) en el pool de hilos y espera su resultado."""
+    return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+
+
+class _GameLocks:
+    """
+    Un asyncio.Lock por partida en uso. Las requests de una misma partida se
+    esperan en el loop y no en el pool: así un hilo del pool nunca queda
+    bloqueado en el lock de store.checkout mientras otras partidas esperan.
+    """
+
+    def __init__(self):
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._users: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    @asynccontextmanager
+    async def hold(self, game_id: str) -> AsyncIterator[None]:
+        """Turno exclusivo de la partida game_id (el lock se descarta sin usuarios)."""
+        lock = self._locks.get(game_id)
+        if lock is None:
+            lock = self._locks[game_id] = asyncio.Lock()
+        self._users[game_id] = self._users.get(game_id, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            users = self._users[game_id] - 1
+            if users:
+                self._users[game_id] = users
+            else:
+                del self._users[game_id]
+                del self._locks[game_id]
+
+
+game_locks = _GameLocks()
+
+
+async def offload_game(fn: Callable, game_id: str, *args):
+    """offload(fn, game_id, *args) con el turno de la partida en el loop."""
+    async with game_locks.hold(game_id):
+        return await offload(fn, game_id, *args)
+
+
+class Request:
+    """Datos de una request HTTP leídos del scope ASGI."""
+
+    def __init__(self, scope: Dict, body: bytes):
+        self.method = scope['method']
+        self.path = scope['path']
+        self.body = body
+        self.headers = {name.decode('latin-1').lower(): value.decode('latin-1')
+                        for name, value in scope.get('headers', ())}
+        self.args = {name: values[0] for name, values in
+                     parse_qs(scope.get('query_string', b'').decode('latin-1')).items()}
+        cookies = SimpleCookie()
+        try:
+            cookies.load(self.headers.get('cookie', ''))
+        except Exception:
+            pass
+        self.cookies = {name: morsel.value for name, morsel in cookies.items()}
+        self.new_game_id = None
+
+    def json(self) -> Any:
+        """Cuerpo JSON de la request, o None si no es JSON válido."""
+        try:
+            return loads(self.body) if self.body else None
+        except ValueError:
+            return None
+
+    def arg_int(self, name: str, default: Optional[int] = None) -> Optional[int]:
+        """Parámetro entero de la query string (default si falta o es inválido)."""
+        try:
+            return int(self.args[name])
+        except (KeyError, ValueError):
+            return default
+
+    def game_id(self) -> str:
+        """
+        Id de partida de la sesión, igual que current_game_id() en app.py.
+        Si el visitante no tiene uno válido se genera y se envía en la respuesta.
+        """
+        game_id = self.cookies.get(wsgi_app.GAME_COOKIE)
+        if not GameStore.is_valid_id(game_id):
+            if self.new_game_id is None:
+                self.new_game_id = uuid.uuid4().hex
+            game_id = self.new_game_id
+        return game_id
+
+    def internal_token(self) -> Optional[str]:
+        """Token de los clientes internos de analítica (ver app.py)."""
+        return self.headers.get('x-oracle-internal-token')
+
+
+class Response:
+    """Respuesta completa en memoria."""
+
+    def __init__(self, body: bytes, status: int = 200, content_type: str = 'application/json',
+                 headers: Optional[List[Tuple[str, str]]] = None):
+        self.body = body
+        self.status = status
+        self.headers = [('content-type', content_type)] + (headers or [])
+
+
+class StreamResponse(Response):
+    """Respuesta enviada por partes desde un generador asíncrono."""
+
+    def __init__(self, chunks: AsyncIterator[str], content_type: str,
+                 headers: Optional[List[Tuple[str, str]]] = None,
+                 on_disconnect: Optional[Callable[[], None]] = None):
+        super().__init__(b'', 200, content_type, headers)
+        self.chunks = chunks
+        self.on_disconnect = on_disconnect
+
+
+def json_response(payload: Dict, status: int = 200) -> Response:
+    return Response(dumps_bytes(payload), status)
+
+
+class _AsyncWaiter:
+    """Aviso de store.changes para una corrutina (set() puede llegar desde otro hilo)."""
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.event = asyncio.Event()
+
+    def set(self):
+        self.loop.call_soon_threadsafe(self.event.set)
+
+
+async def conditional_state_response(request: Request, build: Callable[..., Dict], wait: float) -> Response:
+    """
+    Igual que conditional_state_response en app.py, pero la espera larga
+    corre en el loop sin ocupar un hilo.
+    """
+    game_id = request.game_id()
+    if_none_match = request.headers.get('if-none-match')
+    waiter = _AsyncWaiter()
+    if wait:
+        store.changes.subscribe(game_id, waiter)
+    try:
+        deadline = waiter.loop.time() + wait
+        while True:
+            waiter.event.clear()
+            etag, payload = await offload_game(check_state, game_id, if_none_match, build)
+            remaining = deadline - waiter.loop.time()
+            if payload is not None or remaining <= 0:
+                break
+            try:
+                await asyncio.wait_for(waiter.event.wait(), min(remaining, wsgi_app.LONG_POLL_RECHECK_SECONDS))
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        if wait:
+            store.changes.unsubscribe(game_id, waiter)
+    headers = [('etag', etag), ('cache-control', wsgi_app.STATE_CACHE_CONTROL)]
+    if payload is None:
+        return Response(b'', 304, headers=headers)
+    return Response(dumps_bytes(payload), headers=headers)
+
+
+# Rutas: (método, ruta) -> handler asíncrono
+routes: Dict[Tuple[str, str], Callable] = {}
+
+
+def route(path: str, methods: Tuple[str, ...] = ('GET',)):
+    def register(handler):
+        for method in methods:
+            routes[(method, path)] = handler
+        return handler
+    return register
+
+
+_index_html: Optional[bytes] = None
+
+
+def _render_index() -> bytes:
+    with wsgi_app.app.test_request_context('/'):
+        return render_template('index.html').encode('utf-8')
+
+
+@route('/')
+async def index(request: Request) -> Response:
+    """
+    Ruta principal de la aplicación.
+    La página no depende de la partida: se renderiza una vez y se reutiliza.
+    """
+    global _index_html
+    if _index_html is None:
+        _index_html = await offload(_render_index)
+    return Response(_index_html, content_type='text/html; charset=utf-8')
+
+
+def _read_static(filename: str, accept_encoding: str) -> Tuple[Optional[bytes], Optional[str]]:
+    """Contenido de un archivo de static y su Content-Encoding (variantes del build)."""
+    path = safe_join(wsgi_app.app.static_folder, filename)
+    hashed = is_hashed_asset(filename)
+    if path is None or (filename.startswith('dist/') and not hashed) or not os.path.isfile(path):
+        return None, None
+    encoding = None
+    if hashed:
+        path, encoding = compressed_variant(path, accept_encoding)
+    with open(path, 'rb') as f:
+        return f.read(), encoding
+
+
+async def static_file(request: Request, filename: str) -> Response:
+    """
+    Archivos de /static (CSS y JavaScript del frontend). Los assets
+    versionados del build se sirven precomprimidos y con caché inmutable.
+    """
+    data, encoding = await offload(_read_static, filename, request.headers.get('accept-encoding', ''))
+    if data is None:
+        return json_response({'success': False, 'message': 'No encontrado'}, 404)
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    if content_type.startswith('text/') or content_type.endswith('javascript'):
+        content_type += '; charset=utf-8'
+    if not is_hashed_asset(filename):
+        return Response(data, content_type=content_type, headers=[('cache-control', 'no-cache')])
+    headers = [('cache-control', IMMUTABLE_CACHE), ('vary', 'accept-encoding')]
+    if encoding:
+        headers.append(('content-encoding', encoding))
+    return Response(data, content_type=content_type, headers=headers)
+
+
+async def action_response(action: Callable, *args) -> Response:
+    """
+    Respuesta de una acción de la API de app.py (args empieza por el id de
+    partida). La acción toma la partida y puede leerla o guardarla en SQLite,
+    así que corre en el pool.
+    """
+    return json_response(*await offload_game(action, *args))
+
+
+@route('/api/new_game', methods=('POST',))
+async def new_game(request: Request) -> Response:
+    """
+    API para iniciar una nueva partida.
+    """
+    return await action_response(wsgi_app.new_game_action, request.game_id(), request.internal_token())
+
+
+@route('/api/game_state')
+async def get_game_state(request: Request) -> Response:
+    """
+    API para obtener el estado actual del juego (con ETag y espera larga, ver app.py).
+    """
+    try:
+        try:
+            wait = wsgi_app.parse_wait(request.args.get('wait'))
+        except ValueError as e:
+            return json_response(*wsgi_app.bad_request(e))
+        return await conditional_state_response(request, wsgi_app.game_state_payload, wait)
+    except Exception as e:
+        return json_response({
+            'success': False,
+            'message': f'Error al obtener el estado: {str(e)}'
+        }, 500)
+
+
+@route('/api/move', methods=('POST',))
+async def make_move(request: Request) -> Response:
+    """
+    API para realizar un movimiento manual.
+    """
+    return await action_response(wsgi_app.move_action, request.game_id(), request.json())
+
+
+@route('/api/moves', methods=('POST',))
+async def make_moves(request: Request) -> Response:
+    """
+    API para realizar varios movimientos manuales en una sola request.
+    """
+    return await action_response(wsgi_app.moves_action, request.game_id(), request.json())
+
+
+@route('/api/auto_step', methods=('POST',))
+async def auto_step(request: Request) -> Response:
+    """
+    API para ejecutar uno o varios pasos ('steps') en modo automático.
+    """
+    return await action_response(wsgi_app.auto_step_action, request.game_id(), request.json())
+
+
+@route('/api/undo', methods=('POST',))
+async def undo_move(request: Request) -> Response:
+    """
+    API para deshacer movimientos ('steps', 1 por defecto).
+    """
+    return await action_response(wsgi_app.undo_action, request.game_id(), request.json())
+
+
+@route('/api/rewind', methods=('POST',))
+async def rewind_game(request: Request) -> Response:
+    """
+    API para volver al reparto inicial, antes del primer movimiento.
+    """
+    return await action_response(wsgi_app.rewind_action, request.game_id(), request.json())
+
+
+@route('/api/seek', methods=('POST',))
+async def seek_move(request: Request) -> Response:
+    """
+    API para llevar la partida a un movimiento cualquiera ('move').
+    """
+    return await action_response(wsgi_app.seek_action, request.game_id(), request.json())
+
+
+@route('/api/next_move_info')
+async def get_next_move_info(request: Request) -> Response:
+    """
+    API para obtener información sobre el próximo movimiento (con ETag y espera larga).
+    """
+    try:
+        try:
+            wait = wsgi_app.parse_wait(request.args.get('wait'))
+        except ValueError as e:
+            return json_response(*wsgi_app.bad_request(e))
+        return await conditional_state_response(request, wsgi_app.next_move_payload, wait)
+    except Exception as e:
+        return json_response({
+            'success': False,
+            'message': f'Error al obtener información del movimiento: {str(e)}'
+        }, 500)
+
+
+@route('/api/history')
+async def get_history(request: Request) -> Response:
+    """
+    API para consultar el historial de movimientos por páginas.
+    """
+    return await action_response(wsgi_app.history_action, request.game_id(),
+                                 request.arg_int('offset', 0), request.arg_int('limit', 50))
+
+
+@route('/api/reshuffle', methods=('POST',))
+async def reshuffle_game(request: Request) -> Response:
+    """
+    API para rebarajear las cartas antes del primer movimiento.
+    """
+    return await action_response(wsgi_app.reshuffle_action, request.game_id(), request.internal_token())
+
+
+@route('/api/auto_stream')
+async def auto_stream(request: Request) -> Response:
+    """
+    API de modo automático por streaming (Server-Sent Events).
+    Igual que en app.py, pero cada stream espera entre pasos con asyncio.
+    """
+    try:
+        interval_ms = int(request.args.get('interval_ms', 1500))
+        since_version = request.arg_int('since_version')
+        epoch = request.arg_int('epoch')
+    except ValueError:
+        return json_response({
+            'success': False,
+            'message': 'Parámetros de streaming inválidos'
+        }, 400)
+
+    interval = min(max(interval_ms, wsgi_app.STREAM_MIN_INTERVAL_MS), wsgi_app.STREAM_MAX_INTERVAL_MS) / 1000
+    game_id = request.game_id()
+    cancelled = asyncio.Event()
+    previous = active_streams.get(game_id)
+    if previous:
+        previous.set()
+    active_streams[game_id] = cancelled
+
+    async def events():
+        version, current_epoch = since_version, epoch
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(cancelled.wait(), interval)
+                    break
+                except asyncio.TimeoutError:
+                    pass
+                payload, version, current_epoch, more = await offload_game(
+                    wsgi_app.stream_step, game_id, version, current_epoch)
+                yield wsgi_app.step_event(payload)
+                if not more:
+                    break
+            yield "event: end\ndata: {}\n\n"
+        finally:
+            if active_streams.get(game_id) is cancelled:
+                del active_streams[game_id]
+
+    return StreamResponse(events(), 'text/event-stream', headers=[
+        ('cache-control', 'no-cache'),
+        ('x-accel-buffering', 'no')
+    ], on_disconnect=cancelled.set)
+
+
+@route('/api/auto_stream/stop', methods=('POST',))
+async def stop_auto_stream(request: Request) -> Response:
+    """
+    API para detener el stream automático de la partida actual.
+    """
+    cancelled = active_streams.pop(request.game_id(), None)
+    if cancelled:
+        cancelled.set()
+    return json_response({
+        'success': True,
+        'stopped': cancelled is not None
+    })
+
+
+@route('/api/analytics')
+async def get_analytics(request: Request) -> Response:
+    """
+    API con la analítica agregada de las partidas terminadas en este proceso.
+    """
+    return json_response(*wsgi_app.analytics_action(request.args.get('q')))
+
+
+@route('/metrics')
+async def metrics(request: Request) -> Response:
+    """
+    Métricas del servidor en formato de texto de Prometheus.
+    """
+    return Response(REGISTRY.render().encode('utf-8'), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+async def dispatch(request: Request) -> Response:
+    """Busca el handler de la request (404/405 si no existe)."""
+    handler = routes.get((request.method, request.path))
+    if handler is not None:
+        return await handler(request)
+    if request.method == 'GET' and request.path.startswith('/static/'):
+        return await static_file(request, request.path[len('/static/'):])
+    if any(path == request.path for _, path in routes):
+        return json_response({'success': False, 'message': 'Método no permitido'}, 405)
+    return json_response({'success': False, 'message': 'No encontrado'}, 404)
+
+
+async def _read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            break
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            break
+    return b''.join(chunks)
+
+
+async def _send_stream(response: StreamResponse, receive, send):
+    """Envía una respuesta por partes y la cancela si el cliente se desconecta."""
+    async def watch_disconnect():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+        if response.on_disconnect:
+            response.on_disconnect()
+
+    watcher = asyncio.ensure_future(watch_disconnect())
+    try:
+        async for chunk in response.chunks:
+            if watcher.done():
+                break
+            await send({'type': 'http.response.body', 'body': chunk.encode('utf-8'), 'more_body': True})
+        if not watcher.done():
+            await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        watcher.cancel()
+        await response.chunks.aclose()
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            if wsgi_app.deck_pool:
+                wsgi_app.deck_pool.start()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            if wsgi_app.deck_pool:
+                wsgi_app.deck_pool.stop(timeout=1.0)
+            if wsgi_app.game_log:
+                await offload(wsgi_app.game_log.flush)
+            executor.shutdown(wait=False)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    """Aplicación ASGI."""
+    if scope['type'] == 'lifespan':
+        return await _lifespan(receive, send)
+    if scope['type'] != 'http':
+        return
+
+    started = time.perf_counter()
+    request = Request(scope, await _read_body(receive))
+    response = await dispatch(request)
+
+    headers = [(name.encode('latin-1'), value.encode('latin-1')) for name, value in response.headers]
+    if request.new_game_id:
+        headers.append((b'set-cookie', (f'{wsgi_app.GAME_COOKIE}={request.new_game_id}; '
+                                        f'Max-Age={30 * 24 * 3600}; Path=/; HttpOnly; SameSite=Lax').encode('latin-1')))
+    if not isinstance(response, StreamResponse):
+        headers.append((b'content-length', str(len(response.body)).encode('latin-1')))
+    await send({'type': 'http.response.start', 'status': response.status, 'headers': headers})
+
+    # Igual que en app.py: latencia por ruta de la API (en streams, hasta los encabezados)
+    if request.path.startswith('/api/') and (request.method, request.path) in routes:
+        wsgi_app.REQUEST_LATENCY.observe(time.perf_counter() - started, request.path,
+                                         request.method, str(response.status))
+
+    if isinstance(response, StreamResponse):
+        await _send_stream(response, receive, send)
+    else:
+        await send({'type': 'http.response.body', 'body': response.body})
+
+
+class TestResponse:
+    """Respuesta recibida por TestClient."""
+
+    def __init__(self, status_code: int, headers: List[Tuple[bytes, bytes]], data: bytes):
+        self.status_code = status_code
+        self.headers = {name.decode('latin-1'): value.decode('latin-1') for name, value in headers}
+        self.data = data
+
+    def get_json(self):
+        return loads(self.data)
+
+
+class TestClient:
+    """
+    Cliente en proceso para la aplicación ASGI, con la misma interfaz básica
+    que el cliente de pruebas de Flask (get/post/get_json), para poder correr
+    las mismas pruebas y benchmarks de la API contra ambos modos.
+    """
+
+    def __init__(self, asgi_app=app):
+        self.app = asgi_app
+        self.cookies: Dict[str, str] = {}
+        self._loop = asyncio.new_event_loop()
+
+    def get(self, path: str, **kwargs) -> TestResponse:
+        return self.open('GET', path, **kwargs)
+
+    def post(self, path: str, **kwargs) -> TestResponse:
+        return self.open('POST', path, **kwargs)
+
+    def open(self, method: str, path: str, json=None, headers: Optional[Dict[str, str]] = None) -> TestResponse:
+        return self._loop.run_until_complete(self.open_async(method, path, json, headers))
+
+    async def open_async(self, method: str, path: str, json=None,
+                         headers: Optional[Dict[str, str]] = None) -> TestResponse:
+        """Como open(), pero en el loop que corre: sirve para pruebas con varias requests a la vez."""
+        path, _, query = path.partition('?')
+        body = dumps_bytes(json) if json is not None else b''
+        request_headers = [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                           for name, value in (headers or {}).items()]
+        if json is not None:
+            request_headers.append((b'content-type', b'application/json'))
+        if self.cookies:
+            cookie = '; '.join(f'{name}={value}' for name, value in self.cookies.items())
+            request_headers.append((b'cookie', cookie.encode('latin-1')))
+        scope = {'type': 'http', 'method': method, 'path': path, 'query_string': query.encode('latin-1'),
+                 'headers': request_headers}
+        return await self._call(scope, body)
+
+    async def _call(self, scope: Dict, body: bytes) -> TestResponse:
+        messages = [{'type': 'http.request', 'body': body}]
+        finished = asyncio.Event()
+        sent = []
+
+        async def receive():
+            if messages:
+                return messages.pop(0)
+            await finished.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            sent.append(message)
+            if message['type'] == 'http.response.body' and not message.get('more_body'):
+                finished.set()
+
+        await self.app(scope, receive, send)
+        start = sent[0]
+        for name, value in start['headers']:
+            if name == b'set-cookie':
+                cookie = SimpleCookie()
+                cookie.load(value.decode('latin-1'))
+                self.cookies.update({key: morsel.value for key, morsel in cookie.items()})
+        data = b''.join(message.get('body', b'') for message in sent[1:])
+        return TestResponse(start['status'], start['headers'], data)
@@ -0,0 +1,286 @@
+"""
+Build y servicio de los assets estáticos del frontend.
+
+    python assets.py build     # minifica, versiona y precomprime static/*.js|css
+    python assets.py clean     # borra lo generado
+
+El build deja en static/dist/ cada asset minificado con el hash de su
+contenido en el nombre (script.3f2a9c1b7e.js), sus variantes .gz y .br
+(brotli solo si el módulo brotli está instalado) y un manifest.json.
+
+Con el manifest presente, app.py reescribe solo las URLs de url_for('static',
+...) hacia los archivos versionados, y estos se sirven con caché inmutable de
+un año y en la variante comprimida que acepte el navegador. Si un archivo
+fuente cambió después del build, se sirve el original hasta reconstruir.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sys
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional: sin él solo se genera .gz
+    brotli = None
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+DIST_DIRNAME = 'dist'
+MANIFEST_NAME = 'manifest.json'
+ASSETS = ('script.js', 'style.css')
+HASH_LENGTH = 10
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+# Variantes precomprimidas en orden de preferencia: (Content-Encoding, extensión)
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+_IDENTIFIER_CHARS = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_$\\')
+# Después de estos caracteres una '/' empieza una expresión regular, no una división
+_REGEX_PREFIX = frozenset('(,=:[!&|?{};+-*%<>~^')
+
+
+def minify_js(source: str) -> str:
+    """
+    Minificador conservador de JavaScript: quita comentarios y espacios
+    sobrantes respetando strings, template literals (anidados) y expresiones
+    regulares. Mantiene los saltos de línea para no alterar la inserción
+    automática de punto y coma.
+    """
+    out: List[str] = []
+    i, n = 0, len(source)
+    stack: List[int] = []  # profundidad de llaves de cada ${ } abierto dentro de un template
+
+    def last_significant() -> str:
+        for chunk in reversed(out):
+            stripped = chunk.rstrip()
+            if stripped:
+                return stripped[-1]
+        return ''
+
+    def scan_template(start: int) -> int:
+        """Copia un template literal desde start (después de la `) hasta su cierre o un ${."""
+        j = start
+        while j < n:
+            c = source[j]
+            if c == '\\':
+                j += 2
+                continue
+            if c == '`':
+                out.append(source[start:j + 1])
+                return j + 1
+            if c == '$' and j + 1 < n and source[j + 1] == '{':
+                out.append(source[start:j + 2])
+                stack.append(0)
+                return j + 2
+            j += 1
+        raise ValueError("Template literal sin cerrar")
+
+    while i < n:
+        c = source[i]
+        if c in '\'"':
+            j = i + 1
+            while j < n and source[j] != c:
+                j += 2 if source[j] == '\\' else 1
+            out.append(source[i:j + 1])
+            i = j + 1
+        elif c == '`':
+            out.append('`')
+            i = scan_template(i + 1)
+        elif c == '}' and stack and stack[-1] == 0:
+            stack.pop()
+            out.append('}')
+            i = scan_template(i + 1)
+        elif c in '{}' and stack:
+            stack[-1] += 1 if c == '{' else -1
+            out.append(c)
+            i += 1
+        elif c == '/' and source.startswith('//', i):
+            end = source.find('\n', i)
+            i = n if end == -1 else end
+        elif c == '/' and source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            if end == -1:
+                raise ValueError("Comentario sin cerrar")
+            i = end + 2
+            # Un comentario equivale a un espacio en blanco
+            if i < n and not source[i].isspace():
+                out.append(' ')
+        elif c == '/' and (not out or last_significant() in _REGEX_PREFIX or
+                           ''.join(out).rstrip().endswith(('return', 'typeof'))):
+            j, in_class = i + 1, False
+            while j < n and (source[j] != '/' or in_class):
+                if source[j] == '\\':
+                    j += 1
+                elif source[j] == '[':
+                    in_class = True
+                elif source[j] == ']':
+                    in_class = False
+                j += 1
+            out.append(source[i:j + 1])
+            i = j + 1
+        elif c.isspace():
+            j = i
+            while j < n and source[j].isspace():
+                j += 1
+            prev = out[-1][-1] if out and out[-1] else ''
+            nxt = source[j] if j < n else ''
+            if '\n' in source[i:j]:
+                if prev and prev != '\n' and nxt:
+                    out.append('\n')
+            elif (prev in _IDENTIFIER_CHARS and nxt in _IDENTIFIER_CHARS) or \
+                    (prev in '+-' and nxt == prev):
+                out.append(' ')
+            i = j
+        else:
+            out.append(c)
+            i += 1
+    return ''.join(out).strip() + '\n'
+
+
+def minify_css(source: str) -> str:
+    """Minificador de CSS: quita comentarios y espacios sin tocar strings ni calc()."""
+    out: List[str] = []
+    i, n = 0, len(source)
+    while i < n:
+        c = source[i]
+        if c in '\'"':
+            j = i + 1
+            while j < n and source[j] != c:
+                j += 2 if source[j] == '\\' else 1
+            out.append(source[i:j + 1])
+            i = j + 1
+        elif source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+        elif c.isspace():
+            j = i
+            while j < n and source[j].isspace():
+                j += 1
+            prev = out[-1][-1] if out and out[-1] else ''
+            nxt = source[j] if j < n else ''
+            if prev and nxt and prev not in '{};,>:' and nxt not in '{};,>!':
+                out.append(' ')
+            i = j
+        elif c == '}' and out and out[-1] == ';':
+            out[-1] = '}'
+            i += 1
+        else:
+            out.append(c)
+            i += 1
+    return ''.join(out).strip() + '\n'
+
+
+MINIFIERS = {'.js': minify_js, '.css': minify_css}
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def build(static_dir: str = STATIC_DIR, assets=ASSETS) -> Dict[str, Dict]:
+    """
+    Genera los assets versionados y precomprimidos y escribe el manifest.
+    Devuelve el manifest: nombre original -> {file, source_sha256, bytes, gzip, br}.
+    """
+    dist_dir = os.path.join(static_dir, DIST_DIRNAME)
+    if os.path.isdir(dist_dir):
+        shutil.rmtree(dist_dir)
+    os.makedirs(dist_dir)
+
+    manifest = {}
+    for name in assets:
+        with open(os.path.join(static_dir, name), 'rb') as f:
+            source = f.read()
+        stem, ext = os.path.splitext(name)
+        data = MINIFIERS[ext](source.decode('utf-8')).encode('utf-8')
+        hashed = f"{stem}.{_digest(data)[:HASH_LENGTH]}{ext}"
+        path = os.path.join(dist_dir, hashed)
+        with open(path, 'wb') as f:
+            f.write(data)
+        entry = {
+            'file': f"{DIST_DIRNAME}/{hashed}",
+            'source_sha256': _digest(source),
+            'bytes': len(data)
+        }
+        compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        with open(path + '.gz', 'wb') as f:
+            f.write(compressed)
+        entry['gzip'] = len(compressed)
+        if brotli:
+            compressed = brotli.compress(data, quality=11)
+            with open(path + '.br', 'wb') as f:
+                f.write(compressed)
+            entry['br'] = len(compressed)
+        manifest[name] = entry
+
+    with open(os.path.join(dist_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def load_manifest(static_dir: str = STATIC_DIR) -> Dict[str, str]:
+    """
+    Lee el manifest del build: nombre original -> ruta versionada (relativa a static).
+    Omite los assets cuyo fuente cambió desde el build (se sirve el original).
+    """
+    try:
+        with open(os.path.join(static_dir, DIST_DIRNAME, MANIFEST_NAME), encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    urls = {}
+    for name, entry in manifest.items():
+        try:
+            with open(os.path.join(static_dir, name), 'rb') as f:
+                current = _digest(f.read())
+        except OSError:
+            continue
+        if current != entry.get('source_sha256'):
+            print(f"⚠️ {name} cambió desde el último build; ejecuta: python assets.py build")
+            continue
+        urls[name] = entry['file']
+    return urls
+
+
+def is_hashed_asset(filename: str) -> bool:
+    """Indica si filename (relativo a static) es un asset versionado del build."""
+    return filename.startswith(DIST_DIRNAME + '/') and not filename.endswith(MANIFEST_NAME)
+
+
+def compressed_variant(path: str, accept_encoding: str) -> Tuple[str, Optional[str]]:
+    """
+    Variante precomprimida de path que acepta el cliente, si existe.
+    Devuelve (ruta a servir, Content-Encoding o None).
+    """
+    accepted = {token.split(';')[0].strip() for token in accept_encoding.lower().split(',')}
+    for encoding, extension in ENCODINGS:
+        if encoding in accepted and os.path.isfile(path + extension):
+            return path + extension, encoding
+    return path, None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Build de los assets estáticos")
+    parser.add_argument('command', choices=('build', 'clean'))
+    args = parser.parse_args(argv)
+
+    if args.command == 'clean':
+        shutil.rmtree(os.path.join(STATIC_DIR, DIST_DIRNAME), ignore_errors=True)
+        print("🧹 static/dist eliminado")
+        return 0
+
+    manifest = build()
+    for name, entry in manifest.items():
+        original = os.path.getsize(os.path.join(STATIC_DIR, name))
+        sizes = ', '.join(f"{encoding} {entry[encoding]} B" for encoding in ('gzip', 'br') if encoding in entry)
+        print(f"📦 {name:<10} {original:>7} B -> {entry['bytes']:>7} B ({sizes}) -> {entry['file']}")
+    if not brotli:
+        print("ℹ️ Módulo brotli no instalado: solo se generaron variantes .gz")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
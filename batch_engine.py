@@ -0,0 +1,226 @@
+"""
+Motor por lotes del Oráculo de las Cartas (NumPy, en paso sincronizado).
+
+Juega miles de repartos a la vez en modo automático. Cada partida es una
+fila de arreglos 2-D (partidas x grupos y partidas x cartas) con las mismas
+colas enlazadas que OracleGame; en cada iteración todas las partidas activas
+avanzan un auto_play_step con operaciones enmascaradas y las que llegan a
+victoria o derrota se retiran del conjunto activo.
+
+Los resultados coinciden exactamente con OracleGame (estado final, cantidad
+de movimientos y razón de derrota). La regla de estado repetido es la misma
+verificación O(1) de OracleGame.detect_repeated_state: un estado solo se
+repite tras un movimiento dentro del mismo grupo cuando todas sus cartas son
+de su valor, así que basta una máscara más por iteración. Las partidas que
+superan max_moves (partidas largas) se terminan de resolver con
+outcomes.resolve_deal.
+
+    from batch_engine import play_seeded
+    result = play_seeded(100000, seed=42)
+    print(result.victories / len(result))
+"""
+
+from array import array
+from typing import Dict, Iterator, Optional
+
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional: sin él este módulo no está disponible
+    np = None
+
+from game_logic import CLASSIC, GameConfig
+from outcomes import Outcome, resolve_deal
+from shuffle import shuffle_batch
+
+PLAYING, VICTORY, DEFEAT = 0, 1, 2
+# Razones de derrota que puede producir el modo automático (ver OracleGame.check_defeat)
+EMPTY_CENTER, SORTED_LOOP, AUTO_LOOP, REPEATED_STATE = 1, 2, 3, 4
+MIN_MOVE_BUDGET = 256            # Movimientos mínimos antes de resolver una partida por separado
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("NumPy no está instalado")
+
+
+class BatchResult:
+    """
+    Resultados de un lote, como arreglos por partida.
+    Se itera (o se indexa) como una secuencia de outcomes.Outcome.
+    """
+
+    def __init__(self, config: GameConfig, state, moves, reason, reason_group,
+                 resolved: Dict[int, Outcome]):
+        self.config = config
+        self.state = state                  # VICTORY o DEFEAT por partida
+        self.moves = moves                  # Movimientos hasta el final
+        self.reason = reason                # Código de razón de derrota (0 si ganó)
+        self.reason_group = reason_group    # Grupo mencionado en la razón
+        self.resolved = resolved            # Partidas resueltas con resolve_deal (fila -> Outcome)
+
+    def __len__(self) -> int:
+        return len(self.state)
+
+    @property
+    def victories(self) -> int:
+        return int(np.count_nonzero(self.state == VICTORY))
+
+    def __getitem__(self, index: int) -> Outcome:
+        if index < 0:
+            index += len(self)
+        if index in self.resolved:
+            return self.resolved[index]
+        moves = int(self.moves[index])
+        if self.state[index] == VICTORY:
+            return Outcome("victory", moves, "")
+        group = int(self.reason_group[index])
+        reason = self.reason[index]
+        if reason == EMPTY_CENTER:
+            message = "Centro vacío al iniciar"
+        elif reason == SORTED_LOOP:
+            message = f"Bucle infinito detectado: el grupo {group} está completamente ordenado pero otros grupos no. ¡Imposible continuar!"
+        elif reason == REPEATED_STATE:
+            message = f"Bucle infinito: el oráculo volvió a una posición ya vista en el movimiento {moves}. ¡El oráculo se ha cerrado!"
+        else:
+            message = f"Auto-loop: carta {self.config.rank_labels[group - 1]} apunta al mismo grupo {group} sin más cartas"
+        return Outcome("defeat", moves, message)
+
+    def __iter__(self) -> Iterator[Outcome]:
+        for index in range(len(self)):
+            yield self[index]
+
+
+def play_decks(decks, config: GameConfig = CLASSIC, max_moves: Optional[int] = None) -> BatchResult:
+    """
+    Juega en modo automático los mazos dados (ids de carta en el orden del
+    reparto, como OracleGame.start_game(deck=...)).
+    decks: ndarray (partidas, tamaño del mazo) o secuencia de mazos, p. ej. la
+           salida de shuffle.shuffle_batch
+    max_moves: Movimientos en lote antes de pasar una partida a resolve_deal
+               (por defecto 4 veces el tamaño del mazo)
+    """
+    _require_numpy()
+    decks = np.asarray(decks)
+    deck_size, groups, group_size = config.deck_size, config.groups, config.copies
+    if decks.ndim != 2 or decks.shape[1] != deck_size:
+        raise ValueError(f"Se esperaban mazos de {deck_size} cartas")
+    # Un id fuera de rango o repetido (p. ej. por desborde del tipo) no debe
+    # jugarse como si fuera otro reparto
+    if not np.array_equal(np.sort(decks, axis=1), np.broadcast_to(np.arange(deck_size), decks.shape)):
+        raise ValueError("Cada mazo debe contener cada carta exactamente una vez")
+    n_games = decks.shape[0]
+    if max_moves is None:
+        max_moves = max(MIN_MOVE_BUDGET, 4 * deck_size)
+
+    # Valor de la carta en cada posición del reparto; las posiciones hacen de
+    # ids en las colas enlazadas, igual que en outcomes.resolve_deal.
+    index_type = np.int32
+    values = np.asarray(config.card_values, dtype=index_type)[decks]
+
+    # Reparto: posiciones consecutivas por grupo según config.deal_sizes
+    deal_sizes = np.asarray(config.deal_sizes, dtype=index_type)
+    starts = np.concatenate(([0], np.cumsum(deal_sizes)[:-1])).astype(index_type)
+    slot_group = np.repeat(np.arange(1, groups + 1, dtype=index_type), deal_sizes)
+    dealt = deal_sizes > 0
+    head = np.full((n_games, groups + 1), -1, dtype=index_type)
+    tail = np.full((n_games, groups + 1), -1, dtype=index_type)
+    head[:, 1:][:, dealt] = starts[dealt]
+    tail[:, 1:][:, dealt] = (starts + deal_sizes - 1)[dealt]
+    next_row = np.arange(1, deck_size + 1, dtype=index_type)
+    next_row[(starts + deal_sizes - 1)[dealt]] = -1
+    next_slot = np.tile(next_row, (n_games, 1))
+    count = np.zeros((n_games, groups + 1), dtype=index_type)
+    count[:, 1:] = deal_sizes
+    correct = np.zeros((n_games, groups + 1), dtype=index_type)
+    if deck_size:
+        matches = (values == slot_group).astype(index_type)
+        correct[:, 1:][:, dealt] = np.add.reduceat(matches, starts[dealt], axis=1)
+    sorted_groups = np.count_nonzero((count == group_size) & (correct == group_size), axis=1).astype(index_type)
+
+    state = np.zeros(n_games, dtype=np.int8)
+    moves = np.zeros(n_games, dtype=index_type)
+    reason = np.zeros(n_games, dtype=np.int8)
+    reason_group = np.zeros(n_games, dtype=index_type)
+    current = np.full(n_games, config.start_group, dtype=index_type)
+
+    empty_center = count[:, config.start_group] == 0
+    state[empty_center] = DEFEAT
+    reason[empty_center] = EMPTY_CENTER
+    reason_group[empty_center] = config.start_group
+    active = np.flatnonzero(~empty_center)
+
+    steps = 0
+    while active.size and steps < max_moves:
+        rows, group = active, current[active]
+
+        # Sacar la carta superior del grupo actual
+        slot = head[rows, group]
+        value = values[rows, slot]
+        size = count[rows, group]
+        hits = correct[rows, group]
+        was_sorted = (size == group_size) & (hits == group_size)
+        left = size - 1
+        left_correct = hits - (value == group)
+        head[rows, group] = next_slot[rows, slot]
+        count[rows, group] = left
+        correct[rows, group] = left_correct
+        sorted_groups[rows] += ((left == group_size) & (left_correct == group_size)).astype(index_type) - was_sorted
+
+        # Ponerla al final del grupo de su valor (se releen los contadores:
+        # el destino puede ser el mismo grupo)
+        size = count[rows, value]
+        hits = correct[rows, value]
+        was_sorted = (size == group_size) & (hits == group_size)
+        next_slot[rows, slot] = -1
+        linked = size > 0
+        next_slot[rows[linked], tail[rows[linked], value[linked]]] = slot[linked]
+        head[rows[~linked], value[~linked]] = slot[~linked]
+        tail[rows, value] = slot
+        size += 1
+        hits += 1
+        count[rows, value] = size
+        correct[rows, value] = hits
+        is_sorted = (size == group_size) & (hits == group_size)
+        sorted_groups[rows] += is_sorted.astype(index_type) - was_sorted
+
+        moves[rows] += 1
+        current[rows] = value
+        steps += 1
+
+        # Fin de partida, en el orden de make_move. El grupo actual acaba de
+        # recibir la carta, así que nunca está vacío aquí.
+        won = sorted_groups[rows] == groups
+        self_loop = (values[rows, head[rows, value]] == value) & ~won
+        sorted_loop = self_loop & is_sorted
+        auto_loop = self_loop & ~is_sorted & (size == 1)
+        # Estado repetido: movimiento dentro del mismo grupo y todas sus
+        # cartas de su valor (ver OracleGame.detect_repeated_state)
+        repeated = (group == value) & (hits == size) & ~(won | sorted_loop | auto_loop)
+        state[rows[won]] = VICTORY
+        lost = sorted_loop | auto_loop | repeated
+        state[rows[lost]] = DEFEAT
+        reason[rows[sorted_loop]] = SORTED_LOOP
+        reason[rows[auto_loop]] = AUTO_LOOP
+        reason[rows[repeated]] = REPEATED_STATE
+        reason_group[rows[lost]] = value[lost]
+        active = rows[~(won | lost)]
+
+    # Partidas que siguen tras max_moves (partidas largas): se terminan una por una
+    resolved = {}
+    for row in active.tolist():
+        deal = array(config.value_typecode, values[row].tolist()).tobytes()
+        outcome = resolve_deal(deal, config)
+        resolved[row] = outcome
+        state[row] = VICTORY if outcome.game_state == "victory" else DEFEAT
+        moves[row] = outcome.moves
+    return BatchResult(config, state, moves, reason, reason_group, resolved)
+
+
+def play_seeded(n_games: int, seed: Optional[int] = None, config: GameConfig = CLASSIC,
+                max_moves: Optional[int] = None) -> BatchResult:
+    """Baraja n_games mazos con shuffle.shuffle_batch (NumPy) y los juega en lote."""
+    _require_numpy()
+    decks = shuffle_batch(n_games, config.deck_size, seed=seed, use_numpy=True,
+                          typecode=config.card_typecode)
+    return play_decks(decks, config, max_moves)
+
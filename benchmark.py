@@ -0,0 +1,307 @@
+"""
+Benchmarks del motor del juego y de la API HTTP.
+
+Mide las operaciones del motor (create_deck, shuffle_deck, deal_cards,
+make_move, get_current_state, get_game_statistics y partidas automáticas
+completas), el costo por movimiento en variantes de mazos grandes, el
+motor por lotes con NumPy (si está instalado) y las
+rutas /api/new_game, /api/move y /api/auto_step a través
+del cliente de pruebas de Flask. Los resultados se guardan como JSON y se
+pueden comparar contra una línea base: si alguna medición empeora más que
+el umbral, el proceso termina con código 1.
+
+    python benchmark.py --save bench_baseline.json
+    python benchmark.py --compare bench_baseline.json --threshold 0.25
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+from game_logic import GameConfig, OracleGame
+
+DEFAULT_REPEATS = 5          # Repeticiones de cada medición (se reporta la mediana)
+DEFAULT_THRESHOLD = 0.25     # Regresión tolerada: 25 % más lento que la línea base
+SEED = 1234                  # Semilla fija para que todas las corridas usen los mismos repartos
+# Variantes (rangos, copias) para verificar que el costo por movimiento no crece con el mazo
+LARGE_DECK_VARIANTS = ((13, 4), (100, 20), (1000, 50))
+
+
+def _measure(run: Callable[[], int], repeats: int) -> Dict:
+    """
+    Ejecuta run() varias veces. run devuelve cuántas operaciones realizó;
+    el resultado es el tiempo por operación en nanosegundos.
+    """
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter_ns()
+        operations = run()
+        samples.append((time.perf_counter_ns() - start) / operations)
+    return {
+        'ns_per_op': statistics.median(samples),
+        'min_ns_per_op': min(samples),
+        'repeats': repeats
+    }
+
+
+def _measure_with_setup(run: Callable[[], int], repeats: int) -> Dict:
+    """
+    Como _measure, pero run guarda en run.elapsed el tiempo de la parte
+    medida para excluir la preparación.
+    """
+    samples = []
+    for _ in range(repeats):
+        operations = run()
+        samples.append(run.elapsed / operations)
+    return {
+        'ns_per_op': statistics.median(samples),
+        'min_ns_per_op': min(samples),
+        'repeats': repeats
+    }
+
+
+def _played_games(n_games: int) -> List[OracleGame]:
+    """Partidas recién repartidas con semilla fija."""
+    rng = random.Random(SEED)
+    games = []
+    for _ in range(n_games):
+        game = OracleGame(rng=rng)
+        game.start_game()
+        games.append(game)
+    return games
+
+
+def engine_benchmarks(scale: int, repeats: int) -> Dict[str, Dict]:
+    """Benchmarks del motor OracleGame."""
+    results = {}
+    game = OracleGame(rng=random.Random(SEED))
+    game.start_game()
+
+    def create_deck():
+        for _ in range(scale):
+            game.create_deck()
+        return scale
+    results['engine.create_deck'] = _measure(create_deck, repeats)
+
+    def shuffle_deck():
+        for _ in range(scale):
+            game.shuffle_deck()
+        return scale
+    results['engine.shuffle_deck'] = _measure(shuffle_deck, repeats)
+
+    def deal_cards():
+        for _ in range(scale):
+            game.deal_cards()
+        return scale
+    results['engine.deal_cards'] = _measure(deal_cards, repeats)
+
+    def make_move():
+        # Movimientos válidos sobre partidas preparadas fuera de la medición
+        games = _played_games(max(1, scale // 40))
+        moves = 0
+        start = time.perf_counter_ns()
+        for played in games:
+            while played.game_state == "playing":
+                card = played.top_card(played.current_group)
+                played.make_move(played.current_group, card.value)
+                moves += 1
+        make_move.elapsed = time.perf_counter_ns() - start
+        return moves
+    results['engine.make_move'] = _measure_with_setup(make_move, repeats)
+
+    game.start_game()
+    for _ in range(10):
+        game.auto_play_step()
+
+    def get_current_state():
+        for _ in range(scale):
+            game.get_current_state()
+        return scale
+    results['engine.get_current_state'] = _measure(get_current_state, repeats)
+
+    def get_game_statistics():
+        for _ in range(scale):
+            game.get_game_statistics()
+        return scale
+    results['engine.get_game_statistics'] = _measure(get_game_statistics, repeats)
+
+    def auto_game():
+        played = OracleGame(rng=random.Random(SEED))
+        n_games = max(1, scale // 10)
+        for _ in range(n_games):
+            played.start_game()
+            while played.game_state == "playing":
+                played.auto_play_step()
+        return n_games
+    results['engine.auto_play_game'] = _measure(auto_game, repeats)
+    return results
+
+
+def large_deck_benchmarks(scale: int, repeats: int) -> Dict[str, Dict]:
+    """Costo por movimiento automático en variantes de distinto tamaño de mazo."""
+    results = {}
+    for ranks, copies in LARGE_DECK_VARIANTS:
+        game = OracleGame(rng=random.Random(SEED), config=GameConfig.get(ranks, copies))
+
+        def auto_steps():
+            # Repartir de nuevo cada vez que termina la partida, fuera de la medición
+            moves = elapsed = 0
+            while moves < scale * 10:
+                if game.game_state != "playing":
+                    game.start_game()
+                start = time.perf_counter_ns()
+                moves += game.auto_play_steps(scale * 10 - moves)[0]
+                elapsed += time.perf_counter_ns() - start
+            auto_steps.elapsed = elapsed
+            return moves
+        results[f'engine.auto_step.{ranks}x{copies}'] = _measure_with_setup(auto_steps, repeats)
+    return results
+
+
+def batch_benchmarks(scale: int, repeats: int) -> Dict[str, Dict]:
+    """Partidas completas por segundo del motor por lotes (requiere NumPy)."""
+    import batch_engine
+    if batch_engine.np is None:
+        return {}
+    from shuffle import shuffle_batch
+
+    n_games = scale * 10
+    decks = shuffle_batch(n_games, seed=SEED, use_numpy=True)
+
+    def batch_game():
+        batch_engine.play_decks(decks)
+        return n_games
+    return {'engine.batch_play_game': _measure(batch_game, repeats)}
+
+
+def api_benchmarks(scale: int, repeats: int, mode: str = 'wsgi') -> Dict[str, Dict]:
+    """
+    Benchmarks de la API HTTP con el cliente de pruebas en proceso del modo
+    pedido: 'wsgi' (Flask, mediciones api.*) o 'asgi' (asgi.py, mediciones asgi.*).
+    El pool de repartos queda desactivado (salvo que ORACLE_DECK_POOL_HIGH lo
+    pida): su hilo de relleno competiría con los requests medidos.
+    """
+    os.environ.setdefault('ORACLE_DECK_POOL_HIGH', '0')
+    if mode == 'asgi':
+        import asgi
+        client = asgi.TestClient()
+        prefix = 'asgi'
+    else:
+        import app as web_app
+        client = web_app.app.test_client()
+        prefix = 'api'
+
+    random.seed(SEED)
+    results = {}
+    requests = max(1, scale // 10)
+
+    def new_game():
+        for _ in range(requests):
+            client.post('/api/new_game')
+        return requests
+    results[f'{prefix}.new_game'] = _measure(new_game, repeats)
+
+    def auto_step():
+        done = 0
+        client.post('/api/new_game')
+        while done < requests:
+            data = client.post('/api/auto_step').get_json()
+            done += 1
+            if not data['can_continue']:
+                client.post('/api/new_game')
+        return done
+    results[f'{prefix}.auto_step'] = _measure(auto_step, repeats)
+
+    def move():
+        done = 0
+        elapsed = 0
+        client.post('/api/new_game')
+        while done < requests:
+            info = client.get('/api/next_move_info').get_json()['move_info']
+            if not info:
+                client.post('/api/new_game')
+                continue
+            start = time.perf_counter_ns()
+            client.post('/api/move', json={'from_group': info['from_group'], 'to_group': info['to_group']})
+            elapsed += time.perf_counter_ns() - start
+            done += 1
+        move.elapsed = elapsed
+        return done
+    results[f'{prefix}.move'] = _measure_with_setup(move, repeats)
+    return results
+
+
+def run_benchmarks(scale: int = 1000, repeats: int = DEFAULT_REPEATS, include_api: bool = True) -> Dict:
+    """Ejecuta todos los benchmarks y devuelve el resultado listo para guardar como JSON."""
+    results = engine_benchmarks(scale, repeats)
+    results.update(large_deck_benchmarks(scale, repeats))
+    results.update(batch_benchmarks(scale, repeats))
+    if include_api:
+        for mode in ('wsgi', 'asgi'):
+            results.update(api_benchmarks(scale, repeats, mode))
+    return {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'scale': scale,
+        'results': results
+    }
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """
+    Compara contra una línea base. Devuelve la lista de regresiones:
+    mediciones más lentas que la base en más de threshold (0.25 = 25 %).
+    """
+    regressions = []
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if not base:
+            continue
+        ratio = result['ns_per_op'] / base['ns_per_op']
+        if ratio > 1 + threshold:
+            regressions.append(f"{name}: {result['ns_per_op']:.0f} ns/op vs {base['ns_per_op']:.0f} ns/op (+{ratio - 1:.0%})")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks del Oráculo de las Cartas")
+    parser.add_argument('--scale', type=int, default=1000, help="Operaciones por medición")
+    parser.add_argument('--repeats', type=int, default=DEFAULT_REPEATS, help="Repeticiones por medición")
+    parser.add_argument('--no-api', action='store_true', help="Omitir los benchmarks HTTP")
+    parser.add_argument('--save', metavar='JSON', help="Guardar el resultado como línea base")
+    parser.add_argument('--compare', metavar='JSON', help="Comparar contra una línea base guardada")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Regresión máxima tolerada (0.25 = 25 %%)")
+    args = parser.parse_args(argv)
+
+    current = run_benchmarks(args.scale, args.repeats, include_api=not args.no_api)
+    for name, result in current['results'].items():
+        print(f"⏱️ {name:<32} {result['ns_per_op'] / 1000:>10.2f} µs/op")
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=2)
+        print(f"💾 Línea base guardada en {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"❌ Regresiones mayores al {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"   {regression}")
+            return 1
+        print(f"✅ Sin regresiones mayores al {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
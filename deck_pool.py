@@ -0,0 +1,168 @@
+"""
+Pool de repartos listos para /api/new_game y /api/reshuffle.
+
+Barajar el mazo y precalcular la trayectoria del reparto (ver
+OracleGame.precompute_trajectory) es lo más caro de empezar una partida.
+DeckPool lo hace por adelantado en un hilo de fondo: cuando quedan menos de
+low_watermark repartos listos, el hilo genera hasta tener high_watermark, y
+take() entrega uno en O(1). Si el pool está vacío (p. ej. en una ráfaga de
+partidas nuevas) take() devuelve None y el request reparte como siempre.
+
+    pool = DeckPool(low_watermark=64, high_watermark=256)
+    deal = pool.take()
+    if deal is None:
+        game.start_game(precompute=True)
+    else:
+        game.start_game(deck=deal.deck, trajectory=deal.trajectory)
+
+El hilo arranca con el primer take(), en el proceso que lo usa: tras un
+fork (gunicorn con preload) cada worker descarta los repartos heredados y
+arranca su propio hilo, para no repetir repartos entre procesos.
+"""
+
+import os
+import random
+import threading
+from array import array
+from collections import deque
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from game_logic import CLASSIC, GameConfig, deal_trajectory
+from metrics import REGISTRY
+from shuffle import riffle_shuffle
+
+DEFAULT_LOW_WATERMARK = 64
+DEFAULT_HIGH_WATERMARK = 256
+
+POOL_TAKES = REGISTRY.counter('oracle_deck_pool_takes_total',
+                              'Repartos pedidos al pool: hit (listo) o miss (se reparte en el request)',
+                              ('result',))
+
+
+class PooledDeal(NamedTuple):
+    """Reparto listo: mazo barajado y, si se precalculó, su trayectoria."""
+    deck: array                         # Ids de carta en el orden del reparto
+    trajectory: Optional[Tuple]         # (trayectoria, Outcome) de deal_trajectory, o None
+
+
+class DeckPool:
+    """
+    Pool de repartos rellenado en segundo plano.
+    low_watermark: Con menos repartos listos que esto se despierta el relleno
+    high_watermark: El relleno genera hasta tener esta cantidad
+    config: Variante de los repartos (solo sirven para partidas de esa variante)
+    precompute: Calcular también la trayectoria de cada reparto
+    """
+
+    def __init__(self, low_watermark: int = DEFAULT_LOW_WATERMARK,
+                 high_watermark: int = DEFAULT_HIGH_WATERMARK,
+                 config: GameConfig = CLASSIC, precompute: bool = True,
+                 rng: Optional[random.Random] = None):
+        if not 0 <= low_watermark <= high_watermark or high_watermark < 1:
+            raise ValueError("Se requiere 0 <= low_watermark <= high_watermark y high_watermark >= 1")
+        self.low_watermark = low_watermark
+        self.high_watermark = high_watermark
+        self.config = config
+        self.precompute = precompute
+        self.rng = rng if rng is not None else random.Random()
+        self.hits = 0
+        self.misses = 0
+        self.generated = 0
+        self._deals: deque = deque()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid = os.getpid()
+
+    def __len__(self) -> int:
+        return len(self._deals)
+
+    def take(self) -> Optional[PooledDeal]:
+        """Entrega un reparto listo, o None si el pool está vacío."""
+        self._ensure_running()
+        try:
+            deal = self._deals.popleft()
+        except IndexError:
+            deal = None
+        with self._lock:
+            if deal is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        POOL_TAKES.inc(1, 'miss' if deal is None else 'hit')
+        if len(self._deals) < self.low_watermark:
+            self._wake.set()
+        return deal
+
+    def make_deal(self, scratch: Optional[array] = None) -> PooledDeal:
+        """Baraja un mazo nuevo y, si corresponde, calcula su trayectoria."""
+        config = self.config
+        deck = array(config.card_typecode, range(config.deck_size))
+        riffle_shuffle(deck, self.rng, scratch)
+        return PooledDeal(deck, deal_trajectory(deck, config) if self.precompute else None)
+
+    def fill(self, target: Optional[int] = None) -> int:
+        """
+        Genera repartos en el hilo que llama hasta tener target (por defecto
+        high_watermark). Sirve también para precalentar el pool al arrancar.
+        Devuelve cuántos agregó.
+        """
+        target = self.high_watermark if target is None else min(target, self.high_watermark)
+        scratch = array(self.config.card_typecode, bytes(self.config.deck_size *
+                                                         array(self.config.card_typecode).itemsize))
+        added = 0
+        while len(self._deals) < target and not self._stopped.is_set():
+            self._deals.append(self.make_deal(scratch))
+            added += 1
+        with self._lock:
+            self.generated += added
+        return added
+
+    def start(self):
+        """Arranca el hilo de relleno (lo hace solo el primer take())."""
+        self._stopped.clear()
+        self._ensure_running()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Detiene el hilo de relleno; los repartos listos se conservan."""
+        self._stopped.set()
+        self._wake.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def stats(self) -> Dict:
+        """Estado del pool: tamaño, marcas de agua y contadores."""
+        return {
+            'size': len(self._deals),
+            'low_watermark': self.low_watermark,
+            'high_watermark': self.high_watermark,
+            'hits': self.hits,
+            'misses': self.misses,
+            'generated': self.generated
+        }
+
+    def _ensure_running(self):
+        if self._pid != os.getpid():
+            # Proceso hijo: los repartos y el generador son copias de los del padre
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._deals.clear()
+                    self.rng.seed()
+                    self._thread = None
+                    self._pid = os.getpid()
+        thread = self._thread
+        if (thread is not None and thread.is_alive()) or self._stopped.is_set():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._wake.set()
+                self._thread = threading.Thread(target=self._run, name='deck-pool', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            self.fill()
@@ -0,0 +1,72 @@
+"""
+Codificación JSON rápida para las respuestas de la API.
+
+Usa orjson si está instalado (varias veces más rápido que el módulo json en
+los estados del juego) y si no cae al json estándar con separadores compactos.
+Con orjson 3.9 o posterior, fragment() codifica una vez un payload que se
+repite en muchas respuestas (p. ej. un grupo del tablero que no cambió) y
+las respuestas siguientes insertan esos bytes sin volver a recorrerlo.
+OracleJSONProvider lo conecta a Flask, así jsonify() y app.json.dumps() lo
+usan sin cambiar las rutas.
+"""
+
+import json
+from typing import Any
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional: solo acelera la codificación
+    orjson = None
+
+HAVE_ORJSON = orjson is not None
+# Los grupos del estado usan claves enteras (1-13)
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS if orjson else 0
+_Fragment = getattr(orjson, 'Fragment', None)
+HAVE_FRAGMENTS = _Fragment is not None
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """Codifica obj a JSON en UTF-8."""
+    if orjson:
+        return orjson.dumps(obj, option=_ORJSON_OPTIONS)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def fragment(obj: Any) -> Any:
+    """
+    JSON de obj ya codificado, para insertarlo tal cual en respuestas
+    posteriores. Solo con HAVE_FRAGMENTS; solo lo codifica dumps_bytes.
+    """
+    return _Fragment(dumps_bytes(obj))
+
+
+def dumps(obj: Any) -> str:
+    """Codifica obj a un string JSON."""
+    return dumps_bytes(obj).decode('utf-8')
+
+
+def loads(data) -> Any:
+    """Decodifica JSON desde str o bytes."""
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class OracleJSONProvider(DefaultJSONProvider):
+    """Proveedor JSON de Flask que codifica con dumps_bytes."""
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return dumps(obj)
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj), mimetype=self.mimetype)
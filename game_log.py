@@ -0,0 +1,319 @@
+"""
+Registro binario de partidas (solo se agrega al final) y motor de repetición.
+
+Cada partida servida por app.py queda registrada como eventos de ancho fijo:
+
+    S  inicio:  tipo, época, tamaño del mazo, mazo barajado (ids de carta)
+    M  jugada:  tipo, época, grupo origen, grupo destino, id de carta
+    E  final:   tipo, época, estado final, cantidad de movimientos
+    K  salto:   tipo, época, movimiento al que se volvió (undo, rewind, seek)
+
+La época (OracleGame.epoch) identifica cada reparto. El formato usa un byte
+por carta, así que solo se registran partidas de la variante clásica. Los eventos se acumulan
+en un buffer y se escriben en bloque (al llenarse, a más tardar cada
+flush_seconds aunque el servidor esté inactivo, y al salir); los archivos
+rotan por tamaño y cada proceso escribe en sus propios archivos. La lectura usa mmap y struct, sin
+JSON. Uso desde consola:
+
+    python game_log.py stats logs/
+    python game_log.py replay logs/ <época>
+"""
+
+import argparse
+import atexit
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+from game_logic import GAME_STATES, MOVE_RECORD_SIZE, OracleGame
+
+FILE_MAGIC = b'ORCLOG1\n'
+LOG_SUFFIX = '.orlog'
+START = ord('S')
+MOVE = ord('M')
+END = ord('E')
+SEEK = ord('K')
+
+# Eventos de ancho fijo (little-endian). S va seguido de los bytes del mazo.
+START_RECORD = struct.Struct('<BQBxx')     # tipo, época, tamaño del mazo
+MOVE_RECORD = struct.Struct('<BQBBB')      # tipo, época, origen, destino, carta
+END_RECORD = struct.Struct('<BQBH')        # tipo, época, estado final, movimientos
+SEEK_RECORD = struct.Struct('<BQI')        # tipo, época, movimiento
+
+DEFAULT_MAX_FILE_BYTES = 64 * 1024 * 1024  # Rotar al superar este tamaño
+DEFAULT_BUFFER_BYTES = 64 * 1024           # Escribir en bloques de este tamaño
+DEFAULT_FLUSH_SECONDS = 5.0                # Escribir al menos cada tantos segundos
+
+
+class LogRecord(NamedTuple):
+    """Evento leído del registro. Los campos que no aplican al tipo valen 0."""
+    kind: int
+    epoch: int
+    from_group: int = 0
+    to_group: int = 0
+    card_id: int = 0
+    game_state: str = ""
+    moves: int = 0
+    deck: bytes = b""
+
+
+class GameLogWriter:
+    """
+    Escritor del registro binario con buffer y rotación por tamaño.
+    Seguro para varios threads; cada proceso usa archivos propios (el pid
+    forma parte del nombre), así varios workers no se mezclan. Un hilo de
+    fondo escribe lo pendiente cada flush_seconds, así un servidor inactivo
+    no retiene sus últimos eventos en memoria.
+    """
+
+    def __init__(self, directory: str, max_file_bytes: int = DEFAULT_MAX_FILE_BYTES,
+                 buffer_bytes: int = DEFAULT_BUFFER_BYTES,
+                 flush_seconds: float = DEFAULT_FLUSH_SECONDS):
+        self.directory = directory
+        self.max_file_bytes = max_file_bytes
+        self.buffer_bytes = buffer_bytes
+        self.flush_seconds = flush_seconds
+        self._buffer = bytearray()
+        self._file = None
+        self._file_size = 0
+        self._sequence = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        os.makedirs(directory, exist_ok=True)
+        atexit.register(self.close)
+
+    def log_start(self, game: OracleGame):
+        """Registra un reparto nuevo (nueva partida o rebarajado)."""
+        if not game.config.is_classic:
+            return
+        deck = game._deck.tobytes()
+        self._append(START_RECORD.pack(START, game.epoch, len(deck)) + deck)
+
+    def log_moves(self, game: OracleGame, since: int, end: bool = True):
+        """
+        Registra los movimientos de la partida a partir del número since
+        (cantidad de movimientos que ya estaban registrados) y, si la partida
+        terminó y end es True, su evento final. Quien llama pasa end=False
+        cuando el final de ese reparto ya se registró (se deshizo y volvió a
+        terminar), así cada reparto tiene un solo evento final.
+        """
+        if not game.config.is_classic:
+            return
+        moves = game._moves
+        records = bytearray()
+        for offset in range(since * MOVE_RECORD_SIZE, len(moves), MOVE_RECORD_SIZE):
+            records += MOVE_RECORD.pack(MOVE, game.epoch, moves[offset], moves[offset + 1], moves[offset + 2])
+        if end and game.game_state in ("victory", "defeat"):
+            records += END_RECORD.pack(END, game.epoch, GAME_STATES.index(game.game_state), game.moves_count)
+        if records:
+            self._append(bytes(records))
+
+    def log_seek(self, game: OracleGame):
+        """Registra que la partida volvió atrás hasta su cantidad de movimientos actual."""
+        if not game.config.is_classic:
+            return
+        self._append(SEEK_RECORD.pack(SEEK, game.epoch, game.moves_count))
+
+    def _append(self, data: bytes):
+        with self._lock:
+            self._buffer += data
+            if (len(self._buffer) >= self.buffer_bytes or
+                    time.monotonic() - self._last_flush >= self.flush_seconds):
+                self._flush_locked()
+            self._ensure_flusher_locked()
+
+    def _ensure_flusher_locked(self):
+        # El hilo arranca con el primer evento (y de nuevo en un proceso hijo tras fork)
+        if self._stopped.is_set() or (self._flusher is not None and self._flusher.is_alive()):
+            return
+        self._flusher = threading.Thread(target=self._run_flusher, name='game-log-flush', daemon=True)
+        self._flusher.start()
+
+    def _run_flusher(self):
+        while not self._stopped.wait(self.flush_seconds):
+            with self._lock:
+                if self._buffer and time.monotonic() - self._last_flush >= self.flush_seconds:
+                    self._flush_locked()
+
+    def flush(self):
+        """Escribe en disco todo lo que está en el buffer."""
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        """Escribe lo pendiente, detiene el hilo de fondo y cierra el archivo actual."""
+        self._stopped.set()
+        with self._lock:
+            self._flush_locked()
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def _flush_locked(self):
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        if self._file is None or self._file_size + len(self._buffer) > self.max_file_bytes:
+            self._rotate_locked()
+        self._file.write(self._buffer)
+        self._file.flush()
+        self._file_size += len(self._buffer)
+        self._buffer.clear()
+
+    def _rotate_locked(self):
+        if self._file:
+            self._file.close()
+        self._sequence += 1
+        name = f"oracle-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self._sequence:04d}{LOG_SUFFIX}"
+        self._file = open(os.path.join(self.directory, name), 'ab')
+        self._file.write(FILE_MAGIC)
+        self._file_size = len(FILE_MAGIC)
+
+
+def log_files(path: str) -> List[str]:
+    """Archivos de registro de un directorio (o el archivo indicado), en orden."""
+    if os.path.isfile(path):
+        return [path]
+    return sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith(LOG_SUFFIX))
+
+
+def iter_records(path: str) -> Iterator[LogRecord]:
+    """
+    Lee los eventos de un archivo de registro con mmap.
+    Un evento incompleto al final (proceso interrumpido) se ignora.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size <= len(FILE_MAGIC):
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if data[:len(FILE_MAGIC)] != FILE_MAGIC:
+                raise ValueError(f"{path} no es un registro del oráculo")
+            offset = len(FILE_MAGIC)
+            size = len(data)
+            while offset < size:
+                kind = data[offset]
+                if kind == MOVE:
+                    if offset + MOVE_RECORD.size > size:
+                        return
+                    _, epoch, from_group, to_group, card_id = MOVE_RECORD.unpack_from(data, offset)
+                    offset += MOVE_RECORD.size
+                    yield LogRecord(MOVE, epoch, from_group, to_group, card_id)
+                elif kind == START:
+                    if offset + START_RECORD.size > size:
+                        return
+                    _, epoch, deck_size = START_RECORD.unpack_from(data, offset)
+                    offset += START_RECORD.size
+                    if offset + deck_size > size:
+                        return
+                    deck = data[offset:offset + deck_size]
+                    offset += deck_size
+                    yield LogRecord(START, epoch, deck=deck)
+                elif kind == END:
+                    if offset + END_RECORD.size > size:
+                        return
+                    _, epoch, state, moves = END_RECORD.unpack_from(data, offset)
+                    offset += END_RECORD.size
+                    yield LogRecord(END, epoch, game_state=GAME_STATES[state], moves=moves)
+                elif kind == SEEK:
+                    if offset + SEEK_RECORD.size > size:
+                        return
+                    _, epoch, moves = SEEK_RECORD.unpack_from(data, offset)
+                    offset += SEEK_RECORD.size
+                    yield LogRecord(SEEK, epoch, moves=moves)
+                else:
+                    raise ValueError(f"Evento desconocido {kind!r} en {path}:{offset}")
+
+
+def scan(paths: Iterable[str]) -> Iterator[LogRecord]:
+    """Todos los eventos de varios archivos, en orden."""
+    for path in paths:
+        yield from iter_records(path)
+
+
+def replay_game(paths: Iterable[str], epoch: int) -> OracleGame:
+    """
+    Reconstruye una partida registrada aplicando sus jugadas sobre OracleGame.
+    Cada jugada se valida con las reglas del juego; lanza ValueError si el
+    reparto no está en el registro o si una jugada no coincide.
+    """
+    game = None
+    for record in scan(paths):
+        if record.epoch != epoch:
+            continue
+        if record.kind == START:
+            game = OracleGame()
+            game.start_game(deck=record.deck)
+            game.epoch = epoch
+        elif record.kind == MOVE:
+            if game is None:
+                raise ValueError(f"La partida {epoch} no tiene evento de inicio")
+            success, message = game.make_move(record.from_group, record.to_group)
+            if not success or game._moves[-1] != record.card_id:
+                raise ValueError(f"Jugada {game.moves_count} inconsistente en la partida {epoch}: {message}")
+        elif record.kind == SEEK and game is not None:
+            game.seek(record.moves)
+    if game is None:
+        raise ValueError(f"La partida {epoch} no está en el registro")
+    return game
+
+
+def aggregate(paths: Iterable[str]) -> Dict:
+    """
+    Estadísticas de todas las partidas registradas en un solo recorrido.
+    Solo mira los eventos de inicio y final (no reconstruye partidas).
+    """
+    started = 0
+    outcomes = Counter()
+    moves_histogram = Counter()
+    for record in scan(paths):
+        if record.kind == START:
+            started += 1
+        elif record.kind == END:
+            outcomes[record.game_state] += 1
+            moves_histogram[record.moves] += 1
+    finished = sum(outcomes.values())
+    return {
+        'games_started': started,
+        'games_finished': finished,
+        'outcomes': dict(outcomes),
+        'victory_rate': outcomes['victory'] / finished if finished else 0.0,
+        'moves_histogram': dict(sorted(moves_histogram.items()))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Registro binario de partidas del Oráculo")
+    commands = parser.add_subparsers(dest='command', required=True)
+    stats_parser = commands.add_parser('stats', help="Estadísticas agregadas del registro")
+    stats_parser.add_argument('path', help="Directorio o archivo de registro")
+    replay_parser = commands.add_parser('replay', help="Reconstruir una partida por su época")
+    replay_parser.add_argument('path', help="Directorio o archivo de registro")
+    replay_parser.add_argument('epoch', type=int, help="Época (id del reparto) de la partida")
+    args = parser.parse_args()
+
+    paths = log_files(args.path)
+    if args.command == 'stats':
+        result = aggregate(paths)
+        print(f"🃏 Partidas iniciadas: {result['games_started']}")
+        print(f"🏁 Partidas terminadas: {result['games_finished']}")
+        print(f"🏆 Tasa de victoria: {result['victory_rate']:.4%}")
+        for state, count in result['outcomes'].items():
+            print(f"   {state}: {count}")
+    else:
+        game = replay_game(paths, args.epoch)
+        print(f"🔁 Partida {args.epoch}: {game.game_state} en {game.moves_count} movimientos")
+        print(f"🂠 Mazo: {' '.join(repr(card) for card in game.deck)}")
+        if game.defeat_reason:
+            print(f"💀 {game.defeat_reason}")
+        for move in game.moves_history:
+            print(f"   {move['move_number']:>3}. {move['card']['display']}: {move['from_group']} → {move['to_group']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,54 @@
 import random
-from typing import List, Tuple, Dict, Optional
+import struct
+import sys
+import time
+from array import array
+from collections.abc import Mapping, Sequence
+from typing import Any, Callable, Iterable, List, Tuple, Dict, Optional, Iterator
+
+from metrics import REGISTRY
+from shuffle import riffle_shuffle
+
+# Palos y rangos del mazo estándar. El identificador de cada carta es un entero
+# pequeño: id = índice_palo * 13 + (valor - 1), de modo que 0-51 cubre el mazo.
+# Las variantes (ver GameConfig) usan id = copia * rangos + (valor - 1).
+SUITS = ('♠', '♥', '♦', '♣')
+RANKS = ('A', '2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K')
+NUM_GROUPS = 13                   # Grupos 1-13 (K=13 en el centro)
+CARDS_PER_GROUP = 4               # Cartas por grupo al repartir
+DECK_SIZE = NUM_GROUPS * CARDS_PER_GROUP
+EMPTY = -1                        # Marca de "sin carta" en los arreglos enlazados
+START_GROUP = 13                  # La partida empieza en el centro (K)
+MAX_RANKS = 65535                 # Límites de las variantes (ver GameConfig)
+MAX_DECK_SIZE = 1 << 20
+
+class FrozenDict(dict):
+    """
+    dict de solo lectura para los payloads compartidos entre partidas.
+    Se codifica a JSON como cualquier dict (json y orjson lo recorren sin
+    copiarlo), pero modificarlo lanza TypeError: un cambio corrompería las
+    respuestas de todas las partidas del proceso. dict(payload) da una copia editable.
+    """
+    __slots__ = ()
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("Payload compartido de solo lectura: modifica una copia (dict(payload))")
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        # copy/deepcopy/pickle: reconstruir sin pasar por __setitem__
+        return (FrozenDict, (dict(self),))
+
 
 class Card:
     """
     Representa una carta individual del mazo.
     Cada carta tiene un palo, rango y valor numérico para el juego.
     """
+    __slots__ = ('suit', 'rank', 'value', 'payload')
+
     def __init__(self, suit: str, rank: str, value: int):
         """
         Inicializa una carta con palo, rango y valor.
@@ -16,6 +59,13 @@ class Card:
         self.suit = suit
         self.rank = rank
         self.value = value
+        # Payload JSON construido una sola vez y compartido por todas las respuestas
+        self.payload = FrozenDict({
+            'suit': suit,
+            'rank': rank,
+            'value': value,
+            'display': f"{rank}{suit}"
+        })
     
     def __repr__(self):
         """Representación en string de la carta para debugging."""
@@ -25,149 +75,909 @@ class Card:
         """
         Convierte la carta a diccionario para envío JSON al frontend.
         Incluye toda la información necesaria para mostrar la carta.
+        Devuelve una copia: el motor usa directamente el payload compartido.
         """
+        return dict(self.payload)
+
+
+def _typecode_for(max_value: int, signed: bool) -> str:
+    """Typecode de array más chico que representa 0..max_value (y -1 si signed)."""
+    for typecode in ('b', 'h', 'i') if signed else ('B', 'H', 'I'):
+        if max_value < 1 << (8 * array(typecode).itemsize - signed):
+            return typecode
+    raise ValueError(f"Valor demasiado grande para un arreglo compacto: {max_value}")
+
+
+class GameConfig:
+    """
+    Configuración de una variante del juego. La clásica es GameConfig():
+    13 rangos, 4 copias (palos), 4 cartas por grupo y K en el centro.
+
+    ranks: Cantidad de rangos; hay un grupo por rango y la carta de valor v va al grupo v
+    copies: Copias de cada rango en el mazo (un grupo ordenado tiene exactamente copies cartas)
+    start_group: Grupo donde empieza la partida (por defecto el último, como la K)
+    deal_sizes: Cartas que recibe cada grupo al repartir (por defecto copies a cada uno)
+
+    Las tablas derivadas (cartas internadas, claves de hash, tipos de los
+    arreglos) se construyen una vez por configuración; GameConfig.get()
+    devuelve siempre la misma instancia para los mismos parámetros.
+    """
+    _instances: Dict[Tuple, 'GameConfig'] = {}
+
+    def __init__(self, ranks: int = NUM_GROUPS, copies: int = CARDS_PER_GROUP,
+                 start_group: Optional[int] = None, deal_sizes: Optional[Sequence[int]] = None):
+        if not 1 <= ranks <= MAX_RANKS:
+            raise ValueError(f"La cantidad de rangos debe estar entre 1 y {MAX_RANKS}")
+        if copies < 1 or ranks * copies > MAX_DECK_SIZE:
+            raise ValueError(f"El mazo debe tener entre 1 y {MAX_DECK_SIZE} cartas")
+        start_group = ranks if start_group is None else start_group
+        if not 1 <= start_group <= ranks:
+            raise ValueError(f"El grupo inicial debe estar entre 1 y {ranks}")
+        deck_size = ranks * copies
+        default_deal = (copies,) * ranks
+        deal_sizes = tuple(deal_sizes) if deal_sizes is not None else default_deal
+        if len(deal_sizes) != ranks or min(deal_sizes) < 0 or sum(deal_sizes) != deck_size:
+            raise ValueError(f"deal_sizes debe repartir las {deck_size} cartas entre los {ranks} grupos")
+
+        self.ranks = self.groups = ranks
+        self.copies = copies
+        self.start_group = start_group
+        self.deal_sizes = deal_sizes
+        self.deck_size = deck_size
+        self.key = (ranks, copies, start_group, deal_sizes if deal_sizes != default_deal else None)
+        self.is_classic = self.key == (NUM_GROUPS, CARDS_PER_GROUP, START_GROUP, None)
+
+        # Tipos de los arreglos: 'b'/'B' (un byte) en la variante clásica
+        self.card_typecode = _typecode_for(deck_size, signed=True)        # ids de carta, EMPTY y conteos
+        self.move_typecode = _typecode_for(max(ranks, deck_size - 1), signed=False)  # historial
+        self.value_typecode = _typecode_for(ranks, signed=False)          # clave del reparto
+
+        # Cartas internadas una sola vez: el motor trabaja con ids enteros
+        # y solo traduce a objetos Card cuando alguien necesita verlos.
+        labels = RANKS[:ranks] if ranks <= len(RANKS) else tuple(str(value) for value in range(1, ranks + 1))
+        self.rank_labels = labels
+        self.cards: Tuple[Card, ...] = tuple(
+            Card(SUITS[copy % len(SUITS)], labels[value - 1], value)
+            for copy in range(copies)
+            for value in range(1, ranks + 1)
+        )
+        self.card_values: Tuple[int, ...] = tuple(card.value for card in self.cards)
+        # Payloads JSON por id de carta (compartidos y de solo lectura)
+        self.card_payloads: Tuple[FrozenDict, ...] = tuple(card.payload for card in self.cards)
+
+    @classmethod
+    def get(cls, ranks: int = NUM_GROUPS, copies: int = CARDS_PER_GROUP,
+            start_group: Optional[int] = None, deal_sizes: Optional[Sequence[int]] = None) -> 'GameConfig':
+        """Configuración compartida (se construye una sola vez por proceso)."""
+        key = (ranks, copies, start_group if start_group is not None else ranks,
+               tuple(deal_sizes) if deal_sizes is not None else None)
+        if key[3] == (copies,) * ranks:
+            key = key[:3] + (None,)
+        config = cls._instances.get(key)
+        if config is None:
+            config = cls._instances.setdefault(key, cls(ranks, copies, start_group, deal_sizes))
+        return config
+
+    def __repr__(self):
+        return f"GameConfig(ranks={self.ranks}, copies={self.copies}, start_group={self.start_group})"
+
+
+# Variante clásica y sus tablas, con los nombres de siempre
+CLASSIC = GameConfig.get()
+CARDS: Tuple[Card, ...] = CLASSIC.cards
+CARD_VALUES: Tuple[int, ...] = CLASSIC.card_values
+CARD_IDS: Dict[Tuple[str, str], int] = {(card.suit, card.rank): i for i, card in enumerate(CARDS)}
+CARD_PAYLOADS: Tuple[FrozenDict, ...] = CLASSIC.card_payloads
+
+# Formato binario compacto de una partida (ver OracleGame.to_bytes). Todo cambio
+# del formato sube SERIAL_VERSION y conserva la lectura de los formatos anteriores.
+SERIAL_VERSION = 4
+GAME_STATES = ('waiting', 'playing', 'victory', 'defeat')
+# versión, estado, grupo actual, carta actual, tamaño del mazo, movimientos, largo de la razón,
+# versión del estado, época, inicio, rangos, copias, grupo inicial, banderas (SERIAL_FLAG_*)
+_SERIAL_HEADER = struct.Struct('<BBHiIIHIQdHIHB')
+SERIAL_FLAG_CUSTOM_DEAL = 1     # Siguen los tamaños del reparto de la variante
+SERIAL_FLAG_TRAJECTORY = 2      # Sigue la trayectoria precalculada (en el formato 3 se recalcula al cargar)
+SERIAL_FLAG_SNAPSHOT_INTERVAL = 4  # Sigue el intervalo de snapshots (sin él, el valor por defecto)
+SERIAL_FLAG_OUTCOME_RECORDED = 8   # El final de la partida ya se contó (ver OracleGame.outcome_recorded)
+SERIAL_FLAG_END_COUNTED = 16       # El final ya se sumó a las métricas (ver OracleGame._end_game)
+_SERIAL_HEADER_V2 = struct.Struct('<BBBbBHHIQd')  # Formato 2: solo la variante clásica
+# El formato 1 se escribió con tres cabeceras sin cambiar la versión; como el
+# resto de los datos es igual, se distinguen por el tamaño total (ver _serial_header_v1)
+_SERIAL_HEADER_V1 = struct.Struct('<BBBbBHHIQ')   # Formato 1: además sin la hora de inicio
+_SERIAL_HEADER_V1_EPOCH32 = struct.Struct('<BBBbBHHII')  # Formato 1 con la época de 32 bits
+_SERIAL_HEADER_V1_BASE = struct.Struct('<BBBbBHH')       # Formato 1 sin versión del estado ni época
+_DEAL_SIZE = struct.Struct('<I')
+_SNAPSHOT_INTERVAL = struct.Struct('<I')
+# Trayectoria (formato 4): movimientos, estado final y largo de la razón del
+# outcomes.Outcome; siguen la razón y un id de carta por movimiento
+_TRAJECTORY = struct.Struct('<IBH')
+VICTORY_MESSAGE = "¡Victoria! Todas las cartas están ordenadas correctamente."
+SNAPSHOT_INTERVAL = 16                        # Movimientos entre snapshots del tablero (ver OracleGame.seek)
+MAX_DELTA_LAG = 64                            # Versiones de atraso máximas para responder con un delta
+
+
+def _le_bytes(arr: array) -> bytes:
+    """Bytes de un arreglo en little-endian (el orden del formato serializado)."""
+    if sys.byteorder == 'little' or arr.itemsize == 1:
+        return arr.tobytes()
+    swapped = array(arr.typecode, arr)
+    swapped.byteswap()
+    return swapped.tobytes()
+
+
+def _array_from_le(typecode: str, data: bytes) -> array:
+    """Inverso de _le_bytes."""
+    arr = array(typecode)
+    arr.frombytes(data)
+    if sys.byteorder != 'little' and arr.itemsize > 1:
+        arr.byteswap()
+    return arr
+
+
+def _trajectory_from_bytes(data: bytes, offset: int, config: GameConfig):
+    """
+    Lee la trayectoria serializada en offset: ((ids de carta, outcomes.Outcome),
+    offset siguiente), como la devuelve deal_trajectory.
+    """
+    # Importación diferida: outcomes depende de este módulo
+    from outcomes import Outcome
+
+    end = offset + _TRAJECTORY.size
+    if len(data) < end:
+        raise ValueError("Partida serializada inválida: tamaño incorrecto")
+    moves, state, reason_size = _TRAJECTORY.unpack_from(data, offset)
+    if state >= len(GAME_STATES):
+        raise ValueError(f"Partida serializada inválida: estado {state}")
+    reason_end = end + reason_size
+    end = reason_end + array(config.card_typecode).itemsize * moves
+    if len(data) < end:
+        raise ValueError("Partida serializada inválida: tamaño incorrecto")
+    outcome = Outcome(GAME_STATES[state], moves, data[offset + _TRAJECTORY.size:reason_end].decode('utf-8'))
+    return (_array_from_le(config.card_typecode, data[reason_end:end]), outcome), end
+
+
+def _serial_header_v1(data: bytes) -> struct.Struct:
+    """
+    Cabecera de una partida en formato 1 (solo la variante clásica, un byte
+    por carta y por dato del historial), según el tamaño total de los datos.
+    """
+    try:
+        deck_size, moves, reason_size = _SERIAL_HEADER_V1_BASE.unpack_from(data)[4:]
+    except struct.error as e:
+        raise ValueError(f"Partida serializada inválida: {e}")
+    body = reason_size + deck_size + 3 * (CLASSIC.groups + 1) + CLASSIC.deck_size + MOVE_RECORD_SIZE * moves
+    for header in (_SERIAL_HEADER_V1, _SERIAL_HEADER_V1_EPOCH32, _SERIAL_HEADER_V1_BASE):
+        if header.size + body == len(data):
+            return header
+    raise ValueError("Partida serializada inválida: tamaño incorrecto")
+
+# Tipos de derrota (para métricas y analítica), según el inicio de la razón
+DEFEAT_KINDS = (
+    ("Bucle infinito detectado", "sorted_group_loop"),
+    ("¡Bucle infinito!", "sorted_group_loop"),
+    ("Bucle infinito:", "repeated_state"),
+    ("Auto-loop", "auto_loop"),
+    ("Grupo", "empty_group"),
+    ("Centro vacío", "empty_center"),
+)
+
+# Métricas del motor (ver metrics.py y /metrics)
+GAMES_STARTED = REGISTRY.counter('oracle_games_started_total', 'Partidas repartidas (nuevas y rebarajadas)')
+MOVES_APPLIED = REGISTRY.counter('oracle_moves_applied_total', 'Movimientos aplicados')
+VICTORIES = REGISTRY.counter('oracle_victories_total', 'Partidas ganadas')
+DEFEATS = REGISTRY.counter('oracle_defeats_total', 'Partidas perdidas por tipo de derrota', ('kind',))
+STATE_BUILD = REGISTRY.histogram(
+    'oracle_state_build_seconds', 'Tiempo construyendo el estado para el frontend (sin codificarlo a JSON)',
+    ('kind',),
+    buckets=(0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01))
+
+
+def defeat_kind(reason: str) -> str:
+    """Clasifica una razón de derrota en un tipo corto y estable."""
+    for prefix, kind in DEFEAT_KINDS:
+        if reason.startswith(prefix):
+            return kind
+    return "other"
+
+
+def deal_trajectory(deck: Sequence[int], config: GameConfig = CLASSIC):
+    """
+    Trayectoria completa del reparto de deck en modo automático: (ids de
+    carta de cada movimiento, outcomes.Outcome final). Ver
+    OracleGame.precompute_trajectory; deck_pool la calcula por adelantado.
+    """
+    # Importación diferida: outcomes depende de este módulo
+    from outcomes import resolve_deal
+    
+    # Las posiciones del reparto son las del mazo: el grupo 1 recibe las
+    # primeras cartas, el 2 las siguientes, etc.
+    card_values = config.card_values
+    values = array(config.value_typecode, (card_values[card_id] for card_id in deck))
+    slots = array('l')
+    outcome = resolve_deal(values.tobytes(), config, record=slots)
+    return array(config.card_typecode, (deck[slot] for slot in slots)), outcome
+
+
+# Fuente de épocas: identifica cada reparto para que un cliente no aplique
+# deltas de otra partida y para los registros binarios. Es independiente del
+# rng del juego. 53 bits: únicos en la práctica y exactos como número en JS.
+EPOCH_BITS = 53
+_epoch_source = random.Random()
+MOVE_RECORD_SIZE = 3                        # Bytes por movimiento en el historial: origen, destino, carta
+
+
+class GroupView(Sequence):
+    """
+    Vista de solo lectura sobre la pila de un grupo.
+    Se comporta como la antigua lista de cartas (len, índice, iteración)
+    pero lee directamente de los arreglos compactos del juego.
+    """
+    __slots__ = ('_game', '_group')
+
+    def __init__(self, game: 'OracleGame', group: int):
+        self._game = game
+        self._group = group
+
+    def __len__(self) -> int:
+        return self._game._count[self._group]
+
+    def __iter__(self) -> Iterator[Card]:
+        next_card = self._game._next
+        card_id = self._game._head[self._group]
+        cards = self._game._cards
+        while card_id != EMPTY:
+            yield cards[card_id]
+            card_id = next_card[card_id]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("índice fuera del grupo")
+        next_card = self._game._next
+        card_id = self._game._head[self._group]
+        for _ in range(index):
+            card_id = next_card[card_id]
+        return self._game._cards[card_id]
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class GroupsView(Mapping):
+    """
+    Vista tipo diccionario {grupo: pila} sobre el estado compacto.
+    Mantiene compatible el acceso game.groups[n] del código existente.
+    """
+    __slots__ = ('_views',)
+
+    def __init__(self, game: 'OracleGame'):
+        self._views = {i: GroupView(game, i) for i in range(1, game.config.groups + 1)}
+
+    def __getitem__(self, group: int) -> GroupView:
+        return self._views[group]
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._views)
+
+    def __len__(self) -> int:
+        return len(self._views)
+
+
+class MoveHistoryView(Sequence):
+    """
+    Vista de solo lectura sobre el historial compacto de movimientos.
+    Cada movimiento se guarda como 3 enteros (origen, destino, id de carta) y
+    solo se expande al dict que ve el frontend cuando alguien lo pide.
+    """
+    __slots__ = ('_moves', '_payloads')
+
+    def __init__(self, moves: array, payloads: Tuple[FrozenDict, ...] = CARD_PAYLOADS):
+        self._moves = moves
+        self._payloads = payloads
+
+    def __len__(self) -> int:
+        return len(self._moves) // MOVE_RECORD_SIZE
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("índice fuera del historial")
+        offset = index * MOVE_RECORD_SIZE
+        from_group, to_group, card_id = self._moves[offset:offset + MOVE_RECORD_SIZE]
         return {
-            'suit': self.suit,
-            'rank': self.rank,
-            'value': self.value,
-            'display': f"{self.rank}{self.suit}"
+            'from_group': from_group,
+            'to_group': to_group,
+            'card': self._payloads[card_id],
+            'move_number': index + 1
         }
 
+    def __repr__(self):
+        return f"<MoveHistoryView de {len(self)} movimientos>"
+
+
 class OracleGame:
     """
     Clase principal que maneja toda la lógica del Oráculo de las Cartas.
     Controla el estado del juego, movimientos, y condiciones de victoria/derrota.
+
+    Representación interna: cada grupo es una cola enlazada dentro de arreglos
+    preasignados (_head, _tail, _count por grupo y _next por carta). Sacar la
+    carta superior y ponerla al final de otro grupo es O(1) y no asigna memoria,
+    así que el costo por movimiento no depende del tamaño del mazo.
     """
-    def __init__(self):
+    def __init__(self, rng: Optional[random.Random] = None, config: Optional[GameConfig] = None,
+                 snapshot_interval: Optional[int] = None):
         """
         Inicializa un nuevo juego con estado por defecto.
         Las cartas se organizan en 13 grupos dispuestos en cuadrado con K en el centro.
+        rng: Generador aleatorio propio (para simulaciones reproducibles);
+             por defecto se usa el generador global del módulo random.
+        config: Variante del juego (rangos, copias, reparto); por defecto la clásica.
+        snapshot_interval: Movimientos entre snapshots del tablero para seek/undo
+             (0 = sin snapshots). Menos espacio entre snapshots ocupa más memoria
+             y acelera los saltos; por defecto SNAPSHOT_INTERVAL, o más en mazos grandes.
         """
-        self.deck = []                    # Mazo de 52 cartas
-        self.groups = {}                  # 1-13: grupos dispuestos en cuadrado con K(13) en el centro
-        self.current_group = 13           # Empezar desde el centro (K)
+        self.rng = rng if rng is not None else random  # el módulo expone la misma API
+        self.config = config = config if config is not None else CLASSIC
+        # Tablas de la variante ligadas a la instancia para los caminos calientes
+        self._cards = config.cards
+        self._card_values = config.card_values
+        self._num_groups = groups = config.groups
+        self._group_size = config.copies      # Cartas de un grupo completamente ordenado
+        card_type = config.card_typecode
+        self._deck = array(card_type)                                    # Mazo: ids de carta 0..deck_size-1
+        self._shuffle_scratch = array(card_type, [0] * config.deck_size)  # Buffer auxiliar del barajado
+        self._next = array(card_type, [EMPTY] * config.deck_size)        # Siguiente carta en la misma pila
+        self._head = array(card_type, [EMPTY] * (groups + 1))  # Carta superior de cada grupo (índice 0 sin uso)
+        self._tail = array(card_type, [EMPTY] * (groups + 1))  # Última carta de cada grupo
+        self._count = array(card_type, [0] * (groups + 1))     # Cantidad de cartas por grupo
+        # Contadores incrementales: se actualizan en cada movimiento en O(1)
+        self._correct = array(card_type, [0] * (groups + 1))   # Cartas con el valor del grupo, por grupo
+        self._correct_total = 0           # Cartas en su posición correcta
+        self._groups_with_correct = 0     # Grupos con al menos una carta correcta
+        self._sorted_groups = 0           # Grupos completamente ordenados
+        # Versionado del estado para respuestas delta
+        self.version = 0                  # Aumenta con cada cambio del estado
+        self.epoch = 0                    # Identificador del reparto actual
+        self.started_at = 0.0             # Hora (epoch Unix) del reparto actual
+        # El final de este reparto ya se contó en la analítica: si se deshace y
+        # vuelve a terminar no se cuenta de nuevo
+        self.outcome_recorded = False
+        self._end_counted = False         # Igual para las métricas de victorias y derrotas
+        self._group_versions = array('L', [0] * (groups + 1))  # Última versión en que cambió cada grupo
+        self._payload_cache = [None] * (groups + 1)  # (versión del grupo, payload, payload codificado o None)
+        self._groups_view = GroupsView(self)
+        self.current_group = config.start_group  # Empezar desde el centro (K)
         self.game_state = "waiting"       # Estados: waiting, playing, victory, defeat
         self.defeat_reason = ""           # Razón específica de la derrota
-        self.moves_history = []           # Historial de movimientos realizados
+        self._moves = array(config.move_typecode)  # Historial compacto: (origen, destino, carta) por movimiento
+        self._moves_view = MoveHistoryView(self._moves, config.card_payloads)
         self.current_card = None          # Carta actual que se debe mover
         self.target_group = None          # Grupo destino de la carta actual
+        # Trayectoria precalculada del reparto (ver precompute_trajectory)
+        self._trajectory: Optional[array] = None   # Ids de carta de cada movimiento, en orden
+        self._trajectory_outcome = None            # outcomes.Outcome al final de la trayectoria
+        # Snapshots compactos del tablero cada snapshot_interval movimientos (ver seek)
+        if snapshot_interval is None:
+            snapshot_interval = max(SNAPSHOT_INTERVAL, config.deck_size // 4)
+        self.snapshot_interval = snapshot_interval
+        self._snapshots: Dict[int, bytes] = {}     # movimiento -> head, tail, count y next
+
+    @property
+    def groups(self) -> GroupsView:
+        """1-13: grupos dispuestos en cuadrado con K(13) en el centro (vista de solo lectura)."""
+        return self._groups_view
+
+    @property
+    def moves_history(self) -> MoveHistoryView:
+        """Historial de movimientos realizados (vista que expande a dicts bajo demanda)."""
+        return self._moves_view
+
+    @property
+    def moves_count(self) -> int:
+        """Cantidad de movimientos realizados."""
+        return len(self._moves) // MOVE_RECORD_SIZE
+
+    @property
+    def sorted_groups(self) -> int:
+        """Cantidad de grupos completamente ordenados (contador incremental, O(1))."""
+        return self._sorted_groups
+
+    def get_history(self, offset: int = 0, limit: int = 50) -> List[Dict]:
+        """Página del historial de movimientos como dicts, desde offset."""
+        offset = max(0, offset)
+        return self._moves_view[offset:offset + max(0, limit)]
+
+    @property
+    def deck(self) -> List[Card]:
+        """Mazo actual como lista de cartas (se construye bajo demanda)."""
+        return [self._cards[card_id] for card_id in self._deck]
+
+    def deal_key(self) -> bytes:
+        """
+        Codificación canónica del reparto actual: los valores de las cartas
+        grupo por grupo. El palo no influye en el resultado, así que repartos
+        que solo difieren en palos comparten clave. Solo es válida antes del
+        primer movimiento.
+        """
+        if self._moves:
+            raise ValueError("La clave del reparto solo existe antes del primer movimiento")
+        values = array(self.config.value_typecode)
+        next_card, card_values = self._next, self._card_values
+        for group in range(1, self._num_groups + 1):
+            card_id = self._head[group]
+            while card_id != EMPTY:
+                values.append(card_values[card_id])
+                card_id = next_card[card_id]
+        return values.tobytes()
+
+    def top_card(self, group: int) -> Optional[Card]:
+        """Devuelve la carta superior de un grupo sin recorrer la pila."""
+        card_id = self._head[group]
+        return self._cards[card_id] if card_id != EMPTY else None
         
+    def memory_footprint(self) -> int:
+        """
+        Estimación en bytes de la memoria que ocupa la partida.
+        La usa el almacén de sesiones para respetar su presupuesto de memoria.
+        """
+        arrays = sys.getsizeof(self._deck) + sys.getsizeof(self._next) + \
+            sys.getsizeof(self._head) + sys.getsizeof(self._tail) + sys.getsizeof(self._count)
+        # Payloads cacheados: tupla, dict y lista por grupo (las cartas son compartidas)
+        payload_cache = sum(360 + 8 * len(entry[1]['cards']) + len(getattr(entry[2], 'contents', b''))
+                            for entry in self._payload_cache if entry)
+        trajectory = sys.getsizeof(self._trajectory) + 200 if self._trajectory is not None else 0
+        snapshots = sys.getsizeof(self._snapshots) + sum(33 + len(data) for data in self._snapshots.values())
+        return sys.getsizeof(self) + arrays + sys.getsizeof(self._moves) + payload_cache + \
+            trajectory + snapshots
+
+    def to_bytes(self) -> bytes:
+        """
+        Serializa la partida a un formato binario compacto.
+        Incluye la variante, mazo, pilas, estado, razón de derrota, intervalo
+        de snapshots, trayectoria precalculada con su resultado e historial
+        (3 enteros por movimiento). Los arreglos se guardan en little-endian;
+        los snapshots no, se rehacen al volver atrás.
+        """
+        config = self.config
+        reason = self.defeat_reason.encode('utf-8')
+        # La carta actual siempre es la superior del grupo actual mientras se juega
+        current_card = self._head[self.current_group] if self.current_card is not None else EMPTY
+        custom_deal = config.key[3] is not None
+        flags = (SERIAL_FLAG_CUSTOM_DEAL if custom_deal else 0) | \
+            (SERIAL_FLAG_TRAJECTORY if self._trajectory is not None else 0) | \
+            (SERIAL_FLAG_OUTCOME_RECORDED if self.outcome_recorded else 0) | \
+            (SERIAL_FLAG_END_COUNTED if self._end_counted else 0) | SERIAL_FLAG_SNAPSHOT_INTERVAL
+        trajectory = b''
+        if self._trajectory is not None:
+            outcome = self._trajectory_outcome
+            outcome_reason = outcome.defeat_reason.encode('utf-8')
+            trajectory = b''.join((
+                _TRAJECTORY.pack(len(self._trajectory), GAME_STATES.index(outcome.game_state),
+                                 len(outcome_reason)),
+                outcome_reason,
+                _le_bytes(self._trajectory)
+            ))
+        return b''.join((
+            _SERIAL_HEADER.pack(SERIAL_VERSION, GAME_STATES.index(self.game_state), self.current_group,
+                                current_card, len(self._deck), self.moves_count, len(reason),
+                                self.version, self.epoch, self.started_at,
+                                config.ranks, config.copies, config.start_group, flags),
+            b''.join(_DEAL_SIZE.pack(size) for size in config.deal_sizes) if custom_deal else b'',
+            _SNAPSHOT_INTERVAL.pack(self.snapshot_interval),
+            trajectory,
+            reason,
+            _le_bytes(self._deck),
+            _le_bytes(self._head),
+            _le_bytes(self._tail),
+            _le_bytes(self._count),
+            _le_bytes(self._next),
+            _le_bytes(self._moves)
+        ))
+
+    @classmethod
+    def from_bytes(cls, data: bytes, rng: Optional[random.Random] = None) -> 'OracleGame':
+        """
+        Reconstruye una partida serializada con to_bytes (formatos 1 a 4).
+        Lanza ValueError si los datos no tienen el formato esperado.
+        """
+        if data[:1] == b'\x01':
+            header = _serial_header_v1(data)
+        else:
+            header = _SERIAL_HEADER_V2 if data[:1] == b'\x02' else _SERIAL_HEADER
+        try:
+            fields = header.unpack_from(data)
+        except struct.error as e:
+            raise ValueError(f"Partida serializada inválida: {e}")
+        version, state, current_group, current_card, deck_size, moves, reason_size = fields[:7]
+        # El formato 1 original no tiene versión del estado ni época
+        state_version, epoch, *extra = fields[7:] or (1, 0)
+        if version not in (1, 2, 3, SERIAL_VERSION):
+            raise ValueError(f"Versión de serialización no soportada: {version}")
+
+        offset = header.size
+        config = CLASSIC
+        flags = 0
+        snapshot_interval = None
+        trajectory = None
+        if version >= 3:
+            ranks, copies, start_group, flags = extra[1:]
+            deal_sizes = None
+            if flags & SERIAL_FLAG_CUSTOM_DEAL:
+                end = offset + _DEAL_SIZE.size * ranks
+                if len(data) < end:
+                    raise ValueError("Partida serializada inválida: tamaño incorrecto")
+                deal_sizes = [size for size, in _DEAL_SIZE.iter_unpack(data[offset:end])]
+                offset = end
+            if flags & SERIAL_FLAG_SNAPSHOT_INTERVAL:
+                end = offset + _SNAPSHOT_INTERVAL.size
+                if len(data) < end:
+                    raise ValueError("Partida serializada inválida: tamaño incorrecto")
+                snapshot_interval, = _SNAPSHOT_INTERVAL.unpack_from(data, offset)
+                offset = end
+            config = GameConfig.get(ranks, copies, start_group, deal_sizes)
+            if flags & SERIAL_FLAG_TRAJECTORY and version >= 4:
+                trajectory, offset = _trajectory_from_bytes(data, offset, config)
+
+        card_size = array(config.card_typecode).itemsize
+        move_size = array(config.move_typecode).itemsize
+        groups = config.groups + 1
+        expected = offset + reason_size + card_size * (deck_size + 3 * groups + config.deck_size) + \
+            move_size * MOVE_RECORD_SIZE * moves
+        if len(data) != expected:
+            raise ValueError("Partida serializada inválida: tamaño incorrecto")
+
+        game = cls(rng, config, snapshot_interval)
+        game.defeat_reason = data[offset:offset + reason_size].decode('utf-8')
+        offset += reason_size
+        for name, size in (('_deck', deck_size), ('_head', groups), ('_tail', groups),
+                           ('_count', groups), ('_next', config.deck_size)):
+            arr = _array_from_le(config.card_typecode, data[offset:offset + card_size * size])
+            setattr(game, name, arr)
+            offset += card_size * size
+        game._recount()
+        game.current_group = current_group
+        # Sin historial de versiones por grupo: todo cuenta como cambiado en la versión actual
+        game.version = state_version
+        game.epoch = epoch
+        game.started_at = extra[0] if extra else 0.0
+        game.outcome_recorded = bool(flags & SERIAL_FLAG_OUTCOME_RECORDED)
+        game._mark_all_groups(state_version)
+
+        game.game_state = GAME_STATES[state]
+        # Los formatos anteriores no guardaban la bandera: una partida
+        # terminada ya se sumó a las métricas al terminar
+        game._end_counted = bool(flags & SERIAL_FLAG_END_COUNTED) or \
+            (version < SERIAL_VERSION and game.game_state in ("victory", "defeat"))
+        if current_card != EMPTY:
+            game.current_card = config.cards[current_card]
+            game.target_group = game.current_card.value
+        game._moves.extend(_array_from_le(config.move_typecode, data[offset:]))
+        if trajectory is not None:
+            game._trajectory, game._trajectory_outcome = trajectory
+        elif flags & SERIAL_FLAG_TRAJECTORY and game.game_state == "playing":
+            # El formato 3 no guardaba la trayectoria
+            game.precompute_trajectory()
+        return game
+
     def create_deck(self):
         """
         Crea un mazo estándar de 52 cartas.
         Incluye 4 palos con 13 cartas cada uno (A=1, 2-10, J=11, Q=12, K=13).
+        En las variantes: config.copies copias de cada uno de los config.ranks valores.
         """
-        suits = ['♠', '♥', '♦', '♣']
-        ranks = ['A', '2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K']
-        values = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13]
-        
-        self.deck = []
-        for suit in suits:
-            for rank, value in zip(ranks, values):
-                self.deck.append(Card(suit, rank, value))
+        self._deck = array(self.config.card_typecode, range(self.config.deck_size))
     
     def shuffle_deck(self):
         """
         Simula un mezclado realista del mazo.
         Realiza múltiples mezclas tipo riffle para obtener una distribución natural.
         """
-        # Simular múltiples mezclas riffle
-        for _ in range(random.randint(5, 8)):
-            # Dividir el mazo aproximadamente por la mitad
-            split_point = random.randint(20, 32)
-            left_half = self.deck[:split_point]
-            right_half = self.deck[split_point:]
-            
-            # Mezcla riffle con alguna imperfección para realismo
-            shuffled = []
-            while left_half or right_half:
-                # Elegir aleatoriamente de qué mitad tomar
-                if not left_half:
-                    shuffled.extend(right_half)
-                    break
-                elif not right_half:
-                    shuffled.extend(left_half)
-                    break
-                else:
-                    # Tomar 1-3 cartas de un lado
-                    take_from_left = random.choice([True, False])
-                    cards_to_take = random.randint(1, 3)
-                    
-                    if take_from_left:
-                        taken = left_half[:cards_to_take]
-                        left_half = left_half[cards_to_take:]
-                    else:
-                        taken = right_half[:cards_to_take]
-                        right_half = right_half[cards_to_take:]
-                    
-                    shuffled.extend(taken)
-            
-            self.deck = shuffled
+        # Mezclas riffle sobre índices en buffers preasignados (ver shuffle.py)
+        riffle_shuffle(self._deck, self.rng, self._shuffle_scratch)
     
     def deal_cards(self):
         """
         Reparte las cartas en 13 grupos de 4 cartas cada uno.
         Cada grupo representa una posición en el cuadrado mágico del oráculo.
+        En las variantes cada grupo recibe config.deal_sizes[grupo - 1] cartas.
         """
-        self.groups = {i: [] for i in range(1, 14)}
+        self.version += 1
+        self.epoch = _epoch_source.getrandbits(EPOCH_BITS)
+        self.started_at = time.time()
+        self.outcome_recorded = False
+        self._end_counted = False
+        # La trayectoria y los snapshots pertenecían al reparto anterior
+        self._trajectory = self._trajectory_outcome = None
+        self._snapshots.clear()
+        GAMES_STARTED.inc()
+        self._mark_all_groups(self.version)
+        self._deal_board()
+
+    def _deal_board(self):
+        """Deja el tablero como recién repartido a partir de _deck (sin tocar versiones)."""
+        head, tail, count, correct = self._head, self._tail, self._count, self._correct
+        groups = self._num_groups
+        for group in range(1, groups + 1):
+            head[group] = tail[group] = EMPTY
+            count[group] = correct[group] = 0
+        self._correct_total = self._groups_with_correct = self._sorted_groups = 0
         
-        # Repartir 4 cartas a cada grupo
+        # Repartir 4 cartas a cada grupo (o las que indique la variante)
         card_index = 0
-        for group in range(1, 14):
-            for _ in range(4):
-                if card_index < len(self.deck):
-                    self.groups[group].append(self.deck[card_index])
+        for group, deal_size in enumerate(self.config.deal_sizes, start=1):
+            for _ in range(deal_size):
+                if card_index < len(self._deck):
+                    self._append(group, self._deck[card_index])
                     card_index += 1
+
+    def _mark_all_groups(self, version: int):
+        """Marca todos los grupos como modificados en la versión indicada."""
+        for group in range(1, self._num_groups + 1):
+            self._group_versions[group] = version
+
+    def _append(self, group: int, card_id: int):
+        """Coloca una carta al final de la pila de un grupo en O(1)."""
+        count, correct, group_size = self._count, self._correct, self._group_size
+        was_sorted = count[group] == group_size and correct[group] == group_size
+        
+        self._next[card_id] = EMPTY
+        if count[group]:
+            self._next[self._tail[group]] = card_id
+        else:
+            self._head[group] = card_id
+        self._tail[group] = card_id
+        count[group] += 1
+        
+        if self._card_values[card_id] == group:
+            correct[group] += 1
+            self._correct_total += 1
+            if correct[group] == 1:
+                self._groups_with_correct += 1
+        is_sorted = count[group] == group_size and correct[group] == group_size
+        if is_sorted != was_sorted:
+            self._sorted_groups += 1 if is_sorted else -1
+
+    def _pop_head(self, group: int) -> int:
+        """Retira la carta superior de un grupo en O(1) y devuelve su id."""
+        count, correct, group_size = self._count, self._correct, self._group_size
+        was_sorted = count[group] == group_size and correct[group] == group_size
+        
+        card_id = self._head[group]
+        self._head[group] = self._next[card_id]
+        count[group] -= 1
+        if not count[group]:
+            self._tail[group] = EMPTY
+        
+        if self._card_values[card_id] == group:
+            correct[group] -= 1
+            self._correct_total -= 1
+            if not correct[group]:
+                self._groups_with_correct -= 1
+        is_sorted = count[group] == group_size and correct[group] == group_size
+        if is_sorted != was_sorted:
+            self._sorted_groups += 1 if is_sorted else -1
+        return card_id
+
+    def _recount(self):
+        """
+        Recalcula desde cero los contadores incrementales.
+        Solo se usa al reconstruir el tablero (partida serializada o snapshot).
+        """
+        self._correct_total = self._groups_with_correct = self._sorted_groups = 0
+        next_card, card_values = self._next, self._card_values
+        for group in range(1, self._num_groups + 1):
+            correct = 0
+            card_id = self._head[group]
+            while card_id != EMPTY:
+                if card_values[card_id] == group:
+                    correct += 1
+                card_id = next_card[card_id]
+            self._correct[group] = correct
+            self._correct_total += correct
+            if correct:
+                self._groups_with_correct += 1
+            if self.is_group_completely_sorted(group):
+                self._sorted_groups += 1
     
-    def start_game(self):
+    def start_game(self, deck: Optional[Sequence] = None, precompute: bool = False,
+                   trajectory: Optional[Tuple] = None):
         """
         Inicializa y comienza una nueva partida.
         Crea el mazo, lo mezcla, reparte las cartas e inicia el juego.
+        deck: Mazo ya barajado (ids de carta 0-51) para reproducir un reparto
+              concreto; si no se indica se crea y se baraja uno nuevo.
+        precompute: Calcular de una vez la trayectoria completa (ver precompute_trajectory)
+        trajectory: Trayectoria de deck ya calculada con deal_trajectory (p. ej.
+              la de un reparto de deck_pool); se usa en lugar de calcularla.
         """
-        self.create_deck()
-        self.shuffle_deck()
+        if deck is None:
+            self.create_deck()
+            self.shuffle_deck()
+        else:
+            self._set_deck(deck)
         self.deal_cards()
-        self.current_group = 13  # Start from center (K)
+        self.current_group = self.config.start_group  # Start from center (K)
         self.game_state = "playing"
         self.defeat_reason = ""
-        self.moves_history = []
+        del self._moves[:]
         self.current_card = None
         self.target_group = None
         
         # Set the first card from center (group 13 - K)
-        if self.groups[13]:
-            self.current_card = self.groups[13][0]
+        if self._count[self.current_group]:
+            self.current_card = self._cards[self._head[self.current_group]]
             self.target_group = self.current_card.value
+            self._install_trajectory(precompute, trajectory)
         else:
-            self.game_state = "defeat"
-            self.defeat_reason = "Centro vacío al iniciar"
+            self._end_game("defeat", "Centro vacío al iniciar")
     
-    def get_current_state(self):
+    def reshuffle(self, precompute: bool = False, deck: Optional[Sequence] = None,
+                  trajectory: Optional[Tuple] = None) -> Tuple[bool, str]:
         """
-        Obtiene el estado completo del juego para enviar al frontend.
-        Incluye información detallada de todos los grupos, cartas y estadísticas.
+        Rebarajea y reparte de nuevo antes del primer movimiento.
+        Mantiene el estado "playing" y vuelve a empezar desde el centro.
+        precompute: Calcular la trayectoria del nuevo reparto (ver precompute_trajectory)
+        deck, trajectory: Mazo ya barajado (y su trayectoria) en lugar de
+              rebarajear el actual, como en start_game
         """
-        groups_data = {}
-        for group_num, cards in self.groups.items():
-            groups_data[group_num] = {
-                'cards': [card.to_dict() for card in cards],
-                'count': len(cards),
-                'top_card': cards[0].to_dict() if cards else None,
-                'is_completely_sorted': self.is_group_completely_sorted(group_num),
-                'correct_cards_count': sum(1 for card in cards if card.value == group_num)
-            }
+        if self._moves:
+            return False, "No se puede rebarajear después de realizar movimientos"
+        
+        # Rebarajear y repartir nuevamente
+        if deck is None:
+            self.shuffle_deck()
+        else:
+            self._set_deck(deck)
+        self.deal_cards()
+        
+        # Reinicializar estado del juego manteniendo el mismo estado "playing"
+        self.current_group = self.config.start_group
+        del self._moves[:]
+        
+        # Configurar carta inicial
+        if self._count[self.current_group]:
+            self.current_card = self._cards[self._head[self.current_group]]
+            self.target_group = self.current_card.value
+            self._install_trajectory(precompute, trajectory)
         
+        return True, "Cartas rebarajeadas exitosamente"
+    
+    def _set_deck(self, deck: Sequence):
+        """Usa deck (ids de carta) como mazo para el próximo reparto."""
+        if sorted(deck) != list(range(self.config.deck_size)):
+            raise ValueError("El mazo debe contener cada carta exactamente una vez")
+        self._deck = array(self.config.card_typecode, deck)
+    
+    def _install_trajectory(self, precompute: bool, trajectory: Optional[Tuple]):
+        """Al repartir: usa la trayectoria recibida o la calcula si se pidió."""
+        if trajectory is not None:
+            self._trajectory, self._trajectory_outcome = trajectory
+        elif precompute:
+            self.precompute_trajectory()
+    
+    def precompute_trajectory(self):
+        """
+        Calcula de una vez todos los movimientos que quedan en la partida.
+        Como después de repartir el juego está determinado, la trayectoria se
+        obtiene con outcomes.resolve_deal; desde entonces los movimientos solo
+        avanzan un cursor (la cantidad de movimientos hechos) sin reevaluar las
+        reglas ni los ciclos, con el mismo resultado que paso a paso.
+        Devuelve el outcomes.Outcome final, o None si la partida no está en curso.
+        """
+        self._trajectory = self._trajectory_outcome = None
+        if self.game_state != "playing":
+            return None
+        trajectory, outcome = deal_trajectory(self._deck, self.config)
+        # Los movimientos ya hechos deben ser el comienzo de la trayectoria
+        if trajectory[:self.moves_count] != array(trajectory.typecode, self._moves[2::MOVE_RECORD_SIZE]):
+            return None
+        self._trajectory = trajectory
+        self._trajectory_outcome = outcome
+        return outcome
+    
+    @property
+    def trajectory_outcome(self):
+        """Resultado final precalculado (outcomes.Outcome) o None si no hay trayectoria."""
+        return self._trajectory_outcome
+    
+    def _group_payload(self, group_num: int, encode: Optional[Callable[[Dict], Any]] = None):
+        """
+        Datos de un grupo tal como los recibe el frontend (de solo lectura).
+        Se construyen con los payloads compartidos de las cartas y se reutilizan
+        mientras el grupo no cambie de versión.
+        encode: Codificador (p. ej. fast_json.fragment); si se indica devuelve
+                el grupo ya codificado, también cacheado por versión
+        """
+        group_version = self._group_versions[group_num]
+        cached = self._payload_cache[group_num]
+        if cached is None or cached[0] != group_version:
+            next_card, payloads = self._next, self.config.card_payloads
+            card_dicts = []
+            card_id = self._head[group_num]
+            while card_id != EMPTY:
+                card_dicts.append(payloads[card_id])
+                card_id = next_card[card_id]
+            payload = FrozenDict({
+                'cards': tuple(card_dicts),
+                'count': len(card_dicts),
+                'top_card': card_dicts[0] if card_dicts else None,
+                'is_completely_sorted': self.is_group_completely_sorted(group_num),
+                'correct_cards_count': self._correct[group_num]
+            })
+            cached = self._payload_cache[group_num] = (group_version, payload, None)
+        if encode is None:
+            return cached[1]
+        if cached[2] is None:
+            cached = self._payload_cache[group_num] = (group_version, cached[1], encode(cached[1]))
+        return cached[2]
+    
+    def _scalar_state(self) -> Dict:
+        """Campos del estado que no dependen de los grupos."""
         return {
-            'groups': groups_data,
+            'version': self.version,
+            'epoch': self.epoch,
             'current_group': self.current_group,
-            'current_card': self.current_card.to_dict() if self.current_card else None,
+            'current_card': self.current_card.payload if self.current_card else None,
             'target_group': self.target_group,
             'game_state': self.game_state,
             'defeat_reason': self.defeat_reason,
-            'moves_count': len(self.moves_history),
-            'last_move': self.moves_history[-1] if self.moves_history else None,
-            'statistics': self.get_game_statistics()
+            'moves_count': self.moves_count,
+            'last_move': self._moves_view[-1] if self._moves else None
+        }
+    
+    def get_current_state(self, encode_group: Optional[Callable[[Dict], Any]] = None):
+        """
+        Obtiene el estado completo del juego para enviar al frontend.
+        Incluye información detallada de todos los grupos, cartas y estadísticas.
+        Los grupos y las cartas son compartidos y de solo lectura.
+        encode_group: Codificador de los grupos (ver _group_payload): las
+                      respuestas insertan el JSON cacheado de cada grupo
+        """
+        started = time.perf_counter()
+        state = {'groups': {group_num: self._group_payload(group_num, encode_group)
+                            for group_num in range(1, self._num_groups + 1)}}
+        state.update(self._scalar_state())
+        state['statistics'] = self.get_game_statistics()
+        STATE_BUILD.observe(time.perf_counter() - started, 'full')
+        return state
+    
+    def get_state_delta(self, since_version: Optional[int], epoch: Optional[int] = None,
+                        encode_group: Optional[Callable[[Dict], Any]] = None) -> Dict:
+        """
+        Obtiene solo lo que cambió desde la versión que tiene el cliente.
+        Devuelve los grupos modificados, los contadores y el último movimiento.
+        Si el cliente no tiene versión, es de otro reparto o está demasiado
+        atrasado, devuelve el estado completo con 'full': True.
+        encode_group: Como en get_current_state
+        """
+        if (since_version is None or epoch != self.epoch or since_version > self.version or
+                self.version - since_version > MAX_DELTA_LAG):
+            state = self.get_current_state(encode_group)
+            state['full'] = True
+            return state
+        
+        started = time.perf_counter()
+        delta = {
+            'full': False,
+            'base_version': since_version,
+            'groups': {group_num: self._group_payload(group_num, encode_group)
+                       for group_num in range(1, self._num_groups + 1)
+                       if self._group_versions[group_num] > since_version}
         }
+        delta.update(self._scalar_state())
+        delta['statistics'] = self._statistics_counters()
+        STATE_BUILD.observe(time.perf_counter() - started, 'delta')
+        return delta
     
     def is_valid_move(self, from_group: int, to_group: int) -> Tuple[bool, str]:
         """
@@ -180,10 +990,10 @@ class OracleGame:
         if from_group != self.current_group:
             return False, f"Debes tomar la carta del grupo {self.current_group}"
         
-        if not self.groups[from_group]:
+        if not self._count[from_group]:
             return False, f"El grupo {from_group} está vacío"
         
-        card = self.groups[from_group][0]
+        card = self._cards[self._head[from_group]]
         if to_group != card.value:
             return False, f"La carta {card.rank} debe ir al grupo {card.value}, no al {to_group}"
         
@@ -200,81 +1010,211 @@ class OracleGame:
             if not valid:
                 return False, message
         
-        # Obtener la carta del grupo origen
-        card = self.groups[from_group].pop(0)
-        
-        # Agregar al grupo destino (al final de la pila)
-        self.groups[to_group].append(card)
-        
-        # Registrar el movimiento en el historial
-        move = {
-            'from_group': from_group,
-            'to_group': to_group,
-            'card': card.to_dict(),
-            'move_number': len(self.moves_history) + 1
-        }
-        self.moves_history.append(move)
+        # Con trayectoria precalculada el único movimiento válido es el siguiente de ella
+        if self._trajectory is not None:
+            return self._advance_trajectory()
         
-        # Actualizar posición actual
-        self.current_group = to_group
+        self._apply_move(from_group, to_group)
         
         # Verificar condiciones de fin de juego
         if self.check_victory():
-            self.game_state = "victory"
-            self.current_card = None
-            self.target_group = None
-            return True, "¡Victoria! Todas las cartas están ordenadas correctamente."
+            self._end_game("victory")
+            return True, VICTORY_MESSAGE
         
         # Verificar condiciones de derrota
         defeat_reason = self.check_defeat()
         if defeat_reason:
-            self.game_state = "defeat"
-            self.defeat_reason = defeat_reason
-            self.current_card = None
-            self.target_group = None
+            self._end_game("defeat", defeat_reason)
             return True, f"Juego terminado: {defeat_reason}"
         
         # Check for infinite loop scenarios
         loop_reason = self.detect_infinite_loop_scenario()
         if loop_reason:
-            self.game_state = "defeat"
-            self.defeat_reason = loop_reason
-            self.current_card = None
-            self.target_group = None
+            self._end_game("defeat", loop_reason)
             return True, f"Juego terminado: {loop_reason}"
         
+        # Detectar ciclos reales: volver a un estado ya visitado es un bucle infinito
+        cycle_reason = self.detect_repeated_state()
+        if cycle_reason:
+            self._end_game("defeat", cycle_reason)
+            return True, f"Juego terminado: {cycle_reason}"
+        
         # Set next card
-        if self.groups[self.current_group]:
-            self.current_card = self.groups[self.current_group][0]
+        if self._count[self.current_group]:
+            self.current_card = self._cards[self._head[self.current_group]]
             self.target_group = self.current_card.value
         else:
-            self.game_state = "defeat"
-            self.defeat_reason = f"Grupo {self.current_group} vacío"
-            self.current_card = None
-            self.target_group = None
+            self._end_game("defeat", f"Grupo {self.current_group} vacío")
             return True, f"Juego terminado: Grupo {self.current_group} vacío"
         
         return True, "Movimiento exitoso"
     
+    def _apply_move(self, from_group: int, to_group: int):
+        """Mueve la carta superior de from_group al final de to_group y lo registra."""
+        card_id = self._pop_head(from_group)
+        self._append(to_group, card_id)
+        
+        # Registrar el movimiento en el historial compacto (3 enteros)
+        moves = self._moves
+        moves.append(from_group)
+        moves.append(to_group)
+        moves.append(card_id)
+        
+        # Actualizar posición actual y versión del estado
+        self.current_group = to_group
+        self.version += 1
+        self._group_versions[from_group] = self._group_versions[to_group] = self.version
+        MOVES_APPLIED.inc()
+        
+        interval = self.snapshot_interval
+        if interval and not len(moves) % (interval * MOVE_RECORD_SIZE):
+            self._snapshots[len(moves) // MOVE_RECORD_SIZE] = self._board_snapshot()
+    
+    def _advance_trajectory(self) -> Tuple[bool, str]:
+        """
+        Aplica el siguiente movimiento de la trayectoria precalculada.
+        No evalúa reglas: el final y su razón ya se conocen.
+        """
+        cursor = self.moves_count
+        to_group = self._card_values[self._trajectory[cursor]]
+        self._apply_move(self.current_group, to_group)
+        
+        if cursor + 1 == len(self._trajectory):
+            outcome = self._trajectory_outcome
+            if outcome.game_state == "victory":
+                self._end_game("victory")
+                return True, VICTORY_MESSAGE
+            self._end_game("defeat", outcome.defeat_reason)
+            return True, f"Juego terminado: {outcome.defeat_reason}"
+        
+        self.current_card = self._cards[self._head[to_group]]
+        self.target_group = self.current_card.value
+        return True, "Movimiento exitoso"
+    
+    def _board_snapshot(self) -> bytes:
+        """Copia compacta de las pilas (el resto del tablero se recalcula al restaurar)."""
+        return b''.join((self._head.tobytes(), self._tail.tobytes(),
+                         self._count.tobytes(), self._next.tobytes()))
+    
+    def _restore_board(self, move_number: int) -> int:
+        """
+        Restaura el tablero del snapshot más cercano anterior o igual a
+        move_number (o el reparto inicial si no hay ninguno) y devuelve el
+        número de movimiento restaurado.
+        """
+        interval = self.snapshot_interval
+        base = move_number - move_number % interval if interval else 0
+        while base and base not in self._snapshots:
+            base -= interval
+        if not base:
+            self._deal_board()
+            return 0
+        data = self._snapshots[base]
+        card_type, groups = self.config.card_typecode, self._num_groups + 1
+        size = array(card_type).itemsize * groups
+        for index, name in enumerate(('_head', '_tail', '_count')):
+            setattr(self, name, array(card_type, data[index * size:(index + 1) * size]))
+        self._next = array(card_type, data[3 * size:])
+        self._recount()
+        return base
+    
+    def seek(self, move_number: int) -> Tuple[bool, str]:
+        """
+        Lleva la partida al estado que tenía después de move_number movimientos.
+        Hacia atrás restaura el snapshot más cercano y repite desde él los
+        movimientos del historial (a lo sumo snapshot_interval); los movimientos
+        posteriores se descartan. Hacia adelante juega en modo automático, ya
+        que desde cualquier posición el juego está determinado.
+        """
+        if self.game_state == "waiting":
+            return False, "No hay una partida en curso"
+        current = self.moves_count
+        if move_number < 0:
+            return False, "El número de movimiento no puede ser negativo"
+        if move_number > current:
+            if self.game_state != "playing":
+                return False, f"La partida terminó en el movimiento {current}"
+            applied, success, message = self.auto_play_steps(move_number - current)
+            return success, message
+        if move_number == current:
+            return True, f"La partida ya está en el movimiento {current}"
+        
+        base = self._restore_board(move_number)
+        moves, snapshots, interval = self._moves, self._snapshots, self.snapshot_interval
+        for number in range(base, move_number):
+            offset = number * MOVE_RECORD_SIZE
+            from_group, to_group, card_id = moves[offset:offset + MOVE_RECORD_SIZE]
+            self._pop_head(from_group)
+            self._append(to_group, card_id)
+            # Rehacer los snapshots que falten (p. ej. tras cargar la partida serializada)
+            if interval and not (number + 1) % interval:
+                snapshots.setdefault(number + 1, self._board_snapshot())
+        del moves[move_number * MOVE_RECORD_SIZE:]
+        for number in [number for number in snapshots if number > move_number]:
+            del snapshots[number]
+        
+        self.current_group = moves[-2] if moves else self.config.start_group
+        self.game_state = "playing"
+        self.defeat_reason = ""
+        self.current_card = self._cards[self._head[self.current_group]]
+        self.target_group = self.current_card.value
+        self.version += 1
+        self._mark_all_groups(self.version)
+        return True, f"Partida llevada al movimiento {move_number}"
+    
+    def undo(self, steps: int = 1) -> Tuple[bool, str]:
+        """Deshace los últimos steps movimientos (ver seek)."""
+        if not self._moves:
+            return False, "No hay movimientos para deshacer"
+        return self.seek(max(0, self.moves_count - steps))
+    
+    def rewind(self) -> Tuple[bool, str]:
+        """Vuelve la partida al reparto inicial, antes del primer movimiento (ver seek)."""
+        if not self._moves:
+            return False, "La partida ya está al inicio"
+        return self.seek(0)
+    
+    def make_moves(self, moves: Iterable[Tuple[int, int]]) -> Tuple[int, bool, str]:
+        """
+        Aplica una secuencia de movimientos (origen, destino) en orden.
+        Cada uno se valida y ejecuta con make_move; se detiene en el primer
+        movimiento inválido o cuando termina la partida.
+        Devuelve (movimientos aplicados, éxito, mensaje del último movimiento).
+        """
+        applied, message = 0, "Sin movimientos"
+        for from_group, to_group in moves:
+            success, message = self.make_move(from_group, to_group)
+            if not success:
+                return applied, False, message
+            applied += 1
+            if self.game_state != "playing":
+                break
+        return applied, True, message
+    
+    def _end_game(self, state: str, reason: str = ""):
+        """
+        Termina la partida con victoria o derrota y actualiza las métricas,
+        una sola vez por reparto aunque se deshaga y vuelva a terminar.
+        """
+        self.game_state = state
+        self.defeat_reason = reason
+        self.current_card = None
+        self.target_group = None
+        if self._end_counted:
+            return
+        self._end_counted = True
+        if state == "victory":
+            VICTORIES.inc()
+        else:
+            DEFEATS.inc(1, defeat_kind(reason))
+    
     def check_victory(self) -> bool:
         """
         Verifica si el jugador ha ganado.
         Victoria: TODOS los grupos deben tener exactamente sus 4 cartas correctas.
         """
         # Victoria: TODAS las cartas están en sus grupos correctos (ordenamiento completo)
-        for group_num in range(1, 14):
-            group_cards = self.groups[group_num]
-            
-            # Cada grupo debe tener exactamente 4 cartas del valor correcto
-            if len(group_cards) != 4:
-                return False
-            
-            # Todas las cartas del grupo deben tener el valor correcto
-            for card in group_cards:
-                if card.value != group_num:
-                    return False
-        
-        return True
+        return self._sorted_groups == self._num_groups
     
     def check_defeat(self) -> Optional[str]:
         """
@@ -282,10 +1222,10 @@ class OracleGame:
         Detecta bucles infinitos y situaciones sin salida.
         """
         # Verificar si el grupo actual está vacío
-        if not self.groups[self.current_group]:
+        if not self._count[self.current_group]:
             return f"Grupo {self.current_group} vacío - no hay cartas para mover"
         
-        current_card = self.groups[self.current_group][0]
+        current_card = self._cards[self._head[self.current_group]]
         
         # Verificar bucle infinito: si el grupo actual está completamente ordenado 
         # y la carta apunta al mismo grupo
@@ -296,7 +1236,7 @@ class OracleGame:
         
         # Verificar auto-loop: carta apunta al mismo grupo y es la única carta
         if (current_card.value == self.current_group and 
-            len(self.groups[self.current_group]) == 1):
+            self._count[self.current_group] == 1):
             return f"Auto-loop: carta {current_card.rank} apunta al mismo grupo {self.current_group} sin más cartas"
         
         return None
@@ -306,95 +1246,89 @@ class OracleGame:
         Verifica si un grupo específico está completamente ordenado.
         Un grupo está ordenado si tiene exactamente 4 cartas del valor correcto.
         """
-        group_cards = self.groups[group_num]
-        
-        # Must have exactly 4 cards
-        if len(group_cards) != 4:
-            return False
-        
-        # All cards must have the correct value for this group
-        for card in group_cards:
-            if card.value != group_num:
-                return False
-        
-        return True
+        # Exactamente 4 cartas y todas con el valor correcto (contadores incrementales)
+        return (self._count[group_num] == self._group_size and
+                self._correct[group_num] == self._group_size)
     
     def all_groups_sorted(self) -> bool:
         """Check if all groups are completely sorted"""
-        for group_num in range(1, 14):
-            if not self.is_group_completely_sorted(group_num):
-                return False
-        return True
+        return self._sorted_groups == self._num_groups
     
     def detect_infinite_loop_scenario(self) -> Optional[str]:
         """Detect more complex infinite loop scenarios"""
-        if not self.groups[self.current_group]:
+        if not self._count[self.current_group]:
             return None
         
-        current_card = self.groups[self.current_group][0]
-        target_group = current_card.value
+        target_group = self._card_values[self._head[self.current_group]]
         
         # If we're in a completely sorted group and the card points to the same group
         if (target_group == self.current_group and 
             self.is_group_completely_sorted(self.current_group)):
             
             # Count how many groups are completely sorted
-            sorted_groups = sum(1 for i in range(1, 14) if self.is_group_completely_sorted(i))
-            total_groups = 13
+            sorted_groups = self._sorted_groups
+            total_groups = self._num_groups
             
             if sorted_groups < total_groups:
-                return f"¡Bucle infinito! El grupo {self.current_group} está completamente ordenado con {len(self.groups[self.current_group])} cartas correctas, pero {total_groups - sorted_groups} grupos aún necesitan ordenarse. ¡El oráculo se ha cerrado!"
+                return f"¡Bucle infinito! El grupo {self.current_group} está completamente ordenado con {self._count[self.current_group]} cartas correctas, pero {total_groups - sorted_groups} grupos aún necesitan ordenarse. ¡El oráculo se ha cerrado!"
         
         return None
     
+    def detect_repeated_state(self) -> Optional[str]:
+        """
+        Detecta si el estado actual ya se visitó en esta partida.
+        Como el modo automático es determinista, repetir un estado significa
+        un ciclo sin fin. No hace falta guardar los estados vistos: cada
+        movimiento a otro grupo deja una carta más en su posición correcta y
+        ninguno la quita, así que un estado solo se repite a través de
+        movimientos dentro del mismo grupo, y el primero que se repite es
+        siempre el anterior: el grupo actual solo tiene cartas de su valor y la
+        carta movida vuelve a él. Como a lo sumo hay deck_size movimientos a
+        otro grupo, toda partida automática termina.
+        """
+        moves = self._moves
+        group = self.current_group
+        if not moves or moves[-MOVE_RECORD_SIZE] != group or self._correct[group] != self._count[group]:
+            return None
+        return f"Bucle infinito: el oráculo volvió a una posición ya vista en el movimiento {self.moves_count}. ¡El oráculo se ha cerrado!"
+    
     def get_game_statistics(self) -> Dict:
         """
         Obtiene estadísticas detalladas sobre el estado actual del juego.
         Incluye información sobre grupos ordenados, cartas en posición correcta, etc.
+        Todo se lee de los contadores incrementales, sin recorrer las cartas.
         """
-        stats = {
-            'total_groups': 13,
-            'completely_sorted_groups': 0,
-            'partially_sorted_groups': 0,
-            'unsorted_groups': 0,
-            'sorted_group_details': [],
-            'cards_in_correct_position': 0,
-            'total_cards': 52
-        }
-        
-        for group_num in range(1, 14):
-            group_cards = self.groups[group_num]
-            correct_cards = sum(1 for card in group_cards if card.value == group_num)
-            
+        count, correct = self._count, self._correct
+        details = []
+        for group_num in range(1, self._num_groups + 1):
             if self.is_group_completely_sorted(group_num):
-                stats['completely_sorted_groups'] += 1
-                stats['sorted_group_details'].append({
-                    'group': group_num,
-                    'status': 'completely_sorted',
-                    'cards': len(group_cards),
-                    'correct_cards': correct_cards
-                })
-            elif correct_cards > 0:
-                stats['partially_sorted_groups'] += 1
-                stats['sorted_group_details'].append({
-                    'group': group_num,
-                    'status': 'partially_sorted',
-                    'cards': len(group_cards),
-                    'correct_cards': correct_cards
-                })
+                status = 'completely_sorted'
+            elif correct[group_num] > 0:
+                status = 'partially_sorted'
             else:
-                stats['unsorted_groups'] += 1
-                stats['sorted_group_details'].append({
-                    'group': group_num,
-                    'status': 'unsorted',
-                    'cards': len(group_cards),
-                    'correct_cards': correct_cards
-                })
-            
-            stats['cards_in_correct_position'] += correct_cards
+                status = 'unsorted'
+            details.append({
+                'group': group_num,
+                'status': status,
+                'cards': count[group_num],
+                'correct_cards': correct[group_num]
+            })
         
+        stats = self._statistics_counters()
+        stats['sorted_group_details'] = details
         return stats
     
+    def _statistics_counters(self) -> Dict:
+        """Contadores globales de las estadísticas (sin el detalle por grupo)."""
+        return {
+            'total_groups': self._num_groups,
+            'completely_sorted_groups': self._sorted_groups,
+            'partially_sorted_groups': self._groups_with_correct - self._sorted_groups,
+            'unsorted_groups': self._num_groups - self._groups_with_correct,
+            'cards_in_correct_position': self._correct_total,
+            'total_cards': self.config.deck_size
+        }
+    
     def auto_play_step(self) -> Tuple[bool, str]:
         """
         Ejecuta un paso en modo automático.
@@ -403,28 +1337,51 @@ class OracleGame:
         if self.game_state != "playing":
             return False, "El juego no está en curso"
         
-        if not self.groups[self.current_group]:
+        if self._trajectory is not None:
+            return self._advance_trajectory()
+        
+        if not self._count[self.current_group]:
             self.game_state = "defeat"
             self.defeat_reason = f"Grupo {self.current_group} vacío"
+            self.version += 1
+            DEFEATS.inc(1, "empty_group")
             return False, self.defeat_reason
         
-        card = self.groups[self.current_group][0]
-        target = card.value
+        target = self._card_values[self._head[self.current_group]]
         
         return self.make_move(self.current_group, target, is_auto=True)
     
+    def auto_play_steps(self, steps: int) -> Tuple[int, bool, str]:
+        """
+        Ejecuta hasta steps pasos automáticos seguidos; se detiene si uno falla
+        o si termina la partida.
+        Devuelve (pasos aplicados, éxito, mensaje del último paso).
+        """
+        applied, success, message = 0, True, "Sin movimientos"
+        while applied < steps:
+            success, message = self.auto_play_step()
+            if not success:
+                break
+            applied += 1
+            if self.game_state != "playing":
+                break
+        return applied, success, message
+    
     def get_next_move_info(self) -> Dict:
         """
         Obtiene información sobre el próximo movimiento a realizar.
         Útil para mostrar indicaciones visuales al jugador.
         """
-        if self.game_state != "playing" or not self.groups[self.current_group]:
+        if self.game_state != "playing" or not self._count[self.current_group]:
             return {}
         
-        card = self.groups[self.current_group][0]
+        if self._trajectory is not None:
+            card = self._cards[self._trajectory[self.moves_count]]
+        else:
+            card = self._cards[self._head[self.current_group]]
         return {
             'from_group': self.current_group,
-            'card': card.to_dict(),
+            'card': card.payload,
             'to_group': card.value,
             'instruction': f"Mover {card.rank}{card.suit} del grupo {self.current_group} al grupo {card.value}"
         }
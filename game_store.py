@@ -0,0 +1,455 @@
+"""
+Almacén de partidas por sesión.
+
+Cada jugador (identificado por un id de sesión) tiene su propia instancia de
+OracleGame. El almacén limita la cantidad de partidas y la memoria total,
+expulsa las partidas menos usadas (LRU) y las inactivas por más de un TTL, y
+opcionalmente guarda en disco las partidas expulsadas en su formato binario
+compacto para poder retomarlas después.
+
+SQLiteGameStore es la alternativa para varios procesos (por ejemplo gunicorn
+con varios workers): las partidas viven en una base SQLite local en modo WAL
+compartida por todos los procesos, con control de concurrencia optimista por
+partida (GameConflictError si otro proceso la modificó primero).
+
+Ambos almacenes avisan por ChangeNotifier cada vez que una partida cambia
+dentro del proceso, para las esperas largas de /api/game_state.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from game_logic import OracleGame
+
+GAME_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')  # uuid4().hex
+SPILL_SWEEP_INTERVAL = 60                        # Segundos entre limpiezas del directorio de respaldo
+
+
+class ChangeNotifier:
+    """
+    Avisos de cambio por partida para las esperas largas (long-poll).
+    Quien espera registra un objeto con set() (un threading.Event o un
+    adaptador para asyncio) y el almacén llama a notify() cuando la partida
+    cambia. Solo ve los cambios hechos en este proceso.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waiters: Dict[str, List] = {}
+
+    def subscribe(self, game_id: str, waiter):
+        """Registra waiter para recibir set() en cada cambio de la partida."""
+        with self._lock:
+            self._waiters.setdefault(game_id, []).append(waiter)
+
+    def unsubscribe(self, game_id: str, waiter):
+        """Deja de avisar a waiter."""
+        with self._lock:
+            waiters = self._waiters.get(game_id)
+            if waiters and waiter in waiters:
+                waiters.remove(waiter)
+                if not waiters:
+                    del self._waiters[game_id]
+
+    def notify(self, game_id: str):
+        """Avisa a todos los que esperan cambios de la partida."""
+        with self._lock:
+            waiters = list(self._waiters.get(game_id, ()))
+        for waiter in waiters:
+            waiter.set()
+
+
+class _GameEntry:
+    """Partida almacenada junto con sus datos de uso."""
+    __slots__ = ('game', 'last_access', 'size', 'in_use', 'lock')
+
+    def __init__(self, game: Optional[OracleGame], now: float):
+        self.game = game                 # None hasta que se recupera del disco o se crea
+        self.last_access = now
+        self.size = game.memory_footprint() if game is not None else 0
+        self.in_use = 0                  # Requests que están usando la partida
+        self.lock = threading.RLock()    # Serializa los cambios sobre la misma partida
+
+
+class GameStore:
+    """
+    Almacén de partidas con memoria acotada, expulsión LRU y TTL de inactividad.
+    max_games: Cantidad máxima de partidas en memoria
+    max_memory_bytes: Presupuesto de memoria aproximado para todas las partidas
+    ttl_seconds: Tiempo de inactividad tras el cual una partida se expulsa
+    spill_dir: Si se indica, las partidas expulsadas se guardan ahí para retomarse
+    spill_ttl_seconds: Tiempo que se conserva en disco una partida expulsada
+    """
+
+    def __init__(self, max_games: int = 5000, max_memory_bytes: int = 64 * 1024 * 1024,
+                 ttl_seconds: float = 1800, spill_dir: Optional[str] = None,
+                 spill_ttl_seconds: float = 24 * 3600,
+                 factory: Callable[[], OracleGame] = OracleGame,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_games = max_games
+        self.max_memory_bytes = max_memory_bytes
+        self.ttl_seconds = ttl_seconds
+        self.spill_dir = spill_dir
+        self.spill_ttl_seconds = spill_ttl_seconds
+        self.factory = factory
+        self.clock = clock
+        self.memory_bytes = 0
+        self.changes = ChangeNotifier()
+        self._entries: 'OrderedDict[str, _GameEntry]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_spill_sweep = 0.0
+        # Partidas expulsadas que todavía no se escribieron en disco. La E/S del
+        # directorio de respaldo se hace fuera de self._lock, bajo _spill_lock.
+        self._spilling: Dict[str, OracleGame] = {}
+        self._spill_lock = threading.Lock()
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    @staticmethod
+    def is_valid_id(game_id: str) -> bool:
+        """Verifica que un id de sesión tenga el formato esperado (seguro para nombres de archivo)."""
+        return bool(game_id) and GAME_ID_PATTERN.match(game_id) is not None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, game_id: str) -> bool:
+        return game_id in self._entries
+
+    @contextmanager
+    def checkout(self, game_id: str) -> Iterator[OracleGame]:
+        """
+        Entrega la partida de una sesión con acceso exclusivo.
+        La crea (o la recupera del disco) si no está en memoria, y al terminar
+        actualiza su uso de memoria y aplica los límites del almacén.
+        """
+        if not self.is_valid_id(game_id):
+            raise ValueError(f"Id de partida inválido: {game_id!r}")
+
+        with self._lock:
+            now = self.clock()
+            entry = self._entries.get(game_id)
+            if entry is None:
+                entry = _GameEntry(self._spilling.pop(game_id, None), now)
+                self._entries[game_id] = entry
+                self.memory_bytes += entry.size
+            else:
+                self._entries.move_to_end(game_id)
+            entry.last_access = now
+            entry.in_use += 1
+
+        try:
+            with entry.lock:
+                if entry.game is None:
+                    entry.game = self._restore(game_id) or self.factory()
+                state = (entry.game.version, entry.game.epoch)
+                try:
+                    yield entry.game
+                finally:
+                    if (entry.game.version, entry.game.epoch) != state:
+                        self.changes.notify(game_id)
+        finally:
+            with self._lock:
+                entry.in_use -= 1
+                size = entry.game.memory_footprint() if entry.game is not None else 0
+                if self._entries.get(game_id) is entry:
+                    self.memory_bytes += size - entry.size
+                entry.size = size
+                spilled, sweep = self._enforce_limits(self.clock())
+            self._write_spilled(spilled, sweep)
+
+    def evict_expired(self):
+        """Expulsa las partidas inactivas por más del TTL (también se hace en cada acceso)."""
+        with self._lock:
+            spilled, sweep = self._enforce_limits(self.clock())
+        self._write_spilled(spilled, sweep)
+
+    def _enforce_limits(self, now: float) -> Tuple[List[Tuple[str, OracleGame]], bool]:
+        """
+        Aplica TTL, cantidad máxima y presupuesto de memoria. Requiere self._lock.
+        Devuelve las partidas expulsadas que hay que escribir en disco y si toca
+        limpiar el directorio de respaldo; ambas cosas las hace _write_spilled
+        después de soltar self._lock.
+        """
+        spilled = []
+        # Las entradas están ordenadas de la menos a la más recientemente usada
+        for game_id, entry in list(self._entries.items()):
+            if now - entry.last_access <= self.ttl_seconds:
+                break
+            if not entry.in_use:
+                self._evict(game_id, entry, spilled)
+
+        if len(self._entries) > self.max_games or self.memory_bytes > self.max_memory_bytes:
+            for game_id, entry in list(self._entries.items()):
+                if len(self._entries) <= self.max_games and self.memory_bytes <= self.max_memory_bytes:
+                    break
+                if not entry.in_use:
+                    self._evict(game_id, entry, spilled)
+
+        sweep = bool(self.spill_dir) and now - self._last_spill_sweep > SPILL_SWEEP_INTERVAL
+        if sweep:
+            self._last_spill_sweep = now
+        return spilled, sweep
+
+    def _evict(self, game_id: str, entry: _GameEntry, spilled: List[Tuple[str, OracleGame]]):
+        """
+        Saca una partida de memoria. Requiere self._lock. Si hay directorio de
+        respaldo la deja en _spilling (de donde checkout la recupera mientras no
+        esté escrita) y la agrega a spilled para escribirla.
+        """
+        del self._entries[game_id]
+        self.memory_bytes -= entry.size
+        game = entry.game
+        if self.spill_dir and game is not None and game.game_state != "waiting":
+            self._spilling[game_id] = game
+            spilled.append((game_id, game))
+
+    def _write_spilled(self, spilled: List[Tuple[str, OracleGame]], sweep: bool):
+        """Escribe en disco las partidas expulsadas, sin tomar self._lock durante la E/S."""
+        for game_id, game in spilled:
+            with self._spill_lock:
+                with self._lock:
+                    if self._spilling.get(game_id) is not game:
+                        continue    # Ya se recuperó antes de escribirla
+                path = self._spill_path(game_id)
+                try:
+                    tmp_path = f"{path}.tmp"
+                    with open(tmp_path, 'wb') as f:
+                        f.write(game.to_bytes())
+                    os.replace(tmp_path, path)
+                finally:
+                    with self._lock:
+                        current = self._spilling.get(game_id) is game
+                        if current:
+                            del self._spilling[game_id]
+                if not current:
+                    # Se recuperó mientras se escribía: el archivo quedó viejo
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+        if sweep:
+            self._sweep_spill_dir()
+
+    def _restore(self, game_id: str) -> Optional[OracleGame]:
+        """Recupera del disco una partida expulsada, si existe. No requiere self._lock."""
+        if not self.spill_dir:
+            return None
+        path = self._spill_path(game_id)
+        try:
+            with self._spill_lock:
+                with open(path, 'rb') as f:
+                    data = f.read()
+                os.remove(path)
+        except FileNotFoundError:
+            return None
+        try:
+            return OracleGame.from_bytes(data)
+        except ValueError:
+            return None
+
+    def _spill_path(self, game_id: str) -> str:
+        return os.path.join(self.spill_dir, f"{game_id}.bin")
+
+    def _sweep_spill_dir(self):
+        """Borra del disco las partidas expulsadas hace más de spill_ttl_seconds."""
+        cutoff = time.time() - self.spill_ttl_seconds
+        try:
+            names = os.listdir(self.spill_dir)
+        except FileNotFoundError:
+            return
+        for name in names:
+            path = os.path.join(self.spill_dir, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+
+class GameConflictError(Exception):
+    """La partida fue modificada por otro proceso mientras se usaba."""
+
+
+class _CachedGame:
+    """Copia local de una partida de SQLiteGameStore y la versión que se leyó."""
+    __slots__ = ('game', 'stored', 'size', 'in_use', 'lock')
+
+    def __init__(self):
+        self.game = None
+        self.stored = None   # (versión, época) guardada en la base, o None si no existe
+        self.size = 0
+        self.in_use = 0
+        self.lock = threading.RLock()
+
+
+class SQLiteGameStore:
+    """
+    Almacén de partidas compartido entre procesos sobre SQLite en modo WAL.
+
+    Cada partida se guarda en su formato binario compacto junto con su versión
+    y época. Al entregar una partida se compara con la copia local del proceso
+    y solo se vuelve a leer si otro proceso la cambió; al devolverla, si la
+    partida cambió, se escribe solo si la base sigue en la versión leída
+    (concurrencia optimista). Si no, se lanza GameConflictError y la copia
+    local se descarta: el cliente debe volver a pedir el estado.
+
+    path: Archivo de la base (se crea si no existe)
+    ttl_seconds: Las partidas sin uso por más de este tiempo se borran
+    max_cached: Partidas que cada proceso mantiene decodificadas en memoria
+    """
+
+    is_valid_id = staticmethod(GameStore.is_valid_id)
+
+    def __init__(self, path: str, ttl_seconds: float = 1800, max_cached: int = 5000,
+                 factory: Callable[[], OracleGame] = OracleGame,
+                 clock: Callable[[], float] = time.time):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_cached = max_cached
+        self.factory = factory
+        self.clock = clock
+        self.memory_bytes = 0
+        self.changes = ChangeNotifier()
+        self._cache: 'OrderedDict[str, _CachedGame]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._last_sweep = 0.0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS games (
+                id TEXT PRIMARY KEY,
+                version INTEGER NOT NULL,
+                epoch INTEGER NOT NULL,
+                data BLOB NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS games_last_access ON games (last_access)")
+
+    def _connection(self) -> sqlite3.Connection:
+        """Conexión propia de cada hilo (en autocommit: cada sentencia es atómica)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def __contains__(self, game_id: str) -> bool:
+        row = self._connection().execute("SELECT 1 FROM games WHERE id = ?", (game_id,)).fetchone()
+        return row is not None
+
+    @contextmanager
+    def checkout(self, game_id: str) -> Iterator[OracleGame]:
+        """
+        Entrega la partida de una sesión con acceso exclusivo dentro del proceso.
+        Al terminar guarda los cambios; lanza GameConflictError si otro proceso
+        guardó antes una versión distinta.
+        """
+        if not self.is_valid_id(game_id):
+            raise ValueError(f"Id de partida inválido: {game_id!r}")
+
+        with self._lock:
+            cached = self._cache.get(game_id)
+            if cached is None:
+                cached = self._cache[game_id] = _CachedGame()
+            else:
+                self._cache.move_to_end(game_id)
+            cached.in_use += 1
+
+        try:
+            with cached.lock:
+                game = self._load(game_id, cached)
+                try:
+                    yield game
+                except BaseException:
+                    # La partida pudo quedar a medio modificar: se relee de la base
+                    cached.game = cached.stored = None
+                    raise
+                if self._save(game_id, cached, game):
+                    self.changes.notify(game_id)
+        finally:
+            with self._lock:
+                cached.in_use -= 1
+                size = cached.game.memory_footprint() if cached.game is not None else 0
+                if self._cache.get(game_id) is cached:
+                    self.memory_bytes += size - cached.size
+                cached.size = size
+                self._enforce_limits(self.clock())
+
+    def _load(self, game_id: str, cached: _CachedGame) -> OracleGame:
+        """Partida actual: la copia local si sigue vigente, si no la de la base."""
+        version, epoch = cached.stored if cached.stored and cached.game is not None else (-1, -1)
+        row = self._connection().execute(
+            "SELECT version, epoch, CASE WHEN version = ? AND epoch = ? THEN NULL ELSE data END, last_access "
+            "FROM games WHERE id = ?", (version, epoch, game_id)).fetchone()
+        if row is None:
+            cached.game, cached.stored = self.factory(), None
+        else:
+            if row[2] is not None:
+                try:
+                    cached.game = OracleGame.from_bytes(row[2])
+                except ValueError:
+                    cached.game = self.factory()
+            cached.stored = (row[0], row[1])
+            if self.clock() - row[3] > self.ttl_seconds / 10:
+                self._connection().execute("UPDATE games SET last_access = ? WHERE id = ?",
+                                           (self.clock(), game_id))
+        return cached.game
+
+    def _save(self, game_id: str, cached: _CachedGame, game: OracleGame) -> bool:
+        """
+        Guarda la partida si cambió, solo si la base sigue en la versión leída.
+        Devuelve si hubo cambios que guardar.
+        """
+        current = (game.version, game.epoch)
+        if current == cached.stored or (cached.stored is None and game.version == 0):
+            return False
+        conn = self._connection()
+        if cached.stored is None:
+            written = conn.execute(
+                "INSERT OR IGNORE INTO games (id, version, epoch, data, last_access) VALUES (?, ?, ?, ?, ?)",
+                (game_id, game.version, game.epoch, game.to_bytes(), self.clock())).rowcount
+        else:
+            written = conn.execute(
+                "UPDATE games SET version = ?, epoch = ?, data = ?, last_access = ? "
+                "WHERE id = ? AND version = ? AND epoch = ?",
+                (game.version, game.epoch, game.to_bytes(), self.clock(), game_id) + cached.stored).rowcount
+        if not written:
+            cached.game = cached.stored = None
+            raise GameConflictError("La partida fue modificada en otra pestaña o proceso; vuelve a cargar el estado")
+        cached.stored = current
+        return True
+
+    def evict_expired(self):
+        """Borra de la base las partidas inactivas por más del TTL."""
+        with self._lock:
+            self._last_sweep = 0.0
+            self._enforce_limits(self.clock())
+
+    def _enforce_limits(self, now: float):
+        """Limita las copias locales y borra periódicamente las partidas vencidas. Requiere self._lock."""
+        if len(self._cache) > self.max_cached:
+            for game_id, cached in list(self._cache.items()):
+                if len(self._cache) <= self.max_cached:
+                    break
+                if not cached.in_use:
+                    del self._cache[game_id]
+                    self.memory_bytes -= cached.size
+
+        if now - self._last_sweep > SPILL_SWEEP_INTERVAL:
+            self._last_sweep = now
+            self._connection().execute("DELETE FROM games WHERE last_access < ?", (now - self.ttl_seconds,))
@@ -0,0 +1,155 @@
+"""
+Métricas internas con formato de texto de Prometheus.
+
+Contadores, gauges e histogramas de buckets fijos: memoria constante y un
+costo por observación de una búsqueda binaria y un lock. El registro global
+REGISTRY reúne las métricas del motor (game_logic) y de la app (app.py) y
+las publica con render() en /metrics.
+"""
+
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Buckets de latencia en segundos (de 0.5 ms a 10 s)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    """Escapa un valor de etiqueta según el formato de Prometheus."""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _number(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Counter:
+    """Contador monótono, con etiquetas opcionales."""
+    kind = 'counter'
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, *labels: str):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        if not items and not self.label_names:
+            items = [((), 0)]
+        return [f"{self.name}{_labels(self.label_names, labels)} {_number(value)}" for labels, value in items]
+
+
+class Gauge:
+    """Valor instantáneo que se lee de una función al publicar."""
+    kind = 'gauge'
+
+    def __init__(self, name: str, help_text: str, read: Callable[[], float]):
+        self.name = name
+        self.help = help_text
+        self.read = read
+
+    def samples(self) -> List[str]:
+        return [f"{self.name} {_number(self.read())}"]
+
+
+class Histogram:
+    """
+    Histograma de buckets fijos, con etiquetas opcionales.
+    La memoria depende solo de la cantidad de buckets y de combinaciones de etiquetas.
+    """
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], List[float]] = {}  # etiquetas -> [conteo por bucket..., +Inf, suma]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return sum(series[:-1]) if series else 0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((labels, list(series)) for labels, series in self._series.items())
+        lines = []
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series[:-1]):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {_number(series[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Conjunto de métricas publicadas juntas."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """Registra una métrica; si ya existe una con el mismo nombre, devuelve esa."""
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help_text: str, label_names: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help_text, label_names))
+
+    def gauge(self, name: str, help_text: str, read: Callable[[], float]) -> Gauge:
+        return self.register(Gauge(name, help_text, read))
+
+    def histogram(self, name: str, help_text: str, label_names: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, label_names, buckets))
+
+    def get(self, name: str) -> Optional[object]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Todas las métricas en formato de texto de Prometheus (versión 0.0.4)."""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+# Registro global del proceso
+REGISTRY = Registry()
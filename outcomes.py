@@ -0,0 +1,170 @@
+"""
+Oráculo de resultados: calcula de una vez el final de un reparto.
+
+Después de deal_cards() la partida automática es determinista (la carta
+superior siempre va al grupo de su valor), así que el resultado, la cantidad
+de movimientos y la razón de derrota se pueden calcular en un bucle cerrado
+sobre enteros, sin construir los dicts de cada movimiento. Los resultados se
+guardan en una caché acotada indexada por la clave canónica del reparto (y la
+variante del juego, si no es la clásica).
+"""
+
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Hashable, MutableSequence, NamedTuple, Optional
+
+from game_logic import CLASSIC, EMPTY, GameConfig, OracleGame
+
+
+class Outcome(NamedTuple):
+    """Resultado final de un reparto jugado en modo automático."""
+    game_state: str        # "victory" o "defeat"
+    moves: int             # Cantidad de movimientos hasta el final
+    defeat_reason: str     # Razón de derrota ("" si hubo victoria)
+
+
+def resolve_deal(deal: bytes, config: GameConfig = CLASSIC, record: Optional[MutableSequence] = None) -> Outcome:
+    """
+    Calcula el resultado de un reparto codificado con OracleGame.deal_key().
+    Reproduce exactamente las reglas de make_move (victoria, bucle infinito,
+    auto-loop, grupo vacío y estado repetido) sobre colas enlazadas de valores.
+    config: Variante del juego con la que se repartió
+    record: Si se indica, se le agrega la posición en el reparto de la carta
+            que se mueve en cada paso (la trayectoria completa)
+    """
+    if config.value_typecode != 'B':
+        deal = array(config.value_typecode, deal)  # valores de más de un byte
+    deck_size, num_groups, group_size = config.deck_size, config.groups, config.copies
+    if len(deal) != deck_size:
+        raise ValueError(f"El reparto debe tener {deck_size} cartas")
+
+    # Colas enlazadas por posición del reparto, igual que en OracleGame
+    next_slot = [EMPTY] * deck_size
+    head = [EMPTY] * (num_groups + 1)
+    tail = [EMPTY] * (num_groups + 1)
+    count = [0] * (num_groups + 1)
+    correct = [0] * (num_groups + 1)
+    slot = 0
+    for group, deal_size in enumerate(config.deal_sizes, start=1):
+        for _ in range(deal_size):
+            if count[group]:
+                next_slot[tail[group]] = slot
+            else:
+                head[group] = slot
+            tail[group] = slot
+            count[group] += 1
+            if deal[slot] == group:
+                correct[group] += 1
+            slot += 1
+    sorted_groups = sum(1 for group in range(1, num_groups + 1)
+                        if count[group] == group_size and correct[group] == group_size)
+
+    current = config.start_group
+    if not count[current]:
+        return Outcome("defeat", 0, "Centro vacío al iniciar")
+
+    moves = 0
+    while True:
+        # Sacar la carta superior del grupo actual
+        slot = head[current]
+        value = deal[slot]
+        was_sorted = count[current] == group_size and correct[current] == group_size
+        head[current] = next_slot[slot]
+        count[current] -= 1
+        if not count[current]:
+            tail[current] = EMPTY
+        if value == current:
+            correct[current] -= 1
+        if was_sorted:
+            sorted_groups -= 1
+        elif count[current] == group_size and correct[current] == group_size:
+            sorted_groups += 1
+
+        # Ponerla al final del grupo de su valor
+        was_sorted = count[value] == group_size and correct[value] == group_size
+        next_slot[slot] = EMPTY
+        if count[value]:
+            next_slot[tail[value]] = slot
+        else:
+            head[value] = slot
+        tail[value] = slot
+        count[value] += 1
+        correct[value] += 1
+        is_sorted = count[value] == group_size and correct[value] == group_size
+        if is_sorted != was_sorted:
+            sorted_groups += 1 if is_sorted else -1
+
+        moves += 1
+        self_move = value == current
+        current = value
+        if record is not None:
+            record.append(slot)
+
+        if sorted_groups == num_groups:
+            return Outcome("victory", moves, "")
+        if not count[current]:
+            return Outcome("defeat", moves, f"Grupo {current} vacío - no hay cartas para mover")
+        top_value = deal[head[current]]
+        if top_value == current:
+            if count[current] == group_size and correct[current] == group_size:
+                return Outcome("defeat", moves, f"Bucle infinito detectado: el grupo {current} está completamente ordenado pero otros grupos no. ¡Imposible continuar!")
+            if count[current] == 1:
+                return Outcome("defeat", moves, f"Auto-loop: carta {config.rank_labels[top_value - 1]} apunta al mismo grupo {current} sin más cartas")
+        # detect_infinite_loop_scenario nunca se activa aquí: su condición ya
+        # la cubre la verificación de bucle infinito anterior. Un estado solo
+        # se repite tras un movimiento dentro del mismo grupo cuando todas sus
+        # cartas son de su valor (ver OracleGame.detect_repeated_state).
+        if self_move and correct[current] == count[current]:
+            return Outcome("defeat", moves, f"Bucle infinito: el oráculo volvió a una posición ya vista en el movimiento {moves}. ¡El oráculo se ha cerrado!")
+
+
+class OutcomeCache:
+    """
+    Caché LRU acotada de resultados por clave de reparto.
+    Segura para usar desde varios threads del servidor.
+    """
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._results: 'OrderedDict[Hashable, Outcome]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def get(self, deal: bytes, config: GameConfig = CLASSIC) -> Outcome:
+        """Devuelve el resultado del reparto, calculándolo solo si no está en caché."""
+        key = deal if config.is_classic else (config.key, deal)
+        with self._lock:
+            outcome = self._results.get(key)
+            if outcome is not None:
+                self._results.move_to_end(key)
+                self.hits += 1
+                return outcome
+            self.misses += 1
+
+        outcome = resolve_deal(deal, config)
+        with self._lock:
+            self._results[key] = outcome
+            if len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+        return outcome
+
+
+# Caché compartida por el proceso
+outcome_cache = OutcomeCache()
+
+
+def resolve_game(game: OracleGame, cache: Optional[OutcomeCache] = outcome_cache) -> Outcome:
+    """
+    Resultado de la partida recién repartida, sin jugarla.
+    cache: Caché a usar (None para calcular siempre, p. ej. en simulaciones masivas)
+    Si la partida tiene la trayectoria precalculada se usa su resultado.
+    """
+    if game.trajectory_outcome is not None:
+        return game.trajectory_outcome
+    deal = game.deal_key()
+    return cache.get(deal, game.config) if cache is not None else resolve_deal(deal, game.config)
@@ -0,0 +1,217 @@
+"""
+Motor de barajado del Oráculo de las Cartas.
+
+Modelo de mezcla: varias pasadas riffle (5-8) al estilo Gilbert-Shannon-Reeds,
+con un corte cerca de la mitad (±6 cartas) y caída de las cartas en grupos de
+1-3 desde una mitad elegida al azar, imitando cómo se pegan las cartas al
+mezclar a mano. Todo trabaja sobre permutaciones de índices en arreglos
+preasignados, sin copiar mitades en cada paso.
+
+- riffle_shuffle: baraja un mazo en su lugar con un generador random.Random.
+  Consume el generador igual que el barajado original de OracleGame, así que
+  una misma semilla sigue dando el mismo mazo; los sorteos de cada grupo van
+  directo a getrandbits en lugar de pasar por choice y randint.
+- shuffle_batch: genera miles de mazos barajados en una llamada. Usa NumPy
+  (vectorizado, todos los mazos en paralelo) si está instalado y, si no, un
+  generador independiente por mazo. Ambos son reproducibles con seed.
+"""
+
+import random
+from array import array
+from typing import Callable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional: solo acelera shuffle_batch
+    np = None
+
+MIN_PASSES = 5        # Pasadas riffle mínimas
+MAX_PASSES = 8        # Pasadas riffle máximas
+CUT_SPREAD = 6        # Desvío máximo del corte respecto de la mitad
+MAX_CLUMP = 3         # Cartas máximas que caen juntas de una mitad
+_SIDES = (True, False)
+
+
+def deck_typecode(deck_size: int) -> str:
+    """Typecode de array con signo más chico para los ids de un mazo de deck_size cartas."""
+    for typecode in ('b', 'h', 'i', 'q'):
+        if deck_size <= 1 << (8 * array(typecode).itemsize - 1):
+            return typecode
+    raise ValueError(f"Mazo demasiado grande: {deck_size} cartas")
+
+
+def _cut_bounds(deck_size: int):
+    """Rango del punto de corte: la mitad del mazo ± CUT_SPREAD."""
+    half = deck_size // 2
+    return max(0, half - CUT_SPREAD), min(deck_size, half + CUT_SPREAD)
+
+
+def _clump_draw(rng) -> Callable[[], Tuple[bool, int]]:
+    """
+    Función que sortea (tomar de la mitad izquierda, cartas del grupo) igual
+    que choice(_SIDES) y randint(1, MAX_CLUMP). Si el generador sortea con
+    getrandbits (random.Random y el módulo random) repite su muestreo por
+    rechazo sin la cadena randint -> randrange -> _randbelow, consumiendo
+    exactamente los mismos bits; si no, usa choice y randint.
+    """
+    instance = getattr(rng, '_inst', rng)  # el módulo random delega en su instancia
+    randbelow = getattr(getattr(instance, '_randbelow', None), '__func__', None)
+    if randbelow is None or randbelow is not getattr(random.Random, '_randbelow_with_getrandbits', None):
+        choice, randint = rng.choice, rng.randint
+        return lambda: (choice(_SIDES), randint(1, MAX_CLUMP))
+
+    getrandbits = instance.getrandbits
+    sides, side_bits = len(_SIDES), len(_SIDES).bit_length()
+    clump_bits = MAX_CLUMP.bit_length()
+
+    def draw() -> Tuple[bool, int]:
+        side = getrandbits(side_bits)
+        while side >= sides:
+            side = getrandbits(side_bits)
+        cards = getrandbits(clump_bits)
+        while cards >= MAX_CLUMP:
+            cards = getrandbits(clump_bits)
+        return _SIDES[side], cards + 1
+    return draw
+
+
+def riffle_shuffle(deck: array, rng=random, scratch: Optional[array] = None) -> array:
+    """
+    Baraja deck en su lugar con varias pasadas riffle y lo devuelve.
+    rng: Generador con randint/choice (random.Random o el módulo random)
+    scratch: Arreglo auxiliar del mismo tamaño y tipo para no asignar memoria
+    """
+    size = len(deck)
+    if scratch is None or len(scratch) != size:
+        scratch = array(deck.typecode, deck)
+    cut_low, cut_high = _cut_bounds(size)
+    source, target = deck, scratch
+    randint, draw_clump = rng.randint, _clump_draw(rng)
+
+    for _ in range(randint(MIN_PASSES, MAX_PASSES)):
+        # Dividir el mazo aproximadamente por la mitad
+        split_point = randint(cut_low, cut_high)
+        left, right = 0, split_point
+        position = 0
+
+        # Intercalar grupos de 1-3 cartas mientras queden cartas en ambas mitades.
+        # Cada grupo se copia de un buffer al otro; las mitades nunca se recortan.
+        while left < split_point and right < size:
+            take_from_left, cards_to_take = draw_clump()
+            if take_from_left:
+                end = min(left + cards_to_take, split_point)
+                target[position:position + end - left] = source[left:end]
+                position += end - left
+                left = end
+            else:
+                end = min(right + cards_to_take, size)
+                target[position:position + end - right] = source[right:end]
+                position += end - right
+                right = end
+
+        # Lo que queda de una de las mitades cae completo
+        target[position:position + split_point - left] = source[left:split_point]
+        position += split_point - left
+        target[position:] = source[right:]
+
+        source, target = target, source
+
+    if source is not deck:
+        deck[:] = source
+    return deck
+
+
+def shuffle_batch(n_decks: int, deck_size: int = 52, seed: Optional[int] = None,
+                  use_numpy: Optional[bool] = None, typecode: Optional[str] = None):
+    """
+    Genera n_decks mazos barajados (permutaciones de 0..deck_size-1).
+    Con NumPy devuelve un ndarray (n_decks, deck_size); sin NumPy, una lista
+    de arrays. La misma semilla produce siempre los mismos mazos con el
+    mismo backend (los dos backends usan generadores distintos).
+    use_numpy: Forzar (True) o evitar (False) NumPy; por defecto se usa si existe
+    typecode: Tipo de los ids de carta (p. ej. GameConfig.card_typecode); por
+              defecto el más chico que alcanza para deck_size
+    """
+    if typecode is None:
+        typecode = deck_typecode(deck_size)
+    elif deck_size > 1 << (8 * array(typecode).itemsize - 1):
+        raise ValueError(f"El typecode {typecode!r} no alcanza para un mazo de {deck_size} cartas")
+    if use_numpy is None:
+        use_numpy = np is not None
+    if use_numpy:
+        if np is None:
+            raise RuntimeError("NumPy no está instalado")
+        return _shuffle_batch_numpy(n_decks, deck_size, seed, typecode)
+    return _shuffle_batch_python(n_decks, deck_size, seed, typecode)
+
+
+def _shuffle_batch_python(n_decks: int, deck_size: int, seed: Optional[int], typecode: str) -> List[array]:
+    """Un generador por mazo derivado de (seed, índice del mazo)."""
+    if seed is None:
+        seed = random.SystemRandom().randrange(2 ** 63)
+    scratch = array(typecode, bytes(deck_size * array(typecode).itemsize))
+    decks = []
+    for index in range(n_decks):
+        deck = array(typecode, range(deck_size))
+        riffle_shuffle(deck, random.Random(f"{seed}:{index}"), scratch)
+        decks.append(deck)
+    return decks
+
+
+def _shuffle_batch_numpy(n_decks: int, deck_size: int, seed: Optional[int], typecode: str):
+    """
+    Todos los mazos avanzan juntos: en cada iteración cada mazo deja caer un
+    grupo de 1-3 cartas de la mitad que le tocó, con operaciones enmascaradas.
+    """
+    rng = np.random.default_rng(seed)
+    rows = np.arange(n_decks)
+    dtype = np.dtype(typecode)
+    decks = np.tile(np.arange(deck_size, dtype=dtype), (n_decks, 1))
+    shuffled = np.empty_like(decks)
+    columns = np.arange(deck_size)
+    cut_low, cut_high = _cut_bounds(deck_size)
+    passes = rng.integers(MIN_PASSES, MAX_PASSES + 1, size=n_decks)
+
+    for pass_number in range(MAX_PASSES):
+        active = passes > pass_number
+        if not active.any():
+            break
+        split = rng.integers(cut_low, cut_high + 1, size=n_decks)
+        left = np.zeros(n_decks, dtype=np.int64)
+        right = split.astype(np.int64)
+        position = np.zeros(n_decks, dtype=np.int64)
+
+        while True:
+            left_remaining = split - left
+            right_remaining = deck_size - right
+            live = (left_remaining > 0) & (right_remaining > 0) & active
+            if not live.any():
+                break
+            take_from_left = rng.random(n_decks) < 0.5
+            clump = rng.integers(1, MAX_CLUMP + 1, size=n_decks)
+            clump = np.where(take_from_left, np.minimum(clump, left_remaining),
+                             np.minimum(clump, right_remaining))
+            clump[~live] = 0
+            start = np.where(take_from_left, left, right)
+            for offset in range(MAX_CLUMP):
+                mask = clump > offset
+                shuffled[rows[mask], position[mask] + offset] = decks[rows[mask], start[mask] + offset]
+            position += clump
+            left += np.where(take_from_left, clump, 0)
+            right += np.where(take_from_left, 0, clump)
+
+        # Copiar el resto de la mitad que no se agotó
+        remaining = (split - left) + (deck_size - right)
+        start = np.where(split - left > 0, left, right)
+        tail = (columns[None, :] < remaining[:, None]) & active[:, None]
+        tail_rows, tail_columns = np.nonzero(tail)
+        shuffled[tail_rows, position[tail_rows] + tail_columns] = decks[tail_rows, start[tail_rows] + tail_columns]
+
+        decks = np.where(active[:, None], shuffled, decks)
+
+    return decks
+
+
+def is_permutation(deck: Sequence[int]) -> bool:
+    """Verifica que un mazo contenga cada carta exactamente una vez."""
+    return sorted(deck) == list(range(len(deck)))
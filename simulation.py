@@ -0,0 +1,249 @@
+"""
+Simulador Monte Carlo del Oráculo de las Cartas.
+
+Juega partidas completas en modo automático (OracleGame.start_game +
+auto_play_step) repartidas en un pool de procesos, y estima la probabilidad
+de victoria, la distribución de la cantidad de movimientos y las razones de
+derrota. Por defecto cada reparto se resuelve con outcomes.resolve_deal,
+que da el mismo resultado sin reproducir los movimientos (--replay juega
+paso a paso y --batch juega cada bloque en lote con NumPy, ver
+batch_engine.py; los tres dan el mismo resultado). Uso desde consola:
+
+    python simulation.py 1000000 --workers 8 --seed 42 --margin 0.001
+    python simulation.py 10000 --ranks 100 --copies 20    # variante de 2000 cartas
+    python simulation.py 1000000 --batch --chunk-size 50000
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+from collections import Counter
+from multiprocessing import Pool
+from statistics import NormalDist
+from typing import Dict, Iterator, Optional, Tuple
+
+from game_logic import CARDS_PER_GROUP, NUM_GROUPS, GameConfig, OracleGame
+from outcomes import resolve_game
+
+DEFAULT_CHUNK_SIZE = 5000       # Partidas por tarea enviada al pool
+MAX_MOVES_PER_GAME = 10000      # Límite de seguridad por partida
+UNFINISHED = "Sin terminar (límite de movimientos)"
+
+
+def play_full_game(game: OracleGame, max_moves: int = MAX_MOVES_PER_GAME) -> Tuple[str, int, str]:
+    """
+    Juega una partida completa en modo automático.
+    Devuelve (estado_final, cantidad_de_movimientos, razón_de_derrota).
+    """
+    game.start_game()
+    moves = 0
+    while game.game_state == "playing":
+        if moves >= max_moves:
+            return "unfinished", moves, UNFINISHED
+        game.auto_play_step()
+        moves += 1
+    return game.game_state, len(game.moves_history), game.defeat_reason
+
+
+def _chunk_rng(seed: int, chunk_index: int) -> random.Random:
+    """
+    Generador determinista para un bloque de partidas.
+    Depende solo de la semilla y del índice del bloque, no del proceso que lo
+    ejecute, así que el resultado es el mismo con cualquier cantidad de workers.
+    """
+    return random.Random(f"{seed}:{chunk_index}")
+
+
+def resolve_full_game(game: OracleGame) -> Tuple[str, int, str]:
+    """
+    Reparte una partida y calcula su resultado sin jugar los movimientos.
+    Devuelve lo mismo que play_full_game.
+    """
+    game.start_game()
+    return tuple(resolve_game(game, cache=None))
+
+
+def _run_batch_chunk(game: OracleGame, n_games: int) -> Tuple[int, int, Counter, Counter]:
+    """
+    Como _run_chunk, pero juega el bloque en lote con batch_engine. Los mazos
+    salen del mismo generador, así que el resultado es idéntico.
+    """
+    from batch_engine import play_decks
+
+    decks = []
+    for _ in range(n_games):
+        game.create_deck()
+        game.shuffle_deck()
+        decks.append(game._deck.tolist())
+    result = play_decks(decks, game.config)
+    moves_histogram = Counter(result.moves.tolist())
+    defeat_reasons = Counter(outcome.defeat_reason for outcome in result if outcome.game_state != "victory")
+    return n_games, result.victories, moves_histogram, defeat_reasons
+
+
+def _run_chunk(task: Tuple[int, int, int, int, str, int, int]) -> Tuple[int, int, Counter, Counter]:
+    """
+    Ejecuta un bloque de partidas dentro de un worker.
+    Devuelve (partidas, victorias, histograma_de_movimientos, razones_de_derrota).
+    """
+    seed, chunk_index, n_games, max_moves, mode, ranks, copies = task
+    game = OracleGame(rng=_chunk_rng(seed, chunk_index), config=GameConfig.get(ranks, copies))
+    if mode == 'batch':
+        return _run_batch_chunk(game, n_games)
+    replay = mode == 'replay'
+    victories = 0
+    moves_histogram = Counter()
+    defeat_reasons = Counter()
+    for _ in range(n_games):
+        if replay:
+            state, moves, reason = play_full_game(game, max_moves)
+        else:
+            state, moves, reason = resolve_full_game(game)
+        moves_histogram[moves] += 1
+        if state == "victory":
+            victories += 1
+        else:
+            defeat_reasons[reason] += 1
+    return n_games, victories, moves_histogram, defeat_reasons
+
+
+def wilson_interval(victories: int, games: int, confidence: float = 0.95) -> Tuple[float, float]:
+    """
+    Intervalo de confianza de Wilson para la tasa de victoria.
+    Se comporta bien incluso con tasas cercanas a 0 o 1.
+    """
+    if games == 0:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    p = victories / games
+    denominator = 1 + z * z / games
+    center = (p + z * z / (2 * games)) / denominator
+    half_width = z * math.sqrt(p * (1 - p) / games + z * z / (4 * games * games)) / denominator
+    return max(0.0, center - half_width), min(1.0, center + half_width)
+
+
+def _tasks(seed: int, n_games: int, chunk_size: int, max_moves: int, mode: str,
+           ranks: int, copies: int) -> Iterator[Tuple[int, int, int, int, str, int, int]]:
+    """Divide n_games en bloques numerados de tamaño fijo."""
+    chunk_index = 0
+    remaining = n_games
+    while remaining > 0:
+        size = min(chunk_size, remaining)
+        yield seed, chunk_index, size, max_moves, mode, ranks, copies
+        remaining -= size
+        chunk_index += 1
+
+
+def simulate(n_games: int, workers: Optional[int] = None, seed: Optional[int] = None,
+             confidence: float = 0.95, margin: Optional[float] = None,
+             chunk_size: int = DEFAULT_CHUNK_SIZE,
+             max_moves: int = MAX_MOVES_PER_GAME, replay: bool = False,
+             ranks: int = NUM_GROUPS, copies: int = CARDS_PER_GROUP, batch: bool = False) -> Dict:
+    """
+    Simula hasta n_games partidas automáticas y resume los resultados.
+    workers: Procesos del pool (por defecto os.cpu_count(); 1 = sin pool)
+    seed: Semilla base; con la misma semilla y chunk_size el resultado es idéntico
+    confidence: Nivel de confianza del intervalo de la tasa de victoria
+    margin: Si se indica, se detiene en cuanto la mitad del intervalo es <= margin
+    replay: Jugar cada partida paso a paso con auto_play_step en vez de resolverla
+    ranks, copies: Variante del juego (por defecto la clásica de 13 x 4)
+    batch: Jugar cada bloque en lote con NumPy (batch_engine); excluye replay
+    """
+    if n_games <= 0:
+        raise ValueError("n_games debe ser positivo")
+    if batch and replay:
+        raise ValueError("replay y batch son excluyentes")
+    GameConfig.get(ranks, copies)  # valida la variante antes de lanzar los workers
+    if seed is None:
+        seed = random.SystemRandom().randrange(2 ** 63)
+    workers = workers or os.cpu_count() or 1
+
+    games = 0
+    victories = 0
+    moves_histogram = Counter()
+    defeat_reasons = Counter()
+    stopped_early = False
+
+    mode = 'batch' if batch else 'replay' if replay else 'resolve'
+    tasks = _tasks(seed, n_games, chunk_size, max_moves, mode, ranks, copies)
+    pool = Pool(workers) if workers > 1 else None
+    try:
+        # imap conserva el orden de los bloques: la parada temprana es determinista
+        results = pool.imap(_run_chunk, tasks) if pool else map(_run_chunk, tasks)
+        for chunk_games, chunk_victories, chunk_moves, chunk_defeats in results:
+            games += chunk_games
+            victories += chunk_victories
+            moves_histogram.update(chunk_moves)
+            defeat_reasons.update(chunk_defeats)
+
+            if margin is not None and games < n_games:
+                low, high = wilson_interval(victories, games, confidence)
+                if (high - low) / 2 <= margin:
+                    stopped_early = True
+                    break
+    finally:
+        if pool:
+            pool.terminate()
+            pool.join()
+
+    low, high = wilson_interval(victories, games, confidence)
+    return {
+        'games': games,
+        'victories': victories,
+        'victory_rate': victories / games,
+        'confidence': confidence,
+        'confidence_interval': (low, high),
+        'stopped_early': stopped_early,
+        'seed': seed,
+        'ranks': ranks,
+        'copies': copies,
+        'moves_histogram': dict(sorted(moves_histogram.items())),
+        'defeat_reasons': dict(defeat_reasons.most_common())
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulador Monte Carlo del Oráculo de las Cartas")
+    parser.add_argument('n_games', type=int, help="Cantidad máxima de partidas a simular")
+    parser.add_argument('--workers', type=int, default=None, help="Procesos en paralelo (por defecto: todos los núcleos)")
+    parser.add_argument('--seed', type=int, default=None, help="Semilla base para resultados reproducibles")
+    parser.add_argument('--confidence', type=float, default=0.95, help="Nivel de confianza del intervalo")
+    parser.add_argument('--margin', type=float, default=None, help="Detener al alcanzar este margen de error")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Partidas por tarea")
+    parser.add_argument('--replay', action='store_true', help="Jugar cada partida paso a paso (más lento)")
+    parser.add_argument('--batch', action='store_true', help="Jugar cada bloque en lote con NumPy (más rápido)")
+    parser.add_argument('--ranks', type=int, default=NUM_GROUPS, help="Rangos (y grupos) de la variante")
+    parser.add_argument('--copies', type=int, default=CARDS_PER_GROUP, help="Copias de cada rango en el mazo")
+    parser.add_argument('--max-moves', type=int, default=MAX_MOVES_PER_GAME, help="Límite de movimientos por partida con --replay")
+    parser.add_argument('--json', action='store_true', help="Imprimir el resultado completo en JSON")
+    args = parser.parse_args()
+
+    result = simulate(args.n_games, workers=args.workers, seed=args.seed,
+                      confidence=args.confidence, margin=args.margin,
+                      chunk_size=args.chunk_size, replay=args.replay,
+                      max_moves=args.max_moves, ranks=args.ranks, copies=args.copies,
+                      batch=args.batch)
+
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return
+
+    low, high = result['confidence_interval']
+    print(f"🎲 Partidas simuladas: {result['games']} (semilla {result['seed']}, "
+          f"{result['ranks']} rangos x {result['copies']} copias)")
+    print(f"🏆 Tasa de victoria: {result['victory_rate']:.4%} "
+          f"[{low:.4%}, {high:.4%}] al {result['confidence']:.0%}")
+    if result['stopped_early']:
+        print("⏹️ Detenido al alcanzar el margen de error solicitado")
+    print("📊 Movimientos por partida:")
+    for moves, count in result['moves_histogram'].items():
+        print(f"   {moves:>4}: {count}")
+    print("💀 Razones de derrota:")
+    for reason, count in result['defeat_reasons'].items():
+        print(f"   {count:>8}  {reason}")
+
+
+if __name__ == '__main__':
+    main()
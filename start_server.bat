@@ -13,6 +13,8 @@ echo ✅ Python encontrado
 echo 🚀 Iniciando servidor Flask...
 
 cd /d "%~dp0"
+echo 📦 Preparando assets (minificados y comprimidos)...
+python assets.py build
 python app.py
 
 pause
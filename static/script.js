@@ -760,6 +760,7 @@ class OracleGame {
         this.gameMode = mode;
         this.isAutoMode = false; // Siempre empezar en false, se activará después
         this.autoInterval = null;
+        this.autoStream = null;
         this.autoSpeed = 1500;
         this.currentState = null;
         this.isShuffleAnimationActive = false;
@@ -1067,10 +1068,64 @@ class OracleGame {
         
         this.showMessage('⚡ Modo automático activado - El oráculo revela su sabiduría...', 'info');
         
+        // Preferir el stream del servidor (SSE); el sondeo queda como respaldo
+        if (window.EventSource) {
+            this.startAutoStream();
+        } else {
+            this.startAutoPolling();
+        }
+    }
+
+    startAutoPolling() {
         console.log('🎯 Configurando intervalo automático con velocidad:', this.autoSpeed, 'ms');
         this.autoInterval = setInterval(() => this.executeAutoStep(), this.autoSpeed);
     }
 
+    startAutoStream() {
+        console.log('📡 Abriendo stream automático con velocidad:', this.autoSpeed, 'ms');
+        
+        const params = new URLSearchParams({ interval_ms: this.autoSpeed });
+        if (this.currentState) {
+            params.set('since_version', this.currentState.version);
+            params.set('epoch', this.currentState.epoch);
+        }
+        
+        let receivedSteps = false;
+        const stream = new EventSource(`/api/auto_stream?${params}`);
+        this.autoStream = stream;
+        
+        stream.addEventListener('step', (event) => {
+            receivedSteps = true;
+            this.handleAutoStepResult(JSON.parse(event.data));
+        });
+        
+        stream.addEventListener('end', () => this.closeAutoStream());
+        
+        stream.onerror = () => {
+            if (this.autoStream !== stream) return;
+            this.closeAutoStream();
+            
+            if (!this.isAutoMode) return;
+            if (!receivedSteps) {
+                // El servidor o un proxy no soporta streaming: volver al sondeo
+                console.warn('⚠️ Stream no disponible, usando sondeo de /api/auto_step');
+                this.startAutoPolling();
+            } else {
+                this.stopAutoMode();
+                this.showMessage('🔌 Se perdió la conexión con el oráculo', 'error');
+                document.getElementById('newGameBtn').disabled = false;
+            }
+        };
+    }
+
+    closeAutoStream() {
+        if (this.autoStream) {
+            this.autoStream.close();
+            this.autoStream = null;
+            console.log('✅ Stream automático cerrado');
+        }
+    }
+
     stopAutoMode() {
         console.log('⏹️ Deteniendo modo automático. isAutoMode actual:', this.isAutoMode);
         
@@ -1087,6 +1142,12 @@ class OracleGame {
             console.log('✅ Intervalo automático detenido');
         }
         
+        if (this.autoStream) {
+            this.closeAutoStream();
+            // Avisar al servidor para que no siga avanzando la partida
+            fetch('/api/auto_stream/stop', { method: 'POST' }).catch(() => {});
+        }
+        
         const autoPlayBtn = document.getElementById('autoPlayBtn');
         const stopAutoBtn = document.getElementById('stopAutoBtn');
         const newGameBtn = document.getElementById('newGameBtn');
@@ -1109,18 +1170,34 @@ class OracleGame {
         try {
             console.log('🎲 Ejecutando paso automático...');
             
+            // Enviar la versión conocida para recibir solo los cambios (delta)
             const response = await fetch('/api/auto_step', {
                 method: 'POST',
-                headers: { 'Content-Type': 'application/json' }
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify(this.currentState ? {
+                    since_version: this.currentState.version,
+                    epoch: this.currentState.epoch
+                } : {})
             });
             
             const data = await response.json();
-            
+            this.handleAutoStepResult(data);
+        } catch (error) {
+            console.error('🔌 Error de conexión en paso automático:', error);
+            this.stopAutoMode();
+            this.showMessage(`🔌 Error de conexión: ${error.message}`, 'error');
+            document.getElementById('newGameBtn').disabled = false;
+        }
+    }
+
+    handleAutoStepResult(data) {
+        // Resultado de un paso automático (sondeo o stream)
+        try {
             if (data.success) {
                 // Reproducir sonido de movimiento automático
                 this.soundManager.playSound('cardMove');
                 
-                this.currentState = data.state;
+                this.applyStateResponse(data);
                 this.updateGameDisplay();
                 this.updateGameStatus();
                 this.updateReshuffleButton(); // Actualizar botón de rebarajado
@@ -1180,16 +1257,35 @@ class OracleGame {
                 console.error('❌ Error en paso automático:', data.message);
                 this.stopAutoMode();
                 this.showMessage(`❌ Error: ${data.message}`, 'error');
+                if (data.conflict) this.loadGameState();
                 document.getElementById('newGameBtn').disabled = false;
             }
         } catch (error) {
-            console.error('🔌 Error de conexión en paso automático:', error);
+            console.error('❌ Error procesando paso automático:', error);
             this.stopAutoMode();
-            this.showMessage(`🔌 Error de conexión: ${error.message}`, 'error');
+            this.showMessage(`❌ Error: ${error.message}`, 'error');
             document.getElementById('newGameBtn').disabled = false;
         }
     }
 
+    applyStateResponse(data) {
+        // Respuesta completa ('state') o delta versionado ('delta')
+        if (!data.delta) {
+            this.currentState = data.state;
+            return;
+        }
+        
+        const delta = data.delta;
+        if (delta.full || !this.currentState) {
+            this.currentState = delta;
+            return;
+        }
+        
+        // Combinar: solo llegan los grupos modificados, los contadores y el último movimiento
+        const groups = { ...this.currentState.groups, ...delta.groups };
+        this.currentState = { ...this.currentState, ...delta, groups };
+    }
+
     async handleGroupClick(event) {
         if (this.isAutoMode || !this.currentState || this.currentState.game_state !== 'playing') {
             return;
@@ -1245,6 +1341,8 @@ class OracleGame {
                 }
             } else {
                 this.showMessage(`❌ ${data.message}`, 'error');
+                // La partida cambió en otra pestaña: traer el estado vigente
+                if (data.conflict) this.loadGameState();
             }
         } catch (error) {
             this.showMessage(`🔌 Error de conexión: ${error.message}`, 'error');
@@ -1446,9 +1544,20 @@ class OracleGame {
         messageArea.scrollTop = messageArea.scrollHeight;
     }
 
-    async loadGameState() {
+    stateETag() {
+        // Mismo formato que state_etag() en app.py: época en hexadecimal y versión
+        if (!this.currentState) return null;
+        return `"${this.currentState.epoch.toString(16)}-${this.currentState.version}"`;
+    }
+
+    async loadGameState(waitSeconds = 0) {
         try {
-            const response = await fetch('/api/game_state');
+            // Con el ETag del estado que ya tenemos el servidor responde 304 sin
+            // cuerpo si nada cambió; con waitSeconds espera a que cambie
+            const etag = this.stateETag();
+            const url = waitSeconds ? `/api/game_state?wait=${waitSeconds}` : '/api/game_state';
+            const response = await fetch(url, etag ? { headers: { 'If-None-Match': etag } } : {});
+            if (response.status === 304) return;
             const data = await response.json();
             
             if (data.success) {
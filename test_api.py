@@ -0,0 +1,195 @@
+"""
+Pruebas de la API: las mismas rutas servidas por app.py (Flask) y por
+asgi.py deben responder igual, así que cada prueba corre contra ambos.
+"""
+
+import asyncio
+import os
+
+import pytest
+
+# Sin pool de repartos: las pruebas no necesitan el hilo de relleno
+os.environ.setdefault('ORACLE_DECK_POOL_HIGH', '0')
+
+import app  # noqa: E402
+import asgi  # noqa: E402
+import game_log  # noqa: E402
+from game_store import GameConflictError  # noqa: E402
+
+
+@pytest.fixture(params=['wsgi', 'asgi'])
+def client(request):
+    """Cliente de pruebas de Flask o de asgi.py, con su propia partida."""
+    return app.app.test_client() if request.param == 'wsgi' else asgi.TestClient()
+
+
+def new_game(client):
+    response = client.post('/api/new_game')
+    assert response.status_code == 200
+    return response.get_json()['state']
+
+
+def play_to_end(client):
+    """Juega en modo automático hasta que la partida termina."""
+    for _ in range(100):
+        data = client.post('/api/auto_step', json={'steps': app.MAX_BATCH_MOVES}).get_json()
+        if not data['can_continue']:
+            return data
+    raise AssertionError('La partida no terminó')
+
+
+def test_new_game_state_matches_game_state(client):
+    state = new_game(client)
+    assert state['game_state'] == 'playing'
+    assert state['moves_count'] == 0
+    response = client.get('/api/game_state')
+    assert response.status_code == 200
+    assert response.get_json()['state'] == state
+
+
+def test_game_state_etag_returns_not_modified(client):
+    new_game(client)
+    etag = client.get('/api/game_state').headers['etag']
+    response = client.get('/api/game_state', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    client.post('/api/auto_step')
+    response = client.get('/api/game_state', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['etag'] != etag
+
+
+def test_move_follows_next_move_info(client):
+    new_game(client)
+    info = client.get('/api/next_move_info').get_json()['move_info']
+    response = client.post('/api/move', json={'from_group': info['from_group'], 'to_group': info['to_group']})
+    data = response.get_json()
+    assert response.status_code == 200
+    assert data['success']
+    assert data['state']['moves_count'] == 1
+
+
+def test_moves_and_history(client):
+    new_game(client)
+    data = client.post('/api/auto_step', json={'steps': 5, 'since_version': 0}).get_json()
+    applied = data['applied']
+    assert applied >= 1
+    assert 'delta' in data
+    history = client.get(f'/api/history?limit={applied}').get_json()
+    assert history['total'] == applied
+    assert [move['move_number'] for move in history['moves']] == list(range(1, applied + 1))
+
+
+def test_undo_seek_and_rewind(client):
+    state = new_game(client)
+    applied = client.post('/api/auto_step', json={'steps': 6}).get_json()['applied']
+
+    data = client.post('/api/undo', json={'steps': 2}).get_json()
+    assert data['success'] and data['move_number'] == max(0, applied - 2)
+    data = client.post('/api/seek', json={'move': applied}).get_json()
+    assert data['success'] and data['move_number'] == applied
+    data = client.post('/api/rewind').get_json()
+    assert data['move_number'] == 0
+    assert data['state']['groups'] == state['groups']
+    assert data['state']['moves_count'] == 0
+
+
+@pytest.mark.parametrize('path, body', [
+    ('/api/move', {'from_group': 1}),
+    ('/api/moves', {'moves': [[1, 'x']]}),
+    ('/api/auto_step', {'steps': 0}),
+    ('/api/undo', {'steps': -1}),
+    ('/api/seek', {}),
+    ('/api/move', [1, 2]),
+    ('/api/moves', [1, 2]),
+    ('/api/auto_step', [1, 2]),
+    ('/api/undo', [1, 2]),
+    ('/api/rewind', [1, 2]),
+    ('/api/seek', [1, 2]),
+])
+def test_invalid_parameters_return_400(client, path, body):
+    new_game(client)
+    response = client.post(path, json=body)
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+
+
+def test_replayed_ending_is_logged_once(client, monkeypatch, tmp_path):
+    """Deshacer y volver a terminar el mismo reparto no agrega otro evento final."""
+    writer = game_log.GameLogWriter(str(tmp_path))
+    monkeypatch.setattr(app, 'game_log', writer)
+    new_game(client)
+    play_to_end(client)
+    client.post('/api/undo', json={'steps': 2})
+    play_to_end(client)
+    writer.close()
+    stats = game_log.aggregate(game_log.log_files(str(tmp_path)))
+    assert (stats['games_started'], stats['games_finished']) == (1, 1)
+
+
+def test_invalid_query_parameters_return_400(client):
+    assert client.get('/api/game_state?wait=x').status_code == 400
+    assert client.get('/api/analytics?q=2').status_code == 400
+
+
+def test_undo_without_moves_and_reshuffle_after_moves_fail(client):
+    new_game(client)
+    assert client.post('/api/undo').status_code == 400
+    assert client.post('/api/reshuffle').status_code == 200
+    client.post('/api/auto_step')
+    assert client.post('/api/reshuffle').status_code == 400
+
+
+def test_internal_outcome_matches_played_game(client, monkeypatch):
+    monkeypatch.setattr(app, 'INTERNAL_TOKEN', 'secreto')
+    assert 'outcome' not in client.post('/api/new_game').get_json()
+    data = client.post('/api/new_game', headers={'X-Oracle-Internal-Token': 'secreto'}).get_json()
+    outcome = data['outcome']
+    final = play_to_end(client)['state']
+    assert outcome['game_state'] == final['game_state']
+    assert outcome['moves'] == final['moves_count']
+    assert outcome['defeat_reason'] == final['defeat_reason']
+
+
+def test_conflict_returns_409(client, monkeypatch):
+    new_game(client)
+
+    def checkout(game_id):
+        raise GameConflictError('Partida modificada por otro proceso')
+
+    monkeypatch.setattr(app.store, 'checkout', checkout)
+    response = client.post('/api/auto_step')
+    assert response.status_code == 409
+    assert response.get_json()['conflict'] is True
+
+
+def test_auto_stream_ends_with_finished_game(client):
+    new_game(client)
+    play_to_end(client)
+    response = client.get('/api/auto_stream?interval_ms=50')
+    assert response.status_code == 200
+    body = response.data.decode('utf-8')
+    assert body.startswith('event: step\n')
+    assert body.endswith('event: end\ndata: {}\n\n')
+
+
+def test_asgi_waits_for_a_busy_game_off_the_loop():
+    """Una partida ocupada (su lock tomado) no debe frenar las requests de las demás."""
+    busy, other = asgi.TestClient(), asgi.TestClient()
+    new_game(busy)
+    new_game(other)
+    checkout = app.store.checkout(busy.cookies[app.GAME_COOKIE])
+
+    async def scenario():
+        checkout.__enter__()
+        try:
+            waiting = asyncio.ensure_future(busy.open_async('POST', '/api/auto_step'))
+            await asyncio.sleep(0.05)
+            response = await asyncio.wait_for(other.open_async('POST', '/api/auto_step'), 5)
+            assert response.status_code == 200
+            assert not waiting.done()
+        finally:
+            checkout.__exit__(None, None, None)
+        return await asyncio.wait_for(waiting, 5)
+
+    assert busy._loop.run_until_complete(scenario()).status_code == 200
+    assert not asgi.game_locks
@@ -0,0 +1,81 @@
+"""
+Pruebas del motor por lotes (batch_engine) y del barajado en lote (shuffle.shuffle_batch).
+Los resultados en lote deben coincidir exactamente con OracleGame jugado paso a paso.
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from batch_engine import play_decks, play_seeded
+from game_logic import CLASSIC, GameConfig, OracleGame
+from shuffle import deck_typecode, is_permutation, shuffle_batch
+
+
+def play_out(deck, config):
+    """Resultado de OracleGame en modo automático para un mazo."""
+    game = OracleGame(config=config)
+    game.start_game(deck=list(deck))
+    game.auto_play_steps(100 * config.deck_size)
+    return game.game_state, game.moves_count, game.defeat_reason
+
+
+def test_deck_typecode_fits_deck_size():
+    assert deck_typecode(52) == 'b'
+    assert deck_typecode(128) == 'b'
+    assert deck_typecode(129) == 'h'
+    assert deck_typecode(32768) == 'h'
+    assert deck_typecode(32769) == 'i'
+
+
+def test_shuffle_batch_python_returns_permutations_of_large_decks():
+    """El backend NumPy con mazos grandes se prueba en test_play_seeded_large_variant_matches_oracle_game."""
+    for deck in shuffle_batch(2, 40000, seed=5, use_numpy=False):
+        assert deck.typecode == 'i'
+        assert is_permutation(list(deck))
+
+
+def test_shuffle_batch_rejects_small_typecode():
+    with pytest.raises(ValueError):
+        shuffle_batch(1, 40000, typecode='h', use_numpy=False)
+
+
+def test_play_decks_rejects_invalid_decks():
+    decks = shuffle_batch(3, CLASSIC.deck_size, seed=1, use_numpy=True)
+    decks[1, 0] = decks[1, 1]
+    with pytest.raises(ValueError):
+        play_decks(decks)
+
+
+def test_play_seeded_matches_oracle_game():
+    decks = shuffle_batch(300, CLASSIC.deck_size, seed=7, use_numpy=True, typecode=CLASSIC.card_typecode)
+    result = play_seeded(300, seed=7)
+    assert [tuple(outcome) for outcome in result] == [play_out(deck, CLASSIC) for deck in decks]
+
+
+def test_play_decks_matches_oracle_game_with_small_budget():
+    """Las partidas que superan max_moves se resuelven aparte con el mismo resultado."""
+    config = GameConfig.get(ranks=6, copies=4, start_group=2)
+    decks = shuffle_batch(100, config.deck_size, seed=11, use_numpy=True, typecode=config.card_typecode)
+    result = play_decks(decks, config, max_moves=8)
+    assert result.resolved
+    assert [tuple(outcome) for outcome in result] == [play_out(deck, config) for deck in decks]
+
+
+def test_play_seeded_large_variant_matches_oracle_game():
+    """Mazos de más de 32767 cartas: los ids no deben desbordar el tipo del mazo."""
+    config = GameConfig.get(ranks=33000, copies=1)
+    decks = shuffle_batch(2, config.deck_size, seed=3, use_numpy=True, typecode=config.card_typecode)
+    result = play_seeded(2, seed=3, config=config)
+    assert [tuple(outcome) for outcome in result] == [play_out(deck, config) for deck in decks]
+
+
+def test_play_decks_detects_repeated_states_in_the_batch():
+    """Los ciclos se cortan en lote con la regla de estado repetido, sin resolve_deal."""
+    config = GameConfig.get(ranks=3, copies=3, start_group=1, deal_sizes=(2, 5, 2))
+    decks = shuffle_batch(300, config.deck_size, seed=13, use_numpy=True, typecode=config.card_typecode)
+    result = play_decks(decks, config)
+    assert not result.resolved
+    outcomes = [tuple(outcome) for outcome in result]
+    assert outcomes == [play_out(deck, config) for deck in decks]
+    assert any(reason.startswith("Bucle infinito: el oráculo") for _, _, reason in outcomes)
@@ -0,0 +1,252 @@
+"""
+Pruebas del motor (game_logic.OracleGame) contra las reglas originales.
+ListOracle juega igual que el OracleGame original: cada grupo es una lista
+(pop(0) y append) y los estados vistos se guardan en un set. El motor
+compacto debe producir exactamente las mismas posiciones y resultados.
+"""
+
+import random
+import struct
+
+import pytest
+
+from game_logic import CLASSIC, DEFEATS, VICTORIES, FrozenDict, GameConfig, OracleGame, defeat_kind
+
+
+class ListOracle:
+    """Reglas originales del oráculo sobre listas de valores."""
+
+    def __init__(self, values, config):
+        self.config = config
+        self.groups = {}
+        slot = 0
+        for group, size in enumerate(config.deal_sizes, start=1):
+            self.groups[group] = list(values[slot:slot + size])
+            slot += size
+        self.current_group = config.start_group
+        self.moves = 0
+        self.game_state = "playing"
+        self.defeat_reason = ""
+        self.seen = {self.state()}
+        if not self.groups[self.current_group]:
+            self.game_state, self.defeat_reason = "defeat", "Centro vacío al iniciar"
+
+    def state(self):
+        return self.current_group, tuple(tuple(cards) for cards in self.groups.values())
+
+    def is_sorted(self, group):
+        cards = self.groups[group]
+        return len(cards) == self.config.copies and all(value == group for value in cards)
+
+    def step(self):
+        value = self.groups[self.current_group].pop(0)
+        self.groups[value].append(value)
+        self.current_group = group = value
+        self.moves += 1
+        cards = self.groups[group]
+        if all(self.is_sorted(g) for g in self.groups):
+            self.game_state = "victory"
+            return
+        if not cards:
+            reason = f"Grupo {group} vacío - no hay cartas para mover"
+        elif cards[0] == group and self.is_sorted(group):
+            reason = (f"Bucle infinito detectado: el grupo {group} está completamente ordenado "
+                      f"pero otros grupos no. ¡Imposible continuar!")
+        elif cards[0] == group and len(cards) == 1:
+            label = self.config.rank_labels[group - 1]
+            reason = f"Auto-loop: carta {label} apunta al mismo grupo {group} sin más cartas"
+        elif self.state() in self.seen:
+            reason = (f"Bucle infinito: el oráculo volvió a una posición ya vista en el "
+                      f"movimiento {self.moves}. ¡El oráculo se ha cerrado!")
+        else:
+            self.seen.add(self.state())
+            return
+        self.game_state, self.defeat_reason = "defeat", reason
+
+    def result(self):
+        return self.game_state, self.moves, self.defeat_reason
+
+
+def board(game):
+    """Grupo actual y valores de cada grupo, como ListOracle.state()."""
+    return game.current_group, tuple(tuple(card.value for card in game.groups[g]) for g in game.groups)
+
+
+def random_variant(rng):
+    """Variante chica con repartos desparejos: produce todas las razones de derrota."""
+    ranks, copies = rng.randint(2, 7), rng.randint(1, 5)
+    size = ranks * copies
+    cuts = sorted(rng.randint(0, size) for _ in range(ranks - 1))
+    deal_sizes = [end - start for start, end in zip([0] + cuts, cuts + [size])]
+    return GameConfig.get(ranks, copies, rng.randint(1, ranks), deal_sizes)
+
+
+def play_out(game):
+    game.auto_play_steps(100 * game.config.deck_size)
+    return game.game_state, game.moves_count, game.defeat_reason
+
+
+def test_classic_games_match_list_rules_move_by_move():
+    for seed in range(200):
+        game = OracleGame(random.Random(seed))
+        game.start_game()
+        reference = ListOracle([card.value for card in game.deck], CLASSIC)
+        assert board(game) == reference.state()
+        while game.game_state == "playing":
+            assert game.auto_play_step()[0]
+            reference.step()
+            assert board(game) == reference.state()
+        assert (game.game_state, game.moves_count, game.defeat_reason) == reference.result()
+
+
+def test_variants_match_list_rules():
+    rng = random.Random(3)
+    kinds = set()
+    for _ in range(2000):
+        config = random_variant(rng)
+        deck = list(range(config.deck_size))
+        rng.shuffle(deck)
+        game = OracleGame(config=config)
+        game.start_game(deck=deck)
+        reference = ListOracle([config.card_values[card_id] for card_id in deck], config)
+        while reference.game_state == "playing":
+            reference.step()
+        assert play_out(game) == reference.result()
+        kinds.add(defeat_kind(game.defeat_reason) if game.game_state == "defeat" else game.game_state)
+    # Todos los finales posibles (el grupo de destino nunca queda vacío)
+    assert kinds == {'victory', 'empty_center', 'auto_loop', 'sorted_group_loop', 'repeated_state'}
+
+
+def test_manual_moves_validate_like_auto_play():
+    game = OracleGame(random.Random(1))
+    game.start_game()
+    info = game.get_next_move_info()
+    assert game.make_move(info['from_group'], info['to_group'] % 13 + 1)[0] is False
+    assert game.make_move(info['from_group'] % 13 + 1, info['to_group'])[0] is False
+    assert game.moves_count == 0
+    applied, success, _ = game.make_moves([(info['from_group'], info['to_group'])])
+    assert (applied, success) == (1, True)
+
+
+def test_serialization_round_trip():
+    game = OracleGame(random.Random(5), snapshot_interval=4)
+    game.start_game()
+    game.auto_play_steps(10)
+    game.outcome_recorded = True
+    copy = OracleGame.from_bytes(game.to_bytes())
+    assert copy.get_current_state() == game.get_current_state()
+    assert list(copy.moves_history) == list(game.moves_history)
+    assert copy.snapshot_interval == 4
+    assert copy.outcome_recorded
+    assert copy.to_bytes() == game.to_bytes()
+    assert play_out(copy) == play_out(game)
+
+
+def test_serialization_round_trip_variant_with_custom_deal():
+    config = GameConfig.get(ranks=5, copies=3, start_group=2, deal_sizes=(4, 2, 3, 0, 6))
+    game = OracleGame(random.Random(2), config, snapshot_interval=0)
+    game.start_game()
+    game.auto_play_steps(3)
+    copy = OracleGame.from_bytes(game.to_bytes())
+    assert copy.config is config
+    assert copy.snapshot_interval == 0
+    assert board(copy) == board(game)
+    assert play_out(copy) == play_out(game)
+
+
+def test_from_bytes_rejects_truncated_data():
+    game = OracleGame(random.Random(1))
+    game.start_game()
+    with pytest.raises(ValueError):
+        OracleGame.from_bytes(game.to_bytes()[:-1])
+
+
+@pytest.mark.parametrize('extra', ['', 'II', 'IQ'])
+def test_from_bytes_reads_every_format_1_layout(extra):
+    """El formato 1 tuvo tres cabeceras: sin versión ni época, época de 32 y de 64 bits."""
+    game = OracleGame(random.Random(7))
+    game.start_game()
+    game.auto_play_steps(9)
+    data = game.to_bytes()
+    # Cabecera actual e intervalo de snapshots; lo que sigue no cambió desde el formato 1
+    body = data[struct.calcsize('<BBHiIIHIQdHIHB') + 4:]
+    epoch = game.epoch if extra == 'IQ' else game.epoch & 0xFFFFFFFF
+    stamp = (game.version, epoch) if extra else ()
+    fields = (1,) + struct.unpack_from('<BBHiIIH', data)[1:] + stamp
+    copy = OracleGame.from_bytes(struct.pack('<BBBbBHH' + extra, *fields) + body)
+    assert board(copy) == board(game)
+    assert list(copy.moves_history) == list(game.moves_history)
+    assert (copy.version, copy.epoch) == (stamp or (1, 0))
+    assert play_out(copy) == play_out(game)
+
+
+def test_state_payloads_are_read_only():
+    game = OracleGame(random.Random(1))
+    game.start_game()
+    group = game.get_current_state()['groups'][1]
+    assert isinstance(group, FrozenDict)
+    with pytest.raises(TypeError):
+        group['count'] = 0
+    with pytest.raises(TypeError):
+        group['cards'][0]['value'] = 0
+
+
+@pytest.mark.parametrize('snapshot_interval', [0, 1, 4, None])
+def test_seek_and_undo_restore_positions(snapshot_interval):
+    game = OracleGame(random.Random(11), snapshot_interval=snapshot_interval)
+    game.start_game()
+    boards = [board(game)]
+    while game.game_state == "playing":
+        game.auto_play_step()
+        boards.append(board(game))
+    final = (game.game_state, game.moves_count, game.defeat_reason)
+    total = game.moves_count
+
+    for target in sorted({total - 1, total // 2, total // 3, 1, 0}, reverse=True):
+        assert game.seek(target)[0]
+        assert game.moves_count == target
+        assert game.game_state == "playing"
+        assert board(game) == boards[target]
+
+    assert game.seek(total)[0]
+    assert (game.game_state, game.moves_count, game.defeat_reason) == final
+    assert game.undo(3)[0]
+    assert board(game) == boards[total - 3]
+    assert game.rewind()[0]
+    assert board(game) == boards[0]
+    assert game.undo()[0] is False
+
+
+def test_seek_after_loading_rebuilds_positions():
+    game = OracleGame(random.Random(4), snapshot_interval=4)
+    game.start_game()
+    boards = [board(game)]
+    for _ in range(20):
+        game.auto_play_step()
+        boards.append(board(game))
+    copy = OracleGame.from_bytes(game.to_bytes())
+    for target in (17, 9, 2):
+        assert copy.seek(target)[0]
+        assert board(copy) == boards[target]
+
+
+def test_replayed_ending_counts_once_in_metrics():
+    game = OracleGame(random.Random(11))
+    game.start_game()
+    play_out(game)
+    if game.game_state == "victory":
+        counter, labels = VICTORIES, ()
+    else:
+        counter, labels = DEFEATS, (defeat_kind(game.defeat_reason),)
+    counted = counter.value(*labels)
+    game.undo(3)
+    play_out(game)
+    copy = OracleGame.from_bytes(game.to_bytes())
+    copy.rewind()
+    play_out(copy)
+    assert counter.value(*labels) == counted
+    # Otro reparto (aunque sea igual) sí se cuenta
+    again = OracleGame(random.Random(11))
+    again.start_game()
+    play_out(again)
+    assert counter.value(*labels) == counted + 1
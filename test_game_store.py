@@ -0,0 +1,125 @@
+"""
+Pruebas de los almacenes de partidas (game_store). Dos SQLiteGameStore
+sobre el mismo archivo hacen de dos procesos del servidor.
+"""
+
+import os
+import random
+
+import pytest
+
+from game_logic import OracleGame
+from game_store import GameConflictError, GameStore, SQLiteGameStore
+
+GAME_ID = 'a' * 32
+
+
+def started(game, seed=1):
+    game.rng = random.Random(seed)
+    game.start_game()
+    return game
+
+
+def test_game_store_keeps_one_game_per_session():
+    store = GameStore()
+    with store.checkout(GAME_ID) as game:
+        started(game)
+    with store.checkout(GAME_ID) as again:
+        assert again is game
+    with store.checkout('b' * 32) as other:
+        assert other is not game
+    assert len(store) == 2
+    with pytest.raises(ValueError):
+        with store.checkout('../no-valido'):
+            pass
+
+
+def test_game_store_spills_and_restores_evicted_games(tmp_path):
+    store = GameStore(max_games=1, spill_dir=str(tmp_path))
+    with store.checkout(GAME_ID) as game:
+        started(game)
+        game.auto_play_steps(5)
+        state = game.get_current_state()
+    with store.checkout('b' * 32):
+        pass
+    assert GAME_ID not in store
+    with store.checkout(GAME_ID) as restored:
+        assert restored.get_current_state() == state
+
+
+def test_game_store_writes_spill_files_outside_the_lock(tmp_path, monkeypatch):
+    store = GameStore(max_games=1, spill_dir=str(tmp_path))
+    with store.checkout(GAME_ID) as game:
+        started(game)
+    recovered = []
+    to_bytes = OracleGame.to_bytes
+
+    def spy(self):
+        assert not store._lock.locked()
+        # Otra request pide la partida mientras se escribe: la recibe de memoria
+        with store.checkout(GAME_ID) as again:
+            recovered.append(again)
+        return to_bytes(self)
+
+    monkeypatch.setattr(OracleGame, 'to_bytes', spy)
+    with store.checkout('b' * 32):
+        pass
+    assert recovered == [game]
+    assert GAME_ID in store
+    # El archivo escrito quedó viejo y se borró
+    assert not os.listdir(tmp_path)
+
+
+def test_sqlite_store_shares_games_between_processes(tmp_path):
+    path = str(tmp_path / 'games.db')
+    first, second = SQLiteGameStore(path), SQLiteGameStore(path)
+    with first.checkout(GAME_ID) as game:
+        started(game)
+        game.auto_play_steps(3)
+        state = game.get_current_state()
+    with second.checkout(GAME_ID) as game:
+        assert game.get_current_state() == state
+        game.auto_play_step()
+    with first.checkout(GAME_ID) as game:
+        assert game.moves_count == 4
+
+
+def test_sqlite_store_rejects_stale_writes(tmp_path):
+    path = str(tmp_path / 'games.db')
+    first, second = SQLiteGameStore(path), SQLiteGameStore(path)
+    with first.checkout(GAME_ID) as game:
+        started(game)
+
+    with pytest.raises(GameConflictError):
+        with first.checkout(GAME_ID) as stale:
+            with second.checkout(GAME_ID) as fresh:
+                fresh.auto_play_steps(2)
+            stale.auto_play_step()
+
+    # La copia local descartada se vuelve a leer con los cambios del otro proceso
+    with first.checkout(GAME_ID) as game:
+        assert game.moves_count == 2
+
+
+def test_sqlite_store_reads_do_not_conflict(tmp_path):
+    path = str(tmp_path / 'games.db')
+    first, second = SQLiteGameStore(path), SQLiteGameStore(path)
+    with first.checkout(GAME_ID) as game:
+        started(game)
+    with first.checkout(GAME_ID) as reader:
+        with second.checkout(GAME_ID) as writer:
+            writer.auto_play_step()
+        reader.get_current_state()
+    with first.checkout(GAME_ID) as game:
+        assert game.moves_count == 1
+
+
+def test_sqlite_store_keeps_new_game_factory(tmp_path):
+    store = SQLiteGameStore(str(tmp_path / 'games.db'),
+                            factory=lambda: OracleGame(snapshot_interval=4))
+    with store.checkout(GAME_ID) as game:
+        started(game)
+        game.auto_play_step()
+    reloaded = SQLiteGameStore(str(tmp_path / 'games.db'))
+    with reloaded.checkout(GAME_ID) as game:
+        assert game.snapshot_interval == 4
@@ -0,0 +1,101 @@
+"""
+Pruebas de outcomes: resolver un reparto sin jugarlo debe dar el mismo
+resultado que jugarlo en modo automático con OracleGame.
+"""
+
+import random
+import struct
+
+import game_logic
+from game_logic import CLASSIC, GameConfig, OracleGame
+from outcomes import OutcomeCache, resolve_deal, resolve_game
+from test_game_logic import play_out, random_variant
+
+
+def test_resolve_deal_matches_classic_games():
+    for seed in range(300):
+        game = OracleGame(random.Random(seed))
+        game.start_game()
+        outcome = resolve_deal(game.deal_key())
+        assert tuple(outcome) == play_out(game)
+
+
+def test_resolve_deal_matches_variants():
+    rng = random.Random(8)
+    for _ in range(1000):
+        config = random_variant(rng)
+        game = OracleGame(rng, config)
+        game.start_game()
+        if game.game_state != "playing":
+            continue
+        outcome = resolve_deal(game.deal_key(), config)
+        assert tuple(outcome) == play_out(game)
+
+
+def test_outcome_cache_keys_variants_apart():
+    cache = OutcomeCache(maxsize=2)
+    game = OracleGame(random.Random(1))
+    game.start_game()
+    deal = game.deal_key()
+    assert cache.get(deal) == cache.get(deal) == resolve_deal(deal)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # Los mismos bytes en otra variante son otro reparto
+    config = GameConfig.get(ranks=13, copies=4, start_group=1)
+    assert cache.get(deal, config) == resolve_deal(deal, config)
+    assert cache.misses == 2
+
+    other = OracleGame(random.Random(2))
+    other.start_game()
+    cache.get(other.deal_key())
+    assert len(cache) == 2
+
+
+def test_resolve_deal_records_the_trajectory():
+    game = OracleGame(random.Random(21))
+    game.start_game()
+    deal = game.deal_key()
+    record = []
+    outcome = resolve_deal(deal, CLASSIC, record)
+    play_out(game)
+    assert len(record) == outcome.moves
+    assert [deal[slot] for slot in record] == [move['card']['value'] for move in game.moves_history]
+
+
+def test_precomputed_trajectory_plays_the_same_game():
+    for seed in range(50):
+        plain, precomputed = OracleGame(random.Random(seed)), OracleGame(random.Random(seed))
+        plain.start_game()
+        precomputed.start_game(precompute=True)
+        assert resolve_game(precomputed, cache=None) == resolve_game(plain, cache=None)
+        assert play_out(precomputed) == play_out(plain)
+        assert list(precomputed.moves_history) == list(plain.moves_history)
+
+
+def test_serialized_trajectory_is_not_recomputed(monkeypatch):
+    game = OracleGame(random.Random(9))
+    game.start_game(precompute=True)
+    game.auto_play_steps(5)
+    data = game.to_bytes()
+
+    def deal_trajectory(*args):
+        raise AssertionError('La trayectoria se volvió a calcular al cargar')
+
+    monkeypatch.setattr(game_logic, 'deal_trajectory', deal_trajectory)
+    copy = OracleGame.from_bytes(data)
+    assert copy.trajectory_outcome == game.trajectory_outcome
+    assert copy.to_bytes() == data
+    assert play_out(copy) == play_out(game)
+
+
+def test_format_3_recomputes_the_trajectory():
+    game = OracleGame(random.Random(9))
+    game.start_game(precompute=True)
+    game.auto_play_steps(5)
+    data = game.to_bytes()
+    # Formato 3: la misma cabecera y el intervalo de snapshots, sin la trayectoria
+    start = struct.calcsize('<BBHiIIHIQdHIHB') + 4
+    end = start + 7 + len(game.trajectory_outcome.defeat_reason.encode('utf-8')) + game.trajectory_outcome.moves
+    copy = OracleGame.from_bytes(b'\x03' + data[1:start] + data[end:])
+    assert copy.trajectory_outcome == game.trajectory_outcome
+    assert copy.to_bytes() == data